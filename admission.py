@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Admission Control
+=================
+Per-endpoint concurrency limits with a short, bounded wait queue, so a slow
+Anthropic API makes the server shed load quickly instead of tying up every
+request thread (and starving /health until the platform restarts it).
+
+Each worker process admits at most `capacity` tool requests at once, and each
+endpoint at most its own limit. A request that can't start waits in its
+endpoint's queue for up to `queue_timeout` seconds; once that queue is full,
+further requests are rejected immediately. Rejections carry a Retry-After
+estimate from the queue depth and the endpoint's recent service time.
+
+Some of the capacity is reserved per endpoint: `reserved={'chat': 3}` means
+the other endpoints together never hold the last 3 slots, so a burst of /audit
+traffic can't lock out the website chatbot. Endpoints without a limit (/health,
+/metrics, /jobs) are never queued.
+
+Limits are per process: with gunicorn, every request that is running or
+waiting holds a worker thread, so --threads must exceed capacity plus the
+queue sizes for /health to stay responsive (gunicorn.conf.py sizes it).
+"""
+
+import math
+import time
+import threading
+from typing import Dict, Any, Optional
+
+# Service time assumed for Retry-After before an endpoint has finished a request
+DEFAULT_SERVICE_SECONDS = 5.0
+
+# Weight of the newest request in the service time moving average
+SERVICE_TIME_ALPHA = 0.2
+
+MAX_RETRY_AFTER_SECONDS = 120
+
+
+def parse_limits(spec: str, defaults: Dict[str, int]) -> Dict[str, int]:
+    """'audit=2,chat=8' -> defaults with those entries replaced."""
+    limits = dict(defaults)
+    for part in filter(None, (item.strip() for item in spec.split(','))):
+        name, _, value = part.partition('=')
+        limits[name.strip()] = int(value)
+    return limits
+
+
+class Ticket:
+    """Outcome of one admission attempt; admitted tickets must be released."""
+
+    def __init__(self, endpoint: str, admitted: bool, waited: float,
+                 reason: Optional[str] = None, retry_after: Optional[int] = None):
+        self.endpoint = endpoint
+        self.admitted = admitted
+        self.waited = waited
+        self.reason = reason
+        self.retry_after = retry_after
+        self.started = time.perf_counter()
+
+
+class AdmissionController:
+    """Thread-based admission control for server.py (one per worker process)."""
+
+    def __init__(self, limits: Dict[str, int], queue_sizes: Dict[str, int], capacity: int,
+                 reserved: Optional[Dict[str, int]] = None, queue_timeout: float = 10.0):
+        self.limits = limits
+        self.queue_sizes = queue_sizes
+        self.capacity = capacity
+        self.reserved = reserved or {}
+        self.queue_timeout = queue_timeout
+
+        self._cond = threading.Condition()
+        self._running = {name: 0 for name in limits}
+        self._waiting = {name: 0 for name in limits}
+        self._total_running = 0
+        self._service_seconds: Dict[str, float] = {}
+        self._rejected: Dict[str, Dict[str, int]] = {name: {} for name in limits}
+
+    def limited(self, endpoint: str) -> bool:
+        return endpoint in self.limits
+
+    def _shared_capacity(self, endpoint: str) -> int:
+        """Slots this endpoint may use: everything except other endpoints' reservations."""
+        return self.capacity - sum(slots for name, slots in self.reserved.items() if name != endpoint)
+
+    def _can_start(self, endpoint: str) -> bool:
+        return (self._running[endpoint] < self.limits[endpoint]
+                and self._total_running < self._shared_capacity(endpoint))
+
+    def acquire(self, endpoint: str) -> Ticket:
+        """
+        Admit a request to endpoint, waiting in its queue if needed.
+
+        Returns:
+            A Ticket; if ticket.admitted is False the request should get a 429
+            with ticket.retry_after, otherwise release(ticket) when it finishes.
+        """
+        started = time.perf_counter()
+        with self._cond:
+            # Newcomers don't overtake requests that are already queued
+            if self._waiting[endpoint] == 0 and self._can_start(endpoint):
+                return self._admit(endpoint, started)
+
+            if self._waiting[endpoint] >= self.queue_sizes.get(endpoint, 0):
+                return self._reject(endpoint, 'queue_full', started)
+
+            self._waiting[endpoint] += 1
+            deadline = started + self.queue_timeout
+            try:
+                while not self._can_start(endpoint):
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        return self._reject(endpoint, 'queue_timeout', started)
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting[endpoint] -= 1
+            return self._admit(endpoint, started)
+
+    def _admit(self, endpoint: str, started: float) -> Ticket:
+        self._running[endpoint] += 1
+        self._total_running += 1
+        return Ticket(endpoint, True, time.perf_counter() - started)
+
+    def _reject(self, endpoint: str, reason: str, started: float) -> Ticket:
+        counts = self._rejected[endpoint]
+        counts[reason] = counts.get(reason, 0) + 1
+        return Ticket(endpoint, False, time.perf_counter() - started, reason, self._retry_after(endpoint))
+
+    def _retry_after(self, endpoint: str) -> int:
+        """Seconds until this endpoint has likely worked through the requests ahead of a new one."""
+        service = self._service_seconds.get(endpoint, DEFAULT_SERVICE_SECONDS)
+        ahead = self._running[endpoint] + self._waiting[endpoint]
+        seconds = ahead * service / max(1, self.limits[endpoint])
+        return max(1, min(MAX_RETRY_AFTER_SECONDS, math.ceil(seconds)))
+
+    def release(self, ticket: Ticket) -> None:
+        """Free an admitted ticket's slot and fold its duration into the service time."""
+        if not ticket.admitted:
+            return
+        duration = time.perf_counter() - ticket.started
+        with self._cond:
+            self._running[ticket.endpoint] -= 1
+            self._total_running -= 1
+            previous = self._service_seconds.get(ticket.endpoint)
+            self._service_seconds[ticket.endpoint] = duration if previous is None else (
+                SERVICE_TIME_ALPHA * duration + (1 - SERVICE_TIME_ALPHA) * previous
+            )
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                'capacity': self.capacity,
+                'running': self._total_running,
+                'reserved': dict(self.reserved),
+                'by_endpoint': {
+                    name: {
+                        'limit': self.limits[name],
+                        'running': self._running[name],
+                        'queued': self._waiting[name],
+                        'queue_size': self.queue_sizes.get(name, 0),
+                        'service_seconds': round(self._service_seconds[name], 3)
+                        if name in self._service_seconds else None,
+                        'rejected': dict(self._rejected[name]),
+                    }
+                    for name in self.limits
+                }
+            }
@@ -0,0 +1,513 @@
+#!/usr/bin/env python3
+"""
+ASGI API Server (async serving mode)
+====================================
+Async counterpart of server.py with the same endpoint surface, built on Quart
+(the asyncio implementation of the Flask API).
+
+Nearly all request time is spent waiting on Anthropic or on a customer's
+website. Here every tool runs as a coroutine on the shared AsyncAnthropic and
+httpx.AsyncClient instances, so one worker process can keep hundreds of LLM
+calls in flight instead of tying up a whole sync worker per request.
+
+Endpoints:
+    POST /audit       - marketing_audit.handle_request_async
+    POST /enrich      - lead_enrichment.handle_request_async
+    POST /enrich/batch - lead_enrichment.enrich_batch_async (NDJSON stream)
+    POST /qualify     - mca_qualification.handle_request_async
+    POST /chat        - chatbot.chat_async
+    POST /chat/stream - chatbot.chat_stream_async (Server-Sent Events)
+    POST /jobs/<type> - Queue an audit|enrich|qualify job, returns a job id
+    GET  /jobs/<id>   - Job status and result
+    GET  /health      - Health check
+    GET  /metrics     - Prometheus metrics (see metrics.py)
+
+Usage:
+    hypercorn asgi_server:app -b 0.0.0.0:5000
+
+    Or with several worker processes:
+    hypercorn -w 2 -b 0.0.0.0:5000 asgi_server:app
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import importlib
+from datetime import datetime
+from typing import Dict, Any, Tuple, Callable, Awaitable, Optional
+
+from quart import Quart, Response, request, jsonify, g
+
+from job_queue import JobQueue, AsyncJobExecutor
+from shared_clients import connection_stats
+from single_flight import AsyncSingleFlight, request_key
+import deadline
+import fast_json
+import http_encoding
+import metrics
+import rate_governor
+import request_log
+
+# ============================================================================
+# APP CONFIGURATION
+# ============================================================================
+
+app = Quart(__name__)
+app.json = http_encoding.FastJSONProvider(app)
+
+PORT = int(os.getenv('PORT', 5000))
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, SCRIPT_DIR)
+
+# Endpoint -> (script, required fields, timeout seconds); same limits as server.py
+TOOL_ENDPOINTS = {
+    'audit': ('marketing_audit.py', ['url', 'industry'], 120),
+    'enrich': ('lead_enrichment.py', ['domain'], 90),
+    'qualify': ('mca_qualification.py', ['company_name', 'annual_revenue', 'credit_score', 'business_age_months'], 60),
+    'chat': ('chatbot.py', ['message'], 90),
+}
+
+# Collapse concurrent identical requests to these tools into one execution
+COALESCE_REQUESTS = os.getenv('COALESCE_REQUESTS', 'true').lower() == 'true'
+COALESCED_TOOLS = ('marketing_audit.py', 'lead_enrichment.py', 'mca_qualification.py')
+
+# Endpoints that can also be queued through /jobs
+JOB_TYPES = ('audit', 'enrich', 'qualify')
+
+# Script name -> (module, coroutine function)
+ASYNC_ENTRY_POINTS = {
+    'marketing_audit.py': ('marketing_audit', 'handle_request_async'),
+    'lead_enrichment.py': ('lead_enrichment', 'handle_request_async'),
+    'mca_qualification.py': ('mca_qualification', 'handle_request_async'),
+    'chatbot.py': ('chatbot', 'chat_async'),
+}
+
+_async_handlers: Dict[str, Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]] = {}
+_job_executor: Optional[AsyncJobExecutor] = None
+single_flight = AsyncSingleFlight()
+
+
+def load_async_handlers() -> None:
+    """Import every tool module once per worker process."""
+    for script_name, (module_name, func_name) in ASYNC_ENTRY_POINTS.items():
+        module = importlib.import_module(module_name)
+        _async_handlers[script_name] = getattr(module, func_name)
+
+
+load_async_handlers()
+
+
+@app.after_request
+async def add_cors_headers(response):
+    """Enable CORS for Make.com and other external services (mirrors server.py)."""
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
+    response.headers['Access-Control-Allow-Headers'] = f'Content-Type, Authorization, {request_log.REQUEST_ID_HEADER}'
+    response.headers['Access-Control-Expose-Headers'] = request_log.REQUEST_ID_HEADER
+    return response
+
+
+@app.before_request
+async def start_request():
+    g.request_started = time.perf_counter()
+    g.request_id = request_log.begin_request(request.headers.get(request_log.REQUEST_ID_HEADER))
+
+
+@app.after_request
+async def finish_request(response):
+    """Count and log every request by route and echo its request id (see server.finish_request)."""
+    started = g.get('request_started')
+    if started is not None:
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        duration = time.perf_counter() - started
+        metrics.observe_request(endpoint, request.method, response.status_code, duration)
+        request_log.log_event('request', method=request.method, path=request.path,
+                              status=response.status_code, duration_ms=metrics.to_ms(duration))
+    if g.get('request_id'):
+        response.headers[request_log.REQUEST_ID_HEADER] = g.request_id
+    return response
+
+
+@app.after_request
+async def compress_response(response):
+    """gzip/brotli-compress finished JSON and text responses (see http_encoding.py)."""
+    if not isinstance(response.response, response.data_body_class) or 'Content-Encoding' in response.headers:
+        return response
+    if http_encoding.is_compressible(response.mimetype):
+        response.vary.add('Accept-Encoding')
+    encoded = http_encoding.compressed_body(
+        await response.get_data(), request.headers.get('Accept-Encoding'), response.mimetype
+    )
+    if encoded is not None:
+        body, encoding = encoded
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+
+@app.before_serving
+async def start_job_executor():
+    """Start draining the job queue once the event loop is running."""
+    global _job_executor
+    _job_executor = AsyncJobExecutor(JobQueue(), run_job)
+    _job_executor.ensure_started()
+
+
+# ============================================================================
+# HELPER FUNCTIONS
+# ============================================================================
+
+async def run_async_tool(script_name: str, input_data: Dict[str, Any], timeout: int = 120) -> Tuple[Dict[str, Any], int]:
+    """
+    Await a tool's async entry point with a timeout.
+
+    Unlike the thread-based in-process mode, a timed-out call is cancelled
+    rather than left running in the background. As in server.py, the tool
+    gets a deadline just inside timeout so it can return a partial result
+    first (see deadline.py).
+
+    Returns:
+        Tuple of (response_dict, http_status_code)
+    """
+    handler = _async_handlers[script_name]
+    tool = metrics.tool_label(script_name)
+
+    started = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(handler(deadline.with_deadline(input_data, timeout)), timeout=timeout)
+        status_code = 200
+        metrics.add_overhead(tool, 'queue', result, time.perf_counter() - started)
+
+    except asyncio.TimeoutError:
+        metrics.record_timeout(tool)
+        result, status_code = {
+            'error': f'Script execution timed out after {timeout} seconds',
+            'script': script_name,
+            'timestamp': datetime.utcnow().isoformat() + 'Z'
+        }, 504
+
+    except deadline.DeadlineExceeded as e:
+        metrics.record_timeout(tool)
+        result, status_code = {
+            'error': f'Request deadline exceeded: {str(e)}',
+            'script': script_name,
+            'timestamp': datetime.utcnow().isoformat() + 'Z'
+        }, 504
+
+    except Exception as e:
+        result, status_code = {
+            'error': f'Script execution failed: {str(e)}',
+            'script': script_name,
+            'error_type': type(e).__name__,
+            'timestamp': datetime.utcnow().isoformat() + 'Z'
+        }, 500
+
+    failed = status_code >= 500
+    request_log.log_event(
+        'tool_call', logging.ERROR if failed else logging.INFO,
+        tool=script_name, mode='async', status=status_code,
+        duration_ms=metrics.to_ms(time.perf_counter() - started),
+        **({'error': result.get('error'), 'error_type': result.get('error_type')} if failed else {})
+    )
+    request_log.log_payload('tool_input', input_data, failed=failed, tool=script_name)
+    return result, status_code
+
+
+async def run_tool(script_name: str, input_data: Dict[str, Any], timeout: int = 120) -> Tuple[Dict[str, Any], int]:
+    """Run a tool, sharing the result of an identical call that is already in flight."""
+    if not COALESCE_REQUESTS or script_name not in COALESCED_TOOLS:
+        return await run_async_tool(script_name, input_data, timeout)
+
+    (result, status_code), shared = await single_flight.do(
+        script_name,
+        request_key(script_name, input_data),
+        lambda: run_async_tool(script_name, input_data, timeout)
+    )
+    if shared:
+        request_log.log_event('request_coalesced', tool=script_name)
+    return result, status_code
+
+
+async def run_job(kind: str, payload: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+    """Run a queued /jobs request with the same tool and timeout as its sync endpoint."""
+    script_name, _, timeout = TOOL_ENDPOINTS[kind]
+    return await run_tool(script_name, payload, timeout=timeout)
+
+
+async def validate_request(endpoint: str) -> Tuple[Dict[str, Any], int, bool]:
+    """
+    Validate the JSON body and the endpoint's required fields.
+
+    Returns:
+        Tuple of (data_or_error, status_code, is_valid)
+    """
+    if not request.is_json:
+        return {
+            'error': 'Content-Type must be application/json',
+            'timestamp': datetime.utcnow().isoformat() + 'Z'
+        }, 400, False
+
+    try:
+        data = await request.get_json()
+    except Exception as e:
+        return {
+            'error': f'Invalid JSON: {str(e)}',
+            'timestamp': datetime.utcnow().isoformat() + 'Z'
+        }, 400, False
+
+    if not data:
+        return {
+            'error': 'Request body is empty',
+            'timestamp': datetime.utcnow().isoformat() + 'Z'
+        }, 400, False
+
+    _, required, _ = TOOL_ENDPOINTS[endpoint]
+    missing = [field for field in required if field not in data]
+    if missing:
+        return {
+            'error': f'Missing required fields: {", ".join(missing)}',
+            'required_fields': required,
+            'received_fields': list(data.keys()),
+            'timestamp': datetime.utcnow().isoformat() + 'Z'
+        }, 400, False
+
+    return data, 200, True
+
+
+async def run_endpoint(endpoint: str):
+    """Validate the request and run the endpoint's tool."""
+    data, status, is_valid = await validate_request(endpoint)
+    if not is_valid:
+        return jsonify(data), status
+
+    script_name, _, timeout = TOOL_ENDPOINTS[endpoint]
+    result, status_code = await run_tool(script_name, data, timeout=timeout)
+    return jsonify(result), status_code
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Encode one Server-Sent Events frame."""
+    return f"event: {event}\ndata: {fast_json.dumps(data).decode('utf-8')}\n\n"
+
+
+# ============================================================================
+# API ENDPOINTS
+# ============================================================================
+
+@app.route('/metrics', methods=['GET'])
+async def prometheus_metrics():
+    """Prometheus scrape endpoint, aggregated across workers."""
+    body, content_type = metrics.render_latest()
+    return Response(body, content_type=content_type)
+
+
+@app.route('/health', methods=['GET'])
+async def health_check():
+    """Health check endpoint for monitoring and load balancers."""
+    return jsonify({
+        'status': 'healthy',
+        'service': 'resultant-ai-api',
+        'server': 'asgi',
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'python_version': sys.version,
+        'async_tools': sorted(_async_handlers.keys()),
+        'anthropic_connections': connection_stats(),
+        'single_flight': single_flight.stats(),
+        'rate_governor': await asyncio.to_thread(rate_governor.stats)
+    }), 200
+
+
+@app.route('/audit', methods=['POST'])
+async def audit():
+    """Run marketing audit on a company website (see server.audit)."""
+    return await run_endpoint('audit')
+
+
+@app.route('/enrich', methods=['POST'])
+async def enrich():
+    """Enrich company data and score lead (see server.enrich)."""
+    return await run_endpoint('enrich')
+
+
+@app.route('/enrich/batch', methods=['POST'])
+async def enrich_batch():
+    """Enrich a list of domains, streaming NDJSON results (see server.enrich_batch)."""
+    if not request.is_json:
+        return jsonify({
+            'error': 'Content-Type must be application/json',
+            'timestamp': datetime.utcnow().isoformat() + 'Z'
+        }), 400
+
+    lead_enrichment = importlib.import_module('lead_enrichment')
+    try:
+        options = lead_enrichment.parse_batch_request(await request.get_json() or {})
+    except ValueError as e:
+        return jsonify({
+            'error': str(e),
+            'timestamp': datetime.utcnow().isoformat() + 'Z'
+        }), 400
+
+    request_log.log_event('enrich_batch_started', domains=len(options['items']),
+                          fetch_concurrency=options['fetch_concurrency'],
+                          llm_concurrency=options['llm_concurrency'])
+
+    async def generate():
+        async for line in lead_enrichment.enrich_batch_async(**options):
+            if line['type'] == 'summary':
+                request_log.log_event('enrich_batch_finished', succeeded=line['succeeded'],
+                                      failed=line['failed'], elapsed_seconds=line['elapsed_seconds'])
+            yield fast_json.dumps(line, default=str) + b'\n'
+
+    response = Response(generate(), mimetype='application/x-ndjson')
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.timeout = None
+    return response
+
+
+@app.route('/qualify', methods=['POST'])
+async def qualify():
+    """Qualify MCA application (see server.qualify)."""
+    return await run_endpoint('qualify')
+
+
+@app.route('/chat', methods=['POST'])
+async def chat():
+    """Website chatbot endpoint (see server.chat)."""
+    return await run_endpoint('chat')
+
+
+@app.route('/chat/stream', methods=['POST'])
+async def chat_stream():
+    """Streaming website chatbot endpoint (see server.chat_stream)."""
+    data, status, is_valid = await validate_request('chat')
+    if not is_valid:
+        return jsonify(data), status
+
+    chatbot = importlib.import_module('chatbot')
+    started = time.perf_counter()
+
+    async def generate():
+        ttft_ms = None
+        async for event in chatbot.chat_stream_async(data):
+            if event['event'] == 'delta' and ttft_ms is None:
+                ttft_ms = metrics.to_ms(time.perf_counter() - started)
+            yield format_sse(event['event'], event['data'])
+
+        request_log.log_event('chat_stream_completed', ttft_ms=ttft_ms,
+                              duration_ms=metrics.to_ms(time.perf_counter() - started))
+
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.timeout = None  # streams may outlive Quart's default response timeout
+    return response
+
+
+@app.route('/jobs/<job_type>', methods=['POST'])
+async def create_job(job_type: str):
+    """Queue a long-running audit, enrich or qualify request (see server.create_job)."""
+    if job_type not in JOB_TYPES:
+        return jsonify({
+            'error': f'Unknown job type: {job_type}',
+            'job_types': sorted(JOB_TYPES),
+            'timestamp': datetime.utcnow().isoformat() + 'Z'
+        }), 404
+
+    data, status, is_valid = await validate_request(job_type)
+    if not is_valid:
+        return jsonify(data), status
+
+    job_id = await asyncio.to_thread(_job_executor.queue.enqueue, job_type, data)
+    _job_executor.notify()
+
+    return jsonify({
+        'job_id': job_id,
+        'type': job_type,
+        'status': 'queued',
+        'status_url': f'/jobs/{job_id}',
+        'timestamp': datetime.utcnow().isoformat() + 'Z'
+    }), 202
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+async def get_job(job_id: str):
+    """Return a queued job's status, plus its result once finished."""
+    job = await asyncio.to_thread(_job_executor.queue.get, job_id)
+    if job is None:
+        return jsonify({
+            'error': f'Job not found: {job_id}',
+            'timestamp': datetime.utcnow().isoformat() + 'Z'
+        }), 404
+
+    return jsonify(job), 200
+
+
+@app.route('/', methods=['GET'])
+async def index():
+    """API summary endpoint."""
+    return jsonify({
+        'service': 'Resultant AI API Server (ASGI)',
+        'version': '1.0.0',
+        'endpoints': {
+            'GET /health': 'Health check',
+            'GET /metrics': 'Prometheus metrics',
+            'POST /audit': 'Run marketing audit (requires: url, industry; optional: force_refresh)',
+            'POST /enrich': 'Enrich company data (requires: domain; optional: company, force_refresh)',
+            'POST /enrich/batch': 'Enrich a list of domains, streamed as NDJSON (requires: domains)',
+            'POST /qualify': 'Qualify MCA application (requires: company_name, annual_revenue, credit_score, business_age_months)',
+            'POST /chat': 'Website chatbot (requires: message)',
+            'POST /chat/stream': 'Website chatbot with SSE token streaming (requires: message)',
+            'POST /jobs/<type>': 'Queue an audit, enrich or qualify job (same body as the sync endpoint)',
+            'GET /jobs/<id>': 'Job status and result'
+        }
+    }), 200
+
+
+# ============================================================================
+# ERROR HANDLERS
+# ============================================================================
+
+@app.errorhandler(404)
+async def not_found(error):
+    """Handle 404 errors."""
+    return jsonify({
+        'error': 'Endpoint not found',
+        'path': request.path,
+        'method': request.method,
+        'timestamp': datetime.utcnow().isoformat() + 'Z'
+    }), 404
+
+
+@app.errorhandler(405)
+async def method_not_allowed(error):
+    """Handle 405 errors."""
+    return jsonify({
+        'error': 'Method not allowed',
+        'path': request.path,
+        'method': request.method,
+        'timestamp': datetime.utcnow().isoformat() + 'Z'
+    }), 405
+
+
+@app.errorhandler(500)
+async def internal_error(error):
+    """Handle 500 errors."""
+    return jsonify({
+        'error': 'Internal server error',
+        'message': str(error),
+        'timestamp': datetime.utcnow().isoformat() + 'Z'
+    }), 500
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+if __name__ == '__main__':
+    print(f"Starting Resultant AI ASGI API Server on port {PORT}...", file=sys.stderr)
+    print("For production use: hypercorn asgi_server:app -b 0.0.0.0:$PORT", file=sys.stderr)
+    app.run(host='0.0.0.0', port=PORT)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Execution Mode Benchmark
+========================
+Compares the per-request overhead of the server.py execution modes:
+
+    subprocess - run_python_script(): new interpreter + cold imports per request
+    pool       - ToolWorkerPool.run(): warm subprocess, line-delimited JSON
+    inprocess  - run_in_process(): tool modules imported once, called directly
+
+By default the benchmark uses payloads that return before any network call
+(an empty chat message and an MCA application that fails validation), so it
+measures pure dispatch overhead and needs no API key. Pass --live to use real
+payloads instead (requires ANTHROPIC_API_KEY and network access).
+
+Usage:
+    python benchmarks/bench_execution_modes.py
+    python benchmarks/bench_execution_modes.py --iterations 50
+    python benchmarks/bench_execution_modes.py --live --iterations 3
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+from typing import Dict, Any, List, Tuple
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+# The tools refuse to call Claude without a key; the offline payloads never do.
+os.environ.setdefault('ANTHROPIC_API_KEY', 'sk-ant-REDACTED')
+# Defer the in-process tool imports so their one-time cost can be measured.
+os.environ['EXECUTION_MODE'] = 'subprocess'
+
+import server  # noqa: E402
+
+
+# ============================================================================
+# PAYLOADS
+# ============================================================================
+
+OFFLINE_CASES: List[Tuple[str, Dict[str, Any]]] = [
+    ('chatbot.py', {'message': '', 'conversation_history': [], 'page_context': {}}),
+    ('mca_qualification.py', {
+        'company_name': 'Benchmark Corp',
+        'annual_revenue': 500000,
+        'credit_score': 9999,
+        'business_age_months': 24
+    }),
+]
+
+LIVE_CASES: List[Tuple[str, Dict[str, Any]]] = [
+    ('chatbot.py', {
+        'message': 'We are looking for a propane delivery system',
+        'conversation_history': [],
+        'page_context': {'page_type': 'propane'}
+    }),
+    ('mca_qualification.py', {
+        'company_name': 'Benchmark Corp',
+        'annual_revenue': 500000,
+        'credit_score': 650,
+        'business_age_months': 24,
+        'industry': 'Retail'
+    }),
+]
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Return the pct-th percentile of samples (nearest-rank)."""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def time_calls(runner, script_name: str, payload: Dict[str, Any], iterations: int) -> List[float]:
+    """Call runner(script_name, payload) repeatedly and return latencies in ms."""
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        runner(script_name, payload)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark server.py execution modes')
+    parser.add_argument('--iterations', type=int, default=20, help='Calls per mode and payload')
+    parser.add_argument('--live', action='store_true', help='Use real payloads (calls Claude)')
+    args = parser.parse_args()
+
+    cases = LIVE_CASES if args.live else OFFLINE_CASES
+
+    # Import cost is paid once per worker in in-process mode; report it separately.
+    start = time.perf_counter()
+    server.load_tool_handlers()
+    load_ms = (time.perf_counter() - start) * 1000
+    server.tool_pool.start()
+
+    modes = {
+        'subprocess': server.run_python_script,
+        'pool': server.tool_pool.run,
+        'inprocess': server.run_in_process,
+    }
+
+    print(f"{'script':<24}{'mode':<12}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    print('-' * 66)
+
+    for script_name, payload in cases:
+        means = {}
+        for mode, runner in modes.items():
+            latencies = time_calls(runner, script_name, payload, args.iterations)
+            means[mode] = statistics.mean(latencies)
+            print(f"{script_name:<24}{mode:<12}{means[mode]:>10.1f}"
+                  f"{percentile(latencies, 50):>10.1f}{percentile(latencies, 95):>10.1f}")
+        for mode in ('pool', 'inprocess'):
+            print(f"{'':<24}{mode + ' gain':<16}{means['subprocess'] / max(means[mode], 0.001):>9.1f}x")
+
+    print(f"\nOne-time in-process import cost per worker: {load_ms:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
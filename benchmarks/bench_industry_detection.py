@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Industry Detection Benchmark
+============================
+Per-turn cost of chatbot industry detection on a synthetic corpus of long
+conversations: the previous detect_industry() (a substring check per keyword
+list on the new message, then a rescan of the whole joined history) against
+classify_turn() (one compiled pattern over the new message, plus the
+session's running tally).
+
+Conversations mix filler with industry keywords in visitor messages and
+long assistant replies, the way real sessions do. Reports the mean cost per
+turn at several conversation depths and how often the two implementations
+agree (the old one's 'agencies'/'logistics' results counted as
+'agency'/'trucking').
+
+Usage:
+    python benchmarks/bench_industry_detection.py
+    python benchmarks/bench_industry_detection.py --conversations 1000 --turns 50
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from typing import Dict, List, Tuple
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import chatbot  # noqa: E402
+
+PAGE_TYPES = ['homepage', 'homepage', 'propane', 'field-services', 'agencies', 'b2b', 'logistics', 'case-studies']
+FILLER = ('we have a small team and most of our process still runs on paper forms and spreadsheets '
+          'how long does it usually take to set something like this up and what do you need from us').split()
+KEYWORDS = ['propane', 'heating oil', 'fuel delivery', 'concrete', 'ready-mix', 'yard', 'plumbing', 'HVAC',
+            'technicians', 'dispatch', 'agency', 'marketing', 'reporting', 'trucking', 'freight', 'BOLs',
+            'consulting', 'founder', 'scale']
+
+# Both implementations are measured without the industry_detection stage
+# timer, which wraps either one the same way in the server
+classify_turn = chatbot.classify_turn.__wrapped__
+
+
+# ============================================================================
+# PREVIOUS IMPLEMENTATION
+# ============================================================================
+
+def legacy_detect_industry(message: str, conversation_history: List[Dict[str, str]], page_type: str) -> str:
+    """chatbot.detect_industry() before the compiled classifier."""
+    message_lower = message.lower()
+
+    if any(word in message_lower for word in ['propane', 'fuel', 'heating oil', 'degree day', 'tank monitor']):
+        return 'propane'
+    if any(word in message_lower for word in ['concrete', 'ready-mix', 'ready mix', 'batching', 'yard', 'pour']):
+        return 'concrete'
+    if any(word in message_lower for word in ['plumb', 'hvac', 'electric', 'technician', 'service call', 'dispatch']):
+        return 'field-services'
+    if any(word in message_lower for word in ['agency', 'marketing', 'client work', 'reporting', 'lead qual']):
+        return 'agency'
+    if any(word in message_lower for word in ['trucking', 'logistics', 'hauling', 'freight', 'bol', 'bill of lading']):
+        return 'trucking'
+    if any(word in message_lower for word in ['b2b', 'consulting', 'professional services', 'founder', 'scale']):
+        return 'b2b'
+
+    if page_type in ['propane', 'field-services', 'agencies', 'b2b', 'logistics']:
+        return page_type
+
+    full_conversation = ' '.join([msg.get('content', '') for msg in conversation_history]).lower()
+
+    if 'propane' in full_conversation or 'fuel delivery' in full_conversation:
+        return 'propane'
+    if 'concrete' in full_conversation:
+        return 'concrete'
+    if 'plumb' in full_conversation or 'hvac' in full_conversation:
+        return 'field-services'
+    if 'agency' in full_conversation or 'marketing' in full_conversation:
+        return 'agency'
+    if 'trucking' in full_conversation or 'logistics' in full_conversation:
+        return 'trucking'
+
+    return 'general'
+
+
+# ============================================================================
+# CORPUS
+# ============================================================================
+
+def sentence(rng: random.Random, words: int, keyword_chance: float) -> str:
+    parts = [rng.choice(KEYWORDS) if rng.random() < keyword_chance else rng.choice(FILLER) for _ in range(words)]
+    return ' '.join(parts).capitalize() + '?'
+
+
+def conversation(rng: random.Random, turns: int) -> Tuple[str, List[str], List[str]]:
+    """(page type, visitor messages, assistant replies) for one conversation."""
+    visitor = [sentence(rng, rng.randint(6, 30), 0.04) for _ in range(turns)]
+    replies = [' '.join(sentence(rng, rng.randint(15, 30), 0.02) for _ in range(rng.randint(4, 10)))
+               for _ in range(turns)]
+    return rng.choice(PAGE_TYPES), visitor, replies
+
+
+# ============================================================================
+# MEASUREMENT
+# ============================================================================
+
+def run(corpus, depths: List[int]) -> Dict[str, object]:
+    legacy_us: Dict[int, float] = {depth: 0.0 for depth in depths}
+    compiled_us: Dict[int, float] = {depth: 0.0 for depth in depths}
+    legacy_total = compiled_total = 0.0
+    agree = turns = 0
+
+    for page_type, visitor, replies in corpus:
+        history: List[Dict[str, str]] = []
+        tally: Dict[str, float] = {}
+        for turn, (message, reply) in enumerate(zip(visitor, replies), start=1):
+            started = time.perf_counter()
+            legacy = legacy_detect_industry(message, history, page_type)
+            middle = time.perf_counter()
+            detected, tally = classify_turn(message, page_type, tally)
+            finished = time.perf_counter()
+
+            legacy_total += middle - started
+            compiled_total += finished - middle
+            if turn in legacy_us:
+                legacy_us[turn] += (middle - started) * 1e6
+                compiled_us[turn] += (finished - middle) * 1e6
+            agree += chatbot.INDUSTRY_ALIASES.get(legacy, legacy) == detected
+            turns += 1
+            history += [{'role': 'user', 'content': message}, {'role': 'assistant', 'content': reply}]
+
+    count = len(corpus)
+    return {
+        'depths': [(depth, legacy_us[depth] / count, compiled_us[depth] / count) for depth in depths],
+        'legacy_total_ms': legacy_total * 1000, 'compiled_total_ms': compiled_total * 1000,
+        'turns': turns, 'agreement': agree / turns
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare chatbot industry detection implementations')
+    parser.add_argument('--conversations', type=int, default=500)
+    parser.add_argument('--turns', type=int, default=30, help='Turns per conversation')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = [conversation(rng, args.turns) for _ in range(args.conversations)]
+    chatbot.get_industry_classifier()  # compile outside the timed loop
+    depths = sorted({1, 5, 10, 20, args.turns} & set(range(1, args.turns + 1)))
+    results = run(corpus, depths)
+
+    print(f"{args.conversations} conversations x {args.turns} turns ({results['turns']} turns)\n")
+    print(f"{'turn':<8}{'previous us':>14}{'compiled us':>14}")
+    print('-' * 36)
+    for depth, legacy, compiled in results['depths']:
+        print(f"{depth:<8}{legacy:>14.1f}{compiled:>14.1f}")
+    print(f"\ntotal: previous {results['legacy_total_ms']:.0f} ms, compiled {results['compiled_total_ms']:.0f} ms")
+    print(f"agreement: {results['agreement']:.1%}")
+
+
+if __name__ == '__main__':
+    main()
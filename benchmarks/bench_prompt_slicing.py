@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+System Prompt Slicing Benchmark
+===============================
+Input tokens and time to first token for each chatbot system prompt variant
+(chatbot.SYSTEM_PROMPT_VARIANTS) against the full SYSTEM_PROMPT sent to
+'general' visitors.
+
+Offline, tokens are estimated the way the rate governor does (about 4
+characters per token) and no latency is measured. Pass --live to count
+tokens exactly with the count_tokens endpoint and time the first streamed
+token of --samples uncached requests per variant (requires
+ANTHROPIC_API_KEY and network access; each sample is a one-token reply).
+
+Also reports the per-request cost of looking up a prebuilt variant versus
+assembling it from its modules.
+
+Usage:
+    python benchmarks/bench_prompt_slicing.py
+    python benchmarks/bench_prompt_slicing.py --live --samples 10
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+from typing import Dict, Optional
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import chatbot  # noqa: E402
+import rate_governor  # noqa: E402
+
+QUESTION = [{'role': 'user', 'content': 'How much does a system like this cost?'}]
+
+
+# ============================================================================
+# MEASUREMENT
+# ============================================================================
+
+def estimated_tokens(prompt: str) -> int:
+    return rate_governor.estimate_input_tokens({'system': prompt, 'messages': QUESTION})
+
+
+def counted_tokens(client, prompt: str) -> int:
+    return client.messages.count_tokens(model=chatbot.MODEL_NAME, system=prompt, messages=QUESTION).input_tokens
+
+
+def first_token_ms(client, prompt: str, samples: int) -> float:
+    """Median time to the first streamed token, with the prompt sent uncached."""
+    latencies = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        with client.messages.stream(model=chatbot.MODEL_NAME, max_tokens=1, system=prompt, messages=QUESTION) as stream:
+            next(iter(stream.text_stream), None)
+            latencies.append((time.perf_counter() - started) * 1000)
+    return statistics.median(latencies)
+
+
+def lookup_us(fn, iterations: int = 20000) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure chatbot system prompt variants')
+    parser.add_argument('--live', action='store_true', help='Count tokens and time requests against the API')
+    parser.add_argument('--samples', type=int, default=5, help='Requests per variant with --live')
+    args = parser.parse_args()
+
+    client = chatbot.get_anthropic_client(chatbot.ANTHROPIC_API_KEY) if args.live else None
+    variants: Dict[str, str] = {'general': chatbot.SYSTEM_PROMPT, **chatbot.SYSTEM_PROMPT_VARIANTS}
+
+    tokens = {name: counted_tokens(client, prompt) if client else estimated_tokens(prompt)
+              for name, prompt in variants.items()}
+    latency: Dict[str, Optional[float]] = {
+        name: first_token_ms(client, prompt, args.samples) if client else None for name, prompt in variants.items()
+    }
+
+    print(f"tokens: {'count_tokens' if client else 'estimated'}  model: {chatbot.MODEL_NAME}\n")
+    header = f"{'variant':<16}{'input tokens':>14}{'saved':>8}"
+    print(header + (f"{'first token ms':>16}{'saved ms':>10}" if client else ''))
+    print('-' * (len(header) + (26 if client else 0)))
+    for name in variants:
+        saved = 1 - tokens[name] / tokens['general']
+        line = f"{name:<16}{tokens[name]:>14}{saved:>8.0%}"
+        if client:
+            line += f"{latency[name]:>16.0f}{latency['general'] - latency[name]:>10.0f}"
+        print(line)
+
+    prebuilt = lookup_us(lambda: chatbot.system_prompt_for('propane'))
+    assembled = lookup_us(lambda: chatbot.build_system_prompt('propane'))
+    print(f"\nper request: prebuilt variant {prebuilt:.2f} us, assembling it {assembled:.2f} us")
+
+
+if __name__ == '__main__':
+    main()
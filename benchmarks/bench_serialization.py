@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Serialization Benchmark
+=======================
+CPU time per response spent encoding, decoding and compressing tool results,
+before and after the fast_json / http_encoding path:
+
+    before   - tool json.dumps(indent=2), server json.loads, jsonify with the
+               stdlib provider (sort_keys)
+    after    - tool fast_json.write_output (compact), fast_json.loads,
+               jsonify with FastJSONProvider
+    inprocess - jsonify only (no pipe), stdlib provider vs FastJSONProvider
+
+followed by the CPU cost and size of gzip / brotli on the encoded body.
+
+Payloads are audit and enrichment reports built by the tools' own
+format_output() from the fake API's canned replies, padded to about
+--reply-kb of Claude output (4096 output tokens is roughly 16 KB). The
+padding repeats items, so compression ratios here are better than on real
+reports; the CPU figures are representative.
+
+Usage:
+    python benchmarks/bench_serialization.py
+    python benchmarks/bench_serialization.py --iterations 5000 --reply-kb 32
+"""
+
+import os
+import sys
+import copy
+import json
+import time
+import argparse
+from typing import Any, Callable, Dict, List, Tuple
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('ANTHROPIC_API_KEY', 'sk-ant-REDACTED')
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+import fast_json  # noqa: E402
+import http_encoding  # noqa: E402
+import marketing_audit  # noqa: E402
+import lead_enrichment  # noqa: E402
+from fake_anthropic import AUDIT_REPLY, ENRICHMENT_REPLY  # noqa: E402
+
+
+# ============================================================================
+# PAYLOADS
+# ============================================================================
+
+def padded(reply: Dict[str, Any], target_bytes: int) -> Dict[str, Any]:
+    """Grow every list in reply with numbered copies of its items until it serializes to target_bytes."""
+    reply = copy.deepcopy(reply)
+    lists: List[list] = []
+
+    def collect(node):
+        if isinstance(node, dict):
+            for value in node.values():
+                collect(value)
+        elif isinstance(node, list):
+            lists.append(node)
+            for value in node:
+                collect(value)
+    collect(reply)
+
+    round_number = 1
+    while len(json.dumps(reply)) < target_bytes and lists:
+        for items in lists:
+            if items:
+                item = items[round_number % len(items)]
+                items.append(f'{item} ({round_number})' if isinstance(item, str) else copy.deepcopy(item))
+        round_number += 1
+    return reply
+
+
+def build_payloads(reply_kb: int) -> List[Tuple[str, Dict[str, Any]]]:
+    target = reply_kb * 1024
+    audit = marketing_audit.format_output(padded(json.loads(AUDIT_REPLY), target), 'https://example.com', 'SaaS')
+    enriched = padded(json.loads(ENRICHMENT_REPLY), target)
+    icp = lead_enrichment.load_icp_config()
+    enrichment = lead_enrichment.format_output(enriched, lead_enrichment.score_lead(enriched, icp),
+                                               'example.com', 'Example')
+    timings = {'fetch_ms': 412.3, 'parse_ms': 35.1, 'llm_ms': 8120.7, 'total_ms': 8571.0}
+    return [('audit', {**audit, 'timings': timings}), ('enrichment', {**enrichment, 'timings': timings})]
+
+
+# ============================================================================
+# MEASUREMENT
+# ============================================================================
+
+def cpu_us(fn: Callable[[], Any], iterations: int) -> float:
+    """Mean CPU microseconds per call."""
+    fn()
+    started = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - started) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure JSON and compression CPU per response')
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--reply-kb', type=int, default=16, help='Approximate size of the Claude findings')
+    args = parser.parse_args()
+
+    stdlib_app, fast_app = Flask('stdlib'), Flask('fast')
+    stdlib_app.json = DefaultJSONProvider(stdlib_app)
+    fast_app.json = http_encoding.FastJSONProvider(fast_app)
+
+    print(f"orjson: {fast_json.ORJSON_AVAILABLE}  brotli: {http_encoding.BROTLI_AVAILABLE}  "
+          f"iterations: {args.iterations}\n")
+
+    for name, payload in build_payloads(args.reply_kb):
+        with stdlib_app.app_context():
+            before_body = stdlib_app.json.response(payload).get_data()
+
+            def before():
+                tool_stdout = json.dumps(payload, indent=2)
+                stdlib_app.json.response(json.loads(tool_stdout)).get_data()
+
+            before_us = cpu_us(before, args.iterations)
+            inprocess_before_us = cpu_us(lambda: stdlib_app.json.response(payload).get_data(), args.iterations)
+
+        with fast_app.app_context():
+            after_body = fast_app.json.response(payload).get_data()
+
+            def after():
+                tool_stdout = fast_json.dumps(payload, default=str)
+                fast_app.json.response(fast_json.loads(tool_stdout)).get_data()
+
+            after_us = cpu_us(after, args.iterations)
+            inprocess_after_us = cpu_us(lambda: fast_app.json.response(payload).get_data(), args.iterations)
+
+        print(f"{name}: {len(before_body) / 1024:.1f} KB before, {len(after_body) / 1024:.1f} KB after")
+        print(f"  subprocess/pool path   {before_us:8.1f} us -> {after_us:8.1f} us  ({before_us / after_us:.1f}x)")
+        print(f"  in-process path        {inprocess_before_us:8.1f} us -> {inprocess_after_us:8.1f} us  "
+              f"({inprocess_before_us / inprocess_after_us:.1f}x)")
+
+        encodings = ['gzip'] + (['br'] if http_encoding.BROTLI_AVAILABLE else [])
+        for encoding in encodings:
+            compressed = http_encoding.compress(after_body, encoding)
+            compress_us = cpu_us(lambda: http_encoding.compress(after_body, encoding), args.iterations)
+            print(f"  {encoding:<4} compression       {compress_us:8.1f} us  "
+                  f"{len(compressed) / 1024:.1f} KB ({len(compressed) / len(after_body):.0%} of body)")
+        print()
+
+
+if __name__ == '__main__':
+    main()
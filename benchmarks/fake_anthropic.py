@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Fake Anthropic Messages API
+===========================
+A stand-in for api.anthropic.com so the servers can be load tested without an
+API key, network access, or token spend. Point the SDK at it with
+ANTHROPIC_BASE_URL=http://127.0.0.1:<port>.
+
+Every POST /v1/messages sleeps for --latency-ms (plus or minus up to
+--jitter-ms) and returns a canned reply shaped like the calling tool expects:
+marketing audit JSON, enrichment JSON, MCA qualification JSON, or plain chat
+text when a system prompt is sent. Requests with "stream": true get the same
+text back as a Server-Sent Events stream. Usage tokens are estimated from the
+prompt and reply sizes.
+
+Prompt caching is simulated: blocks marked with cache_control write the
+prefix up to them to an in-memory cache (5 minute TTL, refreshed on each
+hit), and a later request starting with a cached prefix reports it as
+cache_read_input_tokens rather than input_tokens - enough to check
+that a client's breakpoints actually produce hits. The real API's minimum
+cacheable length is not modelled.
+
+A fraction of requests (--error-rate) fail with --error-status (529
+overloaded by default), which the Anthropic SDK retries like the real thing.
+
+Usage:
+    python benchmarks/fake_anthropic.py --port 8765 --latency-ms 800
+    python benchmarks/fake_anthropic.py --latency-ms 2000 --jitter-ms 1500 --error-rate 0.02
+"""
+
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Tuple
+
+DEFAULT_REPLY = json.dumps({
+    'decision': 'APPROVED',
+    'risk_level': 'low',
+    'approval_amount_range': {'min': 50000, 'max': 75000},
+    'factor_rate_range': {'min': 1.2, 'max': 1.35},
+    'term_months': 9,
+    'reasoning': 'Fake response from benchmarks/fake_anthropic.py',
+    'next_steps': ['Collect bank statements'],
+    'red_flags': [],
+    'positive_factors': ['Consistent revenue']
+})
+
+ENRICHMENT_REPLY = json.dumps({
+    'company_profile': {
+        'name': 'Fixture Co', 'industry': 'SaaS', 'business_model': 'B2B',
+        'description': 'Fake response from benchmarks/fake_anthropic.py',
+        'headquarters_location': 'Austin, USA', 'website_quality': 'good'
+    },
+    'company_size': {'estimated_employees': 120, 'size_category': 'mid-market',
+                     'confidence': 'medium', 'reasoning': 'Fixture'},
+    'funding_and_growth': {'funding_stage': 'Series B', 'growth_indicators': ['Hiring page'],
+                           'is_hiring': True, 'expansion_signals': ['New office']},
+    'technology_stack': {'confirmed_technologies': ['Stripe', 'HubSpot'], 'likely_technologies': ['AWS'],
+                         'technical_sophistication': 'high', 'infrastructure': 'cloud'},
+    'market_presence': {'brand_maturity': 'growing', 'content_marketing': True, 'seo_quality': 'good',
+                        'social_media_activity': 'active', 'thought_leadership': True},
+    'business_intelligence': {'target_customers': 'Mid-market operations teams',
+                              'value_proposition': 'Automates scheduling',
+                              'competitive_positioning': 'Challenger', 'revenue_model': 'subscription'},
+    'contact_indicators': {'has_contact_page': True, 'has_demo_cta': True,
+                           'has_pricing_page': True, 'sales_readiness': 'high'}
+})
+
+AUDIT_REPLY = json.dumps({
+    'seo_analysis': {'score': 6, 'findings': ['Title present'], 'issues': ['Thin meta description']},
+    'content_strategy': {'score': 7, 'messaging_clarity': 'Clear', 'blog_quality': 'Average',
+                         'cta_effectiveness': 'Strong', 'findings': ['Demo CTA above the fold']},
+    'social_media_presence': {'score': 5, 'platforms_detected': ['LinkedIn'],
+                              'engagement_quality': 'Moderate', 'recommendations': ['Post weekly']},
+    'paid_advertising': {
+        'google_ads_potential': {'score': 7, 'rationale': 'Clear intent keywords',
+                                 'recommended_keywords': ['field service software']},
+        'social_ads_potential': {'score': 5, 'platforms': ['LinkedIn'], 'rationale': 'B2B audience'}
+    },
+    'quick_wins': [{'title': 'Rewrite meta description', 'impact': 'medium', 'effort': 'low',
+                    'description': 'Fake response from benchmarks/fake_anthropic.py',
+                    'expected_outcome': 'Higher CTR'}],
+    'overall_assessment': {'overall_score': 6, 'strengths': ['Clear offer'], 'weaknesses': ['Few backlinks'],
+                           'priority_actions': ['Fix meta tags']}
+})
+
+CHAT_REPLY = ("Happy to help! We build automation for field service teams - dispatch, "
+              "invoicing and customer updates. Want to book a quick call to see it in action?")
+
+
+def reply_for(body: Dict[str, Any]) -> str:
+    """Pick the canned reply matching the tool that sent the request."""
+    if body.get('system'):
+        return CHAT_REPLY
+    prompt = json.dumps(body.get('messages', []))
+    if 'marketing audit' in prompt:
+        return AUDIT_REPLY
+    if 'sales intelligence analyst' in prompt:
+        return ENRICHMENT_REPLY
+    return DEFAULT_REPLY
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def prompt_blocks(body: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """System then message content, as the block sequence the prompt cache sees."""
+    system = body.get('system') or []
+    blocks = [{'type': 'text', 'text': system}] if isinstance(system, str) else list(system)
+    for message in body.get('messages', []):
+        content = message.get('content', '')
+        message_blocks = [{'type': 'text', 'text': content}] if isinstance(content, str) else content
+        blocks.extend({**block, 'role': message.get('role')} for block in message_blocks)
+    return blocks
+
+
+class PromptCache:
+    """Prefix hashes written at cache_control breakpoints, with expiry."""
+
+    TTL_SECONDS = 300
+
+    def __init__(self):
+        self._expires: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def usage(self, body: Dict[str, Any]) -> Tuple[int, int, int]:
+        """(input_tokens, cache_read_input_tokens, cache_creation_input_tokens) for a request."""
+        prefix = hashlib.sha256()
+        tokens = 0
+        boundaries = []  # (prefix digest, tokens up to here, is a breakpoint)
+        for block in prompt_blocks(body):
+            marked = 'cache_control' in block
+            block = {key: value for key, value in block.items() if key != 'cache_control'}
+            prefix.update(json.dumps(block, sort_keys=True).encode('utf-8'))
+            tokens += estimate_tokens(json.dumps(block))
+            boundaries.append((prefix.hexdigest(), tokens, marked))
+
+        breakpoints = [index for index, (_, _, marked) in enumerate(boundaries) if marked]
+        if not breakpoints:
+            return tokens, 0, 0
+
+        now = time.monotonic()
+        with self._lock:
+            read = 0
+            for digest, prefix_tokens, _ in reversed(boundaries[:breakpoints[-1] + 1]):
+                if self._expires.get(digest, 0) > now:
+                    read = prefix_tokens
+                    self._expires[digest] = now + self.TTL_SECONDS
+                    break
+            for index in breakpoints:
+                self._expires[boundaries[index][0]] = now + self.TTL_SECONDS
+        written = boundaries[breakpoints[-1]][1] - read
+        return tokens - read - written, read, written
+
+
+class FakeMessagesHandler(BaseHTTPRequestHandler):
+    """Answers POST /v1/messages after a fixed delay."""
+
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+    latency_seconds = 0.0
+    jitter_seconds = 0.0
+    error_rate = 0.0
+    error_status = 529
+    prompt_cache = PromptCache()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+
+        time.sleep(max(0.0, self.latency_seconds + random.uniform(-self.jitter_seconds, self.jitter_seconds)))
+
+        if random.random() < self.error_rate:
+            self._send_error()
+        elif body.get('stream'):
+            self._stream(body)
+        else:
+            self._send_json(200, self._message(body))
+
+    def _message(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        text = reply_for(body)
+        input_tokens, cache_read, cache_write = self.prompt_cache.usage(body)
+        return {
+            'id': 'msg_fake',
+            'type': 'message',
+            'role': 'assistant',
+            'model': body.get('model', 'fake'),
+            'content': [{'type': 'text', 'text': text}],
+            'stop_reason': 'end_turn',
+            'stop_sequence': None,
+            'usage': {'input_tokens': input_tokens, 'output_tokens': estimate_tokens(text),
+                      'cache_read_input_tokens': cache_read, 'cache_creation_input_tokens': cache_write}
+        }
+
+    def _send_error(self) -> None:
+        error_type = 'overloaded_error' if self.error_status == 529 else 'api_error'
+        self._send_json(self.error_status, {
+            'type': 'error',
+            'error': {'type': error_type, 'message': 'Injected by benchmarks/fake_anthropic.py'}
+        })
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, body: Dict[str, Any]) -> None:
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+
+        message = self._message(body)
+        text = message['content'][0]['text']
+        output_tokens = message['usage']['output_tokens']
+        message['content'] = []
+        message['stop_reason'] = None
+        message['usage'] = {**message['usage'], 'output_tokens': 0}
+
+        def event(name: str, data: Dict[str, Any]) -> None:
+            self.wfile.write(f"event: {name}\ndata: {json.dumps(data)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+
+        event('message_start', {'type': 'message_start', 'message': message})
+        event('content_block_start', {'type': 'content_block_start', 'index': 0,
+                                      'content_block': {'type': 'text', 'text': ''}})
+        for word in text.split(' '):
+            event('content_block_delta', {'type': 'content_block_delta', 'index': 0,
+                                          'delta': {'type': 'text_delta', 'text': word + ' '}})
+        event('content_block_stop', {'type': 'content_block_stop', 'index': 0})
+        event('message_delta', {'type': 'message_delta',
+                                'delta': {'stop_reason': 'end_turn', 'stop_sequence': None},
+                                'usage': {'output_tokens': output_tokens}})
+        event('message_stop', {'type': 'message_stop'})
+        self.close_connection = True
+
+
+class FakeAnthropicServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # listen() backlog; load tests open many sockets at once
+
+
+def serve(port: int, latency_ms: float, jitter_ms: float = 0, error_rate: float = 0,
+          error_status: int = 529) -> None:
+    """Run the fake API until interrupted."""
+    FakeMessagesHandler.latency_seconds = latency_ms / 1000
+    FakeMessagesHandler.jitter_seconds = jitter_ms / 1000
+    FakeMessagesHandler.error_rate = error_rate
+    FakeMessagesHandler.error_status = error_status
+    FakeAnthropicServer(('127.0.0.1', port), FakeMessagesHandler).serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake Anthropic Messages API for load tests')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=800,
+                        help='Delay before each response (simulated model time)')
+    parser.add_argument('--jitter-ms', type=float, default=0,
+                        help='Add a uniform random delay in [-jitter, +jitter] to each response')
+    parser.add_argument('--error-rate', type=float, default=0,
+                        help='Fraction of requests answered with --error-status')
+    parser.add_argument('--error-status', type=int, default=529,
+                        help='Status for injected errors (529 overloaded, 500, 429, ...)')
+    args = parser.parse_args()
+
+    try:
+        serve(args.port, args.latency_ms, args.jitter_ms, args.error_rate, args.error_status)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Fixture Company Websites
+========================
+A local web server that serves realistic company homepages, so /audit and
+/enrich can be load tested without touching real customer sites.
+
+GET /sites/<n>/ returns homepage number n: a deterministic page (industry,
+name, copy, nav, footer, social links and third-party script tags picked from
+n) of roughly --page-kb kilobytes, with an ETag and Last-Modified so the
+conditional-GET path in marketing_audit.py is exercised too.
+
+Each response waits --latency-ms (plus or minus up to --jitter-ms), and a
+fraction of requests (--error-rate) get a 503.
+
+Usage:
+    python benchmarks/fixture_sites.py --port 8766
+    python benchmarks/fixture_sites.py --latency-ms 300 --jitter-ms 250 --error-rate 0.05
+
+    curl http://127.0.0.1:8766/sites/7/
+"""
+
+import re
+import time
+import random
+import hashlib
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+INDUSTRIES = [
+    ('Propane', 'propane delivery', 'Keep every tank full without the phone tag'),
+    ('Concrete', 'ready-mix concrete', 'Dispatch trucks and pours from one board'),
+    ('Field Services', 'HVAC and plumbing service', 'Schedule, dispatch and invoice from the field'),
+    ('SaaS', 'workflow automation software', 'Automate the busywork your team hates'),
+    ('Agency', 'performance marketing', 'Campaigns that pay for themselves'),
+    ('Logistics', 'regional freight', 'Real-time tracking for every load'),
+]
+
+NAME_PARTS = (['Summit', 'Blue Ridge', 'Ironwood', 'Harbor', 'Pioneer', 'Cedar', 'Northstar', 'Keystone'],
+              ['Energy', 'Supply', 'Works', 'Partners', 'Labs', 'Group', 'Systems', 'Co'])
+
+# Third-party tags that lead_enrichment.detect_technologies() looks for
+SCRIPT_TAGS = [
+    '<script async src="https://www.googletagmanager.com/gtag/js?id=G-FIXTURE"></script>',
+    '<script src="https://js.stripe.com/v3/"></script>',
+    '<script id="hs-script-loader" src="//js.hs-scripts.com/000000.js"></script>',
+    '<script src="https://widget.intercom.io/widget/fixture"></script>',
+    '<link rel="stylesheet" href="/wp-content/themes/fixture/style.css">',
+    '<script src="https://cdnjs.cloudflare.com/ajax/libs/react/18.2.0/umd/react.production.min.js"></script>',
+    '<script src="https://fixture-assets.s3.amazonaws.com/app.js"></script>',
+]
+
+SOCIAL_LINKS = ['https://www.linkedin.com/company/fixture', 'https://twitter.com/fixture',
+                'https://www.facebook.com/fixture', 'https://www.youtube.com/@fixture']
+
+PARAGRAPHS = [
+    'Our crews have served the region for over {years} years, and our customers stay because we show up when we say we will.',
+    'We replaced clipboards and whiteboards with a single dashboard so the office always knows where every job stands.',
+    'Get a quote in minutes, track your order in real time, and pay online - no phone calls required.',
+    'Certified technicians, transparent pricing and a satisfaction guarantee on every job we do.',
+    'Join hundreds of {industry} businesses that trust {name} to keep their operations running smoothly.',
+    'From first call to final invoice, every step is tracked, timed and visible to your whole team.',
+]
+
+# Page generation is deterministic per site, so this is a plain memo
+_page_cache = {}
+
+
+def build_page(site: int, page_kb: int) -> bytes:
+    """Homepage HTML for fixture site number `site`."""
+    key = (site, page_kb)
+    if key in _page_cache:
+        return _page_cache[key]
+
+    rng = random.Random(site)
+    industry, service, tagline = INDUSTRIES[site % len(INDUSTRIES)]
+    name = f"{rng.choice(NAME_PARTS[0])} {rng.choice(NAME_PARTS[1])}"
+    scripts = '\n    '.join(rng.sample(SCRIPT_TAGS, rng.randint(1, 4)))
+    socials = ''.join(f'<a href="{url}">{url.split("/")[2]}</a> '
+                      for url in rng.sample(SOCIAL_LINKS, rng.randint(0, len(SOCIAL_LINKS))))
+    nav = ''.join(f'<li><a href="/{item.lower()}">{item}</a></li>'
+                  for item in ['Services', 'Pricing', 'About', 'Blog', 'Careers', 'Contact'])
+
+    sections = []
+    size = 0
+    section = 0
+    while size < page_kb * 1024:
+        text = ' '.join(rng.choice(PARAGRAPHS).format(years=rng.randint(5, 60), industry=service, name=name)
+                        for _ in range(6))
+        block = (f'<section class="feature-{section}"><h2>{service.title()} feature {section + 1}</h2>'
+                 f'<p>{text}</p><a class="cta" href="/demo">Book a demo</a></section>\n')
+        sections.append(block)
+        size += len(block)
+        section += 1
+
+    html = f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="utf-8">
+    <title>{name} | {tagline}</title>
+    <meta name="description" content="{name} provides {service} for businesses across the region. {tagline}.">
+    <meta name="viewport" content="width=device-width, initial-scale=1">
+    {scripts}
+</head>
+<body>
+    <header><nav><ul>{nav}</ul></nav></header>
+    <main>
+        <h1>{tagline}</h1>
+        <p class="lead">{name} - {service} for {industry.lower()} teams.</p>
+        {''.join(sections)}
+    </main>
+    <footer>
+        <p>&copy; {name}. All rights reserved.</p>
+        <div class="social">{socials}</div>
+    </footer>
+</body>
+</html>
+""".encode('utf-8')
+
+    _page_cache[key] = html
+    return html
+
+
+class FixtureSiteHandler(BaseHTTPRequestHandler):
+    """Serves GET /sites/<n>/ with configurable delay and error rate."""
+
+    protocol_version = 'HTTP/1.1'
+    latency_seconds = 0.0
+    jitter_seconds = 0.0
+    error_rate = 0.0
+    page_kb = 60
+    last_modified = time.strftime('%a, %d %b %Y %H:%M:%S GMT', time.gmtime())
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        match = re.match(r'^/sites/(\d+)/?$', self.path.split('?')[0])
+        if not match:
+            self._send(404, b'not found', 'text/plain')
+            return
+
+        time.sleep(max(0.0, self.latency_seconds + random.uniform(-self.jitter_seconds, self.jitter_seconds)))
+
+        if random.random() < self.error_rate:
+            self._send(503, b'<html><body>Service Unavailable</body></html>', 'text/html')
+            return
+
+        page = build_page(int(match.group(1)), self.page_kb)
+        etag = '"' + hashlib.sha256(page).hexdigest()[:16] + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self._send(304, b'', None, etag)
+        else:
+            self._send(200, page, 'text/html; charset=utf-8', etag)
+
+    def _send(self, status: int, body: bytes, content_type, etag: str = None) -> None:
+        self.send_response(status)
+        if content_type:
+            self.send_header('Content-Type', content_type)
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', self.last_modified)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FixtureSiteServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def serve(port: int, latency_ms: float = 0, jitter_ms: float = 0, error_rate: float = 0,
+          page_kb: int = 60) -> None:
+    """Run the fixture sites until interrupted."""
+    FixtureSiteHandler.latency_seconds = latency_ms / 1000
+    FixtureSiteHandler.jitter_seconds = jitter_ms / 1000
+    FixtureSiteHandler.error_rate = error_rate
+    FixtureSiteHandler.page_kb = page_kb
+    FixtureSiteServer(('127.0.0.1', port), FixtureSiteHandler).serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fixture company websites for load tests')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--latency-ms', type=float, default=150, help='Delay before each page')
+    parser.add_argument('--jitter-ms', type=float, default=0,
+                        help='Add a uniform random delay in [-jitter, +jitter] to each page')
+    parser.add_argument('--error-rate', type=float, default=0, help='Fraction of requests answered with 503')
+    parser.add_argument('--page-kb', type=int, default=60, help='Approximate homepage size')
+    args = parser.parse_args()
+
+    try:
+        serve(args.port, args.latency_ms, args.jitter_ms, args.error_rate, args.page_kb)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
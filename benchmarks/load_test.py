@@ -0,0 +1,560 @@
+#!/usr/bin/env python3
+"""
+HTTP Load Test
+==============
+Drives one endpoint with a fixed number of concurrent clients and reports
+throughput (requests/second), latency percentiles and errors.
+
+With --suite it runs fully offline: it starts benchmarks/fake_anthropic.py and
+benchmarks/fixture_sites.py (both with configurable latency, jitter and error
+rate), then the server in each --mode given, and sends a weighted mix of
+/audit, /enrich, /qualify and /chat requests at a fixed arrival rate (--rps,
+open loop, so a slow server builds a queue instead of slowing the client
+down). It reports per-endpoint throughput and p50/p95/p99, plus CPU and RSS
+for each server worker (tool subprocesses included). Result caches are
+disabled unless --keep-caches is given, so every request does the full work.
+
+With --compare it starts benchmarks/fake_anthropic.py and then, one after the
+other, gunicorn server:app (sync and gthread workers) and hypercorn
+asgi_server:app with the same number of worker processes, all pointed at the
+fake API, and runs the same /qualify load against each. The fake API holds every LLM call for
+--latency-ms, so the comparison shows how many requests each server can keep
+in flight while waiting on Anthropic.
+
+Usage:
+    python benchmarks/load_test.py http://127.0.0.1:5000/qualify --concurrency 50 --duration 20
+    python benchmarks/load_test.py --compare
+    python benchmarks/load_test.py --compare --workers 2 --concurrency 200 --latency-ms 1500
+    python benchmarks/load_test.py --suite --mode subprocess --rps 5 --duration 30
+    python benchmarks/load_test.py --suite --mode subprocess,pool,inprocess,asgi --rps 20 \
+        --mix audit=1,enrich=2,qualify=2,chat=5 --latency-ms 1500 --jitter-ms 1000 --llm-error-rate 0.02
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import socket
+import asyncio
+import argparse
+import tempfile
+import threading
+import subprocess
+from typing import Dict, Any, List, Optional, Tuple
+
+import httpx
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(REPO_DIR, 'benchmarks')
+
+QUALIFY_PAYLOAD = {
+    'company_name': 'Load Test Corp',
+    'annual_revenue': 1200000,
+    'credit_score': 680,
+    'business_age_months': 36,
+    'industry': 'Retail',
+    'monthly_revenue_avg': 100000
+}
+
+
+# ============================================================================
+# LOAD DRIVER
+# ============================================================================
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+async def run_load(url: str, payload: Dict[str, Any], concurrency: int, duration: float,
+                   timeout: float = 120) -> Dict[str, Any]:
+    """Keep `concurrency` requests in flight for `duration` seconds."""
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    deadline = time.perf_counter() + duration
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+
+        async def user():
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await client.post(url, json=payload)
+                    if response.status_code == 200:
+                        latencies.append(time.perf_counter() - started)
+                    else:
+                        key = f'HTTP {response.status_code}'
+                        errors[key] = errors.get(key, 0) + 1
+                except httpx.HTTPError as e:
+                    key = type(e).__name__
+                    errors[key] = errors.get(key, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'elapsed_s': elapsed,
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+    }
+
+
+def print_result(label: str, result: Dict[str, Any]) -> None:
+    errors = sum(result['errors'].values())
+    print(f"{label:<28} {result['rps']:>8.1f} rps  "
+          f"p50 {result['p50_ms']:>7.0f} ms  p95 {result['p95_ms']:>7.0f} ms  "
+          f"p99 {result['p99_ms']:>7.0f} ms  ok {result['requests']:>5}  errors {errors}")
+    if result['errors']:
+        print(f"{'':<28} {json.dumps(result['errors'])}")
+
+
+# ============================================================================
+# SERVER COMPARISON
+# ============================================================================
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url: str, timeout: float = 30) -> None:
+    """Poll until url answers (any status), or raise."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f'{url} did not come up within {timeout} seconds')
+
+
+def start(cmd: List[str], env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(cmd, cwd=REPO_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def stop(process: Optional[subprocess.Popen]) -> None:
+    if process is not None and process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def compare(args) -> None:
+    fake_port = free_port()
+    env = dict(os.environ)
+    env['ANTHROPIC_API_KEY'] = env.get('ANTHROPIC_API_KEY', 'sk-ant-REDACTED')
+    env['ANTHROPIC_BASE_URL'] = f'http://127.0.0.1:{fake_port}'
+    env['EXECUTION_MODE'] = 'inprocess'
+    # Let the sync server use as many threads as there are clients, so the
+    # comparison is against its best configuration rather than the default.
+    env['IN_PROCESS_MAX_THREADS'] = str(args.concurrency)
+    env['ADMISSION_CONTROL'] = 'false'
+
+    servers = {
+        f'gunicorn sync (-w {args.workers})': lambda port: [
+            sys.executable, '-m', 'gunicorn', '-w', str(args.workers), '-k', 'sync', '-b', f'127.0.0.1:{port}',
+            '--timeout', '120', 'server:app'
+        ],
+        f'gunicorn gthread (-w {args.workers})': lambda port: [
+            sys.executable, '-m', 'gunicorn', '-w', str(args.workers), '-k', 'gthread',
+            '--threads', str(args.concurrency), '-b', f'127.0.0.1:{port}',
+            '--timeout', '120', 'server:app'
+        ],
+        f'hypercorn asgi (-w {args.workers})': lambda port: [
+            sys.executable, '-m', 'hypercorn', '-w', str(args.workers), '-b', f'127.0.0.1:{port}',
+            'asgi_server:app'
+        ],
+    }
+
+    fake = start([sys.executable, os.path.join(BENCH_DIR, 'fake_anthropic.py'),
+                  '--port', str(fake_port), '--latency-ms', str(args.latency_ms)], env)
+    try:
+        wait_for(f'http://127.0.0.1:{fake_port}/')
+        print(f"/qualify, {args.concurrency} concurrent clients, {args.duration:.0f}s each, "
+              f"fake LLM latency {args.latency_ms:.0f} ms\n")
+
+        for label, build_cmd in servers.items():
+            port = free_port()
+            server = start(build_cmd(port), env)
+            try:
+                wait_for(f'http://127.0.0.1:{port}/health')
+                result = asyncio.run(run_load(f'http://127.0.0.1:{port}/qualify', QUALIFY_PAYLOAD,
+                                              args.concurrency, args.duration))
+                print_result(label, result)
+            finally:
+                stop(server)
+    finally:
+        stop(fake)
+
+
+# ============================================================================
+# OFFLINE SUITE
+# ============================================================================
+
+SUITE_ENDPOINTS = ('audit', 'enrich', 'qualify', 'chat')
+
+CHAT_MESSAGES = [
+    'We are looking for a propane delivery system',
+    'How much does it cost for a 12 truck concrete company?',
+    'Can you integrate with QuickBooks?',
+    'Do you work with marketing agencies?',
+    'What does onboarding look like?',
+]
+PAGE_TYPES = ['homepage', 'propane', 'concrete', 'field-services', 'agencies', 'b2b']
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """'audit=1,chat=5' -> {'audit': 1.0, 'chat': 5.0}"""
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip().lstrip('/')
+        if name not in SUITE_ENDPOINTS:
+            raise ValueError(f'Unknown endpoint in --mix: {name} (expected one of {", ".join(SUITE_ENDPOINTS)})')
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def suite_payload(endpoint: str, n: int, sites_url: str) -> Dict[str, Any]:
+    """Request body number n for an endpoint; site and company vary so requests don't coalesce."""
+    site = n % 500
+    if endpoint == 'audit':
+        return {'url': f'{sites_url}/sites/{site}/', 'industry': ['SaaS', 'Propane', 'Concrete'][n % 3]}
+    if endpoint == 'enrich':
+        return {'domain': f'{sites_url}/sites/{site}/'}
+    if endpoint == 'qualify':
+        return {**QUALIFY_PAYLOAD, 'company_name': f'Load Test Corp {n}', 'annual_revenue': 500000 + n}
+
+    history = []
+    for turn in range(n % 4):
+        history.append({'role': 'user', 'content': CHAT_MESSAGES[(n + turn) % len(CHAT_MESSAGES)]})
+        history.append({'role': 'assistant', 'content': 'Thanks! Tell me a bit more about your team.'})
+    return {
+        'message': CHAT_MESSAGES[n % len(CHAT_MESSAGES)],
+        'conversation_history': history,
+        'page_context': {'page_type': PAGE_TYPES[n % len(PAGE_TYPES)], 'url': 'https://resultantai.com/'}
+    }
+
+
+async def run_rate(base_url: str, mix: Dict[str, float], rps: float, duration: float, sites_url: str,
+                   max_in_flight: int = 1000, timeout: float = 180) -> Dict[str, Any]:
+    """
+    Open-loop load: start requests at `rps` for `duration` seconds regardless of
+    how fast they complete, then wait for the stragglers.
+    """
+    rng = random.Random(42)
+    endpoints, weights = list(mix), list(mix.values())
+    stats = {name: {'sent': 0, 'latencies': [], 'errors': {}} for name in endpoints}
+    skipped = 0
+
+    limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+        slots = asyncio.Semaphore(max_in_flight)
+
+        async def send(endpoint: str, payload: Dict[str, Any]) -> None:
+            entry = stats[endpoint]
+            started = time.perf_counter()
+            try:
+                response = await client.post(f'{base_url}/{endpoint}', json=payload)
+                if response.status_code == 200:
+                    entry['latencies'].append(time.perf_counter() - started)
+                else:
+                    key = f'HTTP {response.status_code}'
+                    entry['errors'][key] = entry['errors'].get(key, 0) + 1
+            except httpx.HTTPError as e:
+                entry['errors'][type(e).__name__] = entry['errors'].get(type(e).__name__, 0) + 1
+            finally:
+                slots.release()
+
+        tasks = []
+        started = time.perf_counter()
+        n = 0
+        while time.perf_counter() - started < duration:
+            delay = started + n / rps - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            endpoint = rng.choices(endpoints, weights)[0]
+            if slots.locked():
+                skipped += 1  # the client itself is saturated; count instead of queueing
+            else:
+                await slots.acquire()
+                stats[endpoint]['sent'] += 1
+                tasks.append(asyncio.ensure_future(send(endpoint, suite_payload(endpoint, n, sites_url))))
+            n += 1
+
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    summary = {'elapsed_s': elapsed, 'offered_rps': rps, 'skipped': skipped, 'endpoints': {}}
+    all_latencies = []
+    for endpoint, entry in stats.items():
+        latencies = sorted(entry['latencies'])
+        all_latencies.extend(latencies)
+        summary['endpoints'][endpoint] = latency_summary(entry['sent'], latencies, entry['errors'], elapsed)
+    all_errors = {}
+    for entry in stats.values():
+        for key, count in entry['errors'].items():
+            all_errors[key] = all_errors.get(key, 0) + count
+    summary['total'] = latency_summary(sum(e['sent'] for e in stats.values()), sorted(all_latencies),
+                                       all_errors, elapsed)
+    return summary
+
+
+def latency_summary(sent: int, latencies: List[float], errors: Dict[str, int], elapsed: float) -> Dict[str, Any]:
+    return {
+        'sent': sent,
+        'ok': len(latencies),
+        'errors': errors,
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+    }
+
+
+class ResourceMonitor(threading.Thread):
+    """
+    Samples CPU time and RSS of a server process tree while the load runs.
+
+    Workers are the root's direct children (gunicorn/hypercorn workers), or the
+    root itself when it has none. A worker's CPU includes its tool subprocesses:
+    reaped ones through its children CPU times, live ones (warm pool workers)
+    from their own samples.
+    """
+
+    def __init__(self, pid: int, interval: float = 0.5):
+        super().__init__(daemon=True)
+        self.root = psutil.Process(pid)
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.first_cpu: Dict[int, float] = {}
+        self.last_cpu: Dict[int, float] = {}
+        self.owner: Dict[int, int] = {}
+        self.peak_rss: Dict[int, int] = {}
+        self.peak_tool_rss: Dict[int, int] = {}
+        self.alive: set = set()
+
+    @staticmethod
+    def cpu_total(proc) -> float:
+        times = proc.cpu_times()
+        return times.user + times.system + getattr(times, 'children_user', 0) + getattr(times, 'children_system', 0)
+
+    def workers(self) -> List:
+        children = [child for child in self.root.children()
+                    if 'resource_tracker' not in ' '.join(child.cmdline())]
+        return children or [self.root]
+
+    def sample(self) -> None:
+        alive = set()
+        for worker in self.workers():
+            tool_rss = 0
+            for proc in [worker] + worker.children(recursive=True):
+                try:
+                    cpu, rss = self.cpu_total(proc), proc.memory_info().rss
+                except psutil.Error:
+                    continue
+                self.first_cpu.setdefault(proc.pid, cpu)
+                self.last_cpu[proc.pid] = cpu
+                self.owner[proc.pid] = worker.pid
+                alive.add(proc.pid)
+                if proc.pid == worker.pid:
+                    self.peak_rss[worker.pid] = max(self.peak_rss.get(worker.pid, 0), rss)
+                else:
+                    tool_rss += rss
+            self.peak_tool_rss[worker.pid] = max(self.peak_tool_rss.get(worker.pid, 0), tool_rss)
+        self.alive = alive
+
+    def run(self) -> None:
+        self.started = time.perf_counter()
+        while not self.stop_event.is_set():
+            try:
+                self.sample()
+            except psutil.Error:
+                pass
+            self.stop_event.wait(self.interval)
+
+    def stop(self) -> Dict[int, Dict[str, float]]:
+        """Stop sampling and return {worker_pid: {'cpu_percent', 'rss_mb', 'tool_rss_mb'}}."""
+        try:
+            self.sample()
+        except psutil.Error:
+            pass
+        self.stop_event.set()
+        self.join()
+        elapsed = time.perf_counter() - self.started
+
+        report = {}
+        for worker_pid, rss in self.peak_rss.items():
+            cpu = self.last_cpu[worker_pid] - self.first_cpu[worker_pid]
+            # Exited tool processes are already in the worker's children CPU times
+            cpu += sum(self.last_cpu[pid] - self.first_cpu[pid] for pid in self.alive
+                       if self.owner.get(pid) == worker_pid and pid != worker_pid)
+            report[worker_pid] = {
+                'cpu_percent': cpu / elapsed * 100 if elapsed else 0.0,
+                'rss_mb': rss / 1024 / 1024,
+                'tool_rss_mb': self.peak_tool_rss.get(worker_pid, 0) / 1024 / 1024,
+            }
+        return report
+
+
+def suite_server(mode: str, args, port: int) -> Tuple[str, List[str], Dict[str, str]]:
+    """Label, command and extra environment for one --mode."""
+    bind = f'127.0.0.1:{port}'
+    if mode == 'asgi':
+        return (f'asgi (hypercorn -w {args.workers})',
+                [sys.executable, '-m', 'hypercorn', '-w', str(args.workers), '-b', bind, 'asgi_server:app'],
+                {})
+
+    cmd = [sys.executable, '-m', 'gunicorn', '-w', str(args.workers), '-b', bind, '--timeout', '180']
+    cmd += ['-k', 'gthread', '--threads', str(args.threads)] if args.threads > 1 else ['-k', 'sync']
+    env = {
+        'EXECUTION_MODE': mode,
+        'WORKER_POOL_SIZE': str(args.pool_size),
+    }
+    return f'{mode} (gunicorn -w {args.workers} --threads {args.threads})', cmd + ['server:app'], env
+
+
+def print_suite_result(label: str, result: Dict[str, Any], resources: Optional[Dict[int, Dict[str, float]]]) -> None:
+    total = result['total']
+    print(f"\n{label}: offered {result['offered_rps']:.1f} rps, achieved {total['rps']:.1f} rps "
+          f"over {result['elapsed_s']:.1f}s"
+          + (f", {result['skipped']} not sent (client at --max-in-flight)" if result['skipped'] else ''))
+    print(f"  {'endpoint':<10} {'sent':>6} {'ok':>6} {'errors':>7} {'rps':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, row in list(result['endpoints'].items()) + [('all', total)]:
+        print(f"  {name:<10} {row['sent']:>6} {row['ok']:>6} {sum(row['errors'].values()):>7} {row['rps']:>7.1f} "
+              f"{row['p50_ms']:>8.0f} {row['p95_ms']:>8.0f} {row['p99_ms']:>8.0f}")
+    if total['errors']:
+        print(f"  errors: {json.dumps(total['errors'])}")
+    if resources:
+        print(f"  {'worker pid':<10} {'cpu %':>7} {'rss MB':>8} {'tools MB':>9}")
+        for pid, row in resources.items():
+            print(f"  {pid:<10} {row['cpu_percent']:>7.1f} {row['rss_mb']:>8.1f} {row['tool_rss_mb']:>9.1f}")
+
+
+def suite(args) -> None:
+    if psutil is None:
+        print('psutil is not installed; CPU/RSS will not be reported (pip install psutil)', file=sys.stderr)
+
+    mix = parse_mix(args.mix)
+    fake_port, sites_port = free_port(), free_port()
+    sites_url = f'http://127.0.0.1:{sites_port}'
+    workdir = tempfile.mkdtemp(prefix='resultant-loadtest-')
+
+    env = dict(os.environ)
+    env.update({
+        'ANTHROPIC_API_KEY': env.get('ANTHROPIC_API_KEY', 'sk-ant-REDACTED'),
+        'ANTHROPIC_BASE_URL': f'http://127.0.0.1:{fake_port}',
+        'CACHE_DB_PATH': os.path.join(workdir, 'cache.db'),
+        'JOB_DB_PATH': os.path.join(workdir, 'jobs.db'),
+    })
+    env.pop('PROMETHEUS_MULTIPROC_DIR', None)  # gunicorn.conf.py makes a fresh one per run
+    if not args.keep_caches:
+        env.update({'ENRICH_CACHE_TTL_HOURS': '0', 'AUDIT_CACHE_TTL_HOURS': '0'})
+    if args.no_admission:
+        env['ADMISSION_CONTROL'] = 'false'
+
+    fake = start([sys.executable, os.path.join(BENCH_DIR, 'fake_anthropic.py'), '--port', str(fake_port),
+                  '--latency-ms', str(args.latency_ms), '--jitter-ms', str(args.jitter_ms),
+                  '--error-rate', str(args.llm_error_rate)], env)
+    sites = start([sys.executable, os.path.join(BENCH_DIR, 'fixture_sites.py'), '--port', str(sites_port),
+                   '--latency-ms', str(args.site_latency_ms), '--jitter-ms', str(args.site_jitter_ms),
+                   '--error-rate', str(args.site_error_rate)], env)
+    try:
+        wait_for(f'http://127.0.0.1:{fake_port}/')
+        wait_for(f'{sites_url}/sites/0/')
+        print(f"Mix {args.mix} at {args.rps:g} rps for {args.duration:.0f}s | "
+              f"LLM {args.latency_ms:.0f}±{args.jitter_ms:.0f} ms, {args.llm_error_rate:.0%} errors | "
+              f"sites {args.site_latency_ms:.0f}±{args.site_jitter_ms:.0f} ms, {args.site_error_rate:.0%} errors")
+
+        for mode in args.mode.split(','):
+            port = free_port()
+            label, cmd, extra_env = suite_server(mode.strip(), args, port)
+            server = start(cmd, {**env, **extra_env})
+            try:
+                wait_for(f'http://127.0.0.1:{port}/health', timeout=60)
+                monitor = ResourceMonitor(server.pid) if psutil else None
+                if monitor:
+                    monitor.start()
+                result = asyncio.run(run_rate(f'http://127.0.0.1:{port}', mix, args.rps, args.duration,
+                                              sites_url, args.max_in_flight))
+                print_suite_result(label, result, monitor.stop() if monitor else None)
+            finally:
+                stop(server)
+    finally:
+        stop(fake)
+        stop(sites)
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test a Resultant AI API endpoint')
+    parser.add_argument('url', nargs='?', help='Endpoint to POST to (omit with --compare)')
+    parser.add_argument('--payload', help='JSON request body (default: a valid /qualify application)')
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=15, help='Seconds per run')
+    parser.add_argument('--compare', action='store_true',
+                        help='Start the fake API, gunicorn and hypercorn, and compare them')
+    parser.add_argument('--workers', type=int, default=1, help='Server worker processes (--compare)')
+    parser.add_argument('--latency-ms', type=float, default=800, help='Fake LLM latency (--compare, --suite)')
+
+    offline = parser.add_argument_group('offline suite (--suite)')
+    offline.add_argument('--suite', action='store_true',
+                         help='Start the fake API, fixture sites and server, and drive a request mix at --rps')
+    offline.add_argument('--mode', default='inprocess',
+                         help='Comma-separated: subprocess, pool, inprocess (gunicorn) and/or asgi (hypercorn)')
+    offline.add_argument('--rps', type=float, default=10, help='Request arrival rate')
+    offline.add_argument('--mix', default='audit=1,enrich=2,qualify=2,chat=5', help='Endpoint weights')
+    offline.add_argument('--threads', type=int, default=32, help='gthread threads per gunicorn worker')
+    offline.add_argument('--pool-size', type=int, default=2, help='WORKER_POOL_SIZE for --mode pool')
+    offline.add_argument('--max-in-flight', type=int, default=1000, help='Client-side concurrency cap')
+    offline.add_argument('--jitter-ms', type=float, default=0, help='Fake LLM latency jitter')
+    offline.add_argument('--llm-error-rate', type=float, default=0, help='Fraction of LLM calls answered 529')
+    offline.add_argument('--site-latency-ms', type=float, default=150, help='Fixture site latency')
+    offline.add_argument('--site-jitter-ms', type=float, default=0, help='Fixture site latency jitter')
+    offline.add_argument('--site-error-rate', type=float, default=0, help='Fraction of page loads answered 503')
+    offline.add_argument('--keep-caches', action='store_true', help='Leave the enrichment/audit result caches on')
+    offline.add_argument('--no-admission', action='store_true', help='Turn off admission control (no 429s)')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(args)
+        return
+    if args.suite:
+        suite(args)
+        return
+
+    if not args.url:
+        parser.error('url is required unless --compare or --suite is given')
+
+    payload = json.loads(args.payload) if args.payload else QUALIFY_PAYLOAD
+    result = asyncio.run(run_load(args.url, payload, args.concurrency, args.duration))
+    print_result(args.url, result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+Record/Replay Cassettes
+=======================
+Captures every outbound HTTP call the tools make - Anthropic API requests and
+customer website fetches - so a production incident or a benchmark can be
+replayed later, offline and deterministically.
+
+CASSETTE_MODE=record passes each call through to the network and stores the
+request key, response status, headers and body (zlib-compressed) plus when
+each chunk of the body arrived, in one SQLite file (CASSETTE_PATH) shared by
+every worker and tool subprocess. Streamed /chat responses keep their
+token-by-token timing.
+
+CASSETTE_MODE=replay never touches the network: each call is answered from the
+cassette with its recorded timing multiplied by CASSETTE_LATENCY_SCALE (1 for
+the original latencies, 0.1 to compress them 10x, 0 for none). A request that
+was recorded several times replays those responses in turn. A request that was
+never recorded gets a 404 (or, with CASSETTE_ON_MISS=live, goes to the
+network).
+
+Requests are matched on method, URL, body (JSON compared with sorted keys) and
+the conditional-GET headers, never on API keys or SDK bookkeeping headers.
+
+The hooks live in shared_clients.py: the Anthropic clients and the async
+website client get a CassetteTransport, and sync fetches go through
+shared_clients.http_get(), which mounts a CassetteAdapter.
+
+Usage:
+    CASSETTE_MODE=record CASSETTE_PATH=incident.db gunicorn -w 4 server:app
+    CASSETTE_MODE=replay CASSETTE_PATH=incident.db CASSETTE_LATENCY_SCALE=0.1 gunicorn -w 4 server:app
+"""
+
+import os
+import json
+import time
+import zlib
+import asyncio
+import hashlib
+import logging
+import threading
+import http.client
+from datetime import timedelta
+from typing import Dict, Any, List, Optional, Tuple
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+import request_log
+from sqlite_store import connect, init_db
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CASSETTE_MODE = os.getenv('CASSETTE_MODE', 'off').strip().lower()
+CASSETTE_PATH = os.getenv('CASSETTE_PATH', os.path.join(SCRIPT_DIR, 'cassettes.db'))
+CASSETTE_LATENCY_SCALE = float(os.getenv('CASSETTE_LATENCY_SCALE', '1.0'))
+CASSETTE_ON_MISS = os.getenv('CASSETTE_ON_MISS', 'error').strip().lower()
+
+MODES = ('off', 'record', 'replay')
+
+# Request headers that change the response, and so are part of the match
+KEY_HEADERS = ('if-none-match', 'if-modified-since')
+
+# Bodies are stored decoded, so these no longer describe them
+DROPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection', 'keep-alive'}
+
+# Body chunks arriving closer together than this are stored as one
+CHUNK_MERGE_MS = 5.0
+
+if CASSETTE_MODE not in MODES:
+    raise ValueError(f"CASSETTE_MODE must be one of {', '.join(MODES)}, got {CASSETTE_MODE!r}")
+
+
+def enabled() -> bool:
+    return CASSETTE_MODE != 'off'
+
+
+# ============================================================================
+# STORE
+# ============================================================================
+
+def request_key(method: str, url: str, body: Optional[bytes], headers) -> str:
+    """Stable match key for a request: method, URL, canonical body and conditional headers."""
+    if body:
+        try:
+            body = json.dumps(json.loads(body), sort_keys=True, separators=(',', ':')).encode('utf-8')
+        except ValueError:
+            pass
+    digest = hashlib.sha256()
+    digest.update(f"{method.upper()} {url}\n".encode('utf-8'))
+    for name in KEY_HEADERS:
+        digest.update(f"{name}: {headers.get(name, '')}\n".encode('utf-8'))
+    digest.update(body or b'')
+    return digest.hexdigest()
+
+
+class CassetteStore:
+    """Recorded interactions in one SQLite table (see sqlite_store.py)."""
+
+    def __init__(self, path: str = CASSETTE_PATH):
+        self.path = path
+        self._replay_counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        init_db(self.path, """
+            CREATE TABLE IF NOT EXISTS interactions (
+                key TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                method TEXT NOT NULL,
+                url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                headers_ms REAL NOT NULL,
+                chunks TEXT NOT NULL,
+                recorded_at REAL NOT NULL,
+                PRIMARY KEY (key, seq)
+            );
+        """)
+
+    def record(self, key: str, method: str, url: str, status: int, headers: List[Tuple[str, str]],
+               body: bytes, headers_ms: float, chunks: List[Tuple[int, float]]) -> None:
+        """
+        Append one interaction. chunks is [(body_end_offset, ms_since_request_start), ...].
+        """
+        kept = [[name, value] for name, value in headers if name.lower() not in DROPPED_HEADERS]
+        with connect(self.path) as conn:
+            conn.execute(
+                'INSERT INTO interactions (key, seq, method, url, status, headers, body, headers_ms, chunks, recorded_at) '
+                'VALUES (?, (SELECT COALESCE(MAX(seq) + 1, 0) FROM interactions WHERE key = ?), ?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, key, method, url, status, json.dumps(kept), zlib.compress(body, 6),
+                 round(headers_ms, 1), json.dumps([[end, round(ms, 1)] for end, ms in chunks]), time.time())
+            )
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """Next recorded response for key (cycling through repeats), or None."""
+        with connect(self.path) as conn:
+            rows = conn.execute(
+                'SELECT status, headers, body, headers_ms, chunks FROM interactions WHERE key = ? ORDER BY seq',
+                (key,)
+            ).fetchall()
+        if not rows:
+            return None
+
+        with self._lock:
+            index = self._replay_counts.get(key, 0)
+            self._replay_counts[key] = index + 1
+        row = rows[index % len(rows)]
+        return {
+            'status': row['status'],
+            'headers': [tuple(pair) for pair in json.loads(row['headers'])],
+            'body': zlib.decompress(row['body']),
+            'headers_ms': row['headers_ms'],
+            'chunks': json.loads(row['chunks']),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with connect(self.path) as conn:
+            row = conn.execute(
+                'SELECT COUNT(*) AS interactions, COUNT(DISTINCT key) AS requests, '
+                'COALESCE(SUM(LENGTH(body)), 0) AS stored_bytes FROM interactions'
+            ).fetchone()
+        return dict(row)
+
+
+_store: Optional[CassetteStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> CassetteStore:
+    """The process-wide cassette store at CASSETTE_PATH."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = CassetteStore()
+        return _store
+
+
+class ChunkTimeline:
+    """Collects body chunks with their arrival time, merging ones that arrive together."""
+
+    def __init__(self, started: float):
+        self.started = started
+        self.body = bytearray()
+        self.chunks: List[List[float]] = []
+
+    def add(self, chunk: bytes) -> None:
+        self.body.extend(chunk)
+        elapsed_ms = (time.perf_counter() - self.started) * 1000
+        if self.chunks and elapsed_ms - self.chunks[-1][1] < CHUNK_MERGE_MS:
+            self.chunks[-1][0] = len(self.body)
+        else:
+            self.chunks.append([len(self.body), elapsed_ms])
+
+
+def replay_delays(entry: Dict[str, Any]) -> List[Tuple[bytes, float]]:
+    """[(chunk, seconds_since_request_start), ...] for a recorded body, scaled."""
+    body, start, pieces = entry['body'], 0, []
+    for end, ms in entry['chunks'] or [[len(body), entry['headers_ms']]]:
+        pieces.append((body[start:end], ms / 1000 * CASSETTE_LATENCY_SCALE))
+        start = end
+    return pieces
+
+
+def log_miss(method: str, url: str) -> None:
+    request_log.log_event('cassette_miss', logging.WARNING, method=method, url=url, on_miss=CASSETTE_ON_MISS)
+
+
+MISS_BODY = json.dumps({
+    'type': 'error',
+    'error': {'type': 'not_found_error', 'message': 'No cassette recording for this request'}
+}).encode('utf-8')
+
+
+# ============================================================================
+# HTTPX TRANSPORTS (Anthropic SDK, async website fetches)
+# ============================================================================
+
+def _decoded_headers(response: httpx.Response) -> List[Tuple[str, str]]:
+    return [(name, value) for name, value in response.headers.multi_items() if name.lower() not in DROPPED_HEADERS]
+
+
+class _RecordingStream(httpx.SyncByteStream):
+    """Yields the decoded body to the caller and stores the interaction once it has all been read."""
+
+    def __init__(self, response: httpx.Response, save):
+        self.response = response
+        self.save = save
+
+    def __iter__(self):
+        for chunk in self.response.iter_bytes():
+            self.save.timeline.add(chunk)
+            yield chunk
+        self.save()
+
+    def close(self) -> None:
+        self.response.close()
+
+
+class _AsyncRecordingStream(httpx.AsyncByteStream):
+    def __init__(self, response: httpx.Response, save):
+        self.response = response
+        self.save = save
+
+    async def __aiter__(self):
+        async for chunk in self.response.aiter_bytes():
+            self.save.timeline.add(chunk)
+            yield chunk
+        await asyncio.to_thread(self.save)
+
+    async def aclose(self) -> None:
+        await self.response.aclose()
+
+
+class _Save:
+    """Callable that writes one finished recording to the store."""
+
+    def __init__(self, key: str, request: httpx.Request, response: httpx.Response, started: float):
+        self.key = key
+        self.method = request.method
+        self.url = str(request.url)
+        self.status = response.status_code
+        self.headers = _decoded_headers(response)
+        self.headers_ms = (time.perf_counter() - started) * 1000
+        self.timeline = ChunkTimeline(started)
+
+    def __call__(self) -> None:
+        get_store().record(self.key, self.method, self.url, self.status, self.headers,
+                           bytes(self.timeline.body), self.headers_ms, self.timeline.chunks)
+
+
+class _ReplayStream(httpx.SyncByteStream):
+    def __init__(self, entry: Dict[str, Any], started: float):
+        self.pieces = replay_delays(entry)
+        self.started = started
+
+    def __iter__(self):
+        for chunk, at in self.pieces:
+            time.sleep(max(0.0, self.started + at - time.perf_counter()))
+            yield chunk
+
+
+class _AsyncReplayStream(httpx.AsyncByteStream):
+    def __init__(self, entry: Dict[str, Any], started: float):
+        self.pieces = replay_delays(entry)
+        self.started = started
+
+    async def __aiter__(self):
+        for chunk, at in self.pieces:
+            await asyncio.sleep(max(0.0, self.started + at - time.perf_counter()))
+            yield chunk
+
+
+def _key_for(request: httpx.Request, body: bytes) -> str:
+    return request_key(request.method, str(request.url), body, request.headers)
+
+
+class CassetteTransport(httpx.BaseTransport):
+    """Sync httpx transport wrapper that records to or replays from the cassette store."""
+
+    def __init__(self, transport: httpx.BaseTransport, mode: Optional[str] = None):
+        self.transport = transport
+        self.mode = mode or CASSETTE_MODE
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if self.mode == 'off':
+            return self.transport.handle_request(request)
+
+        started = time.perf_counter()
+        key = _key_for(request, request.read())
+
+        if self.mode == 'replay':
+            entry = get_store().lookup(key)
+            if entry is not None:
+                time.sleep(entry['headers_ms'] / 1000 * CASSETTE_LATENCY_SCALE)
+                return httpx.Response(entry['status'], headers=entry['headers'],
+                                      stream=_ReplayStream(entry, started))
+            log_miss(request.method, str(request.url))
+            if CASSETTE_ON_MISS != 'live':
+                return httpx.Response(404, headers={'content-type': 'application/json', 'x-cassette': 'miss'},
+                                      content=MISS_BODY)
+            return self.transport.handle_request(request)
+
+        raw = self.transport.handle_request(request)
+        response = httpx.Response(raw.status_code, headers=raw.headers, stream=raw.stream, request=request)
+        save = _Save(key, request, response, started)
+        return httpx.Response(raw.status_code, headers=save.headers, stream=_RecordingStream(response, save),
+                              extensions=raw.extensions)
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class AsyncCassetteTransport(httpx.AsyncBaseTransport):
+    """Async counterpart of CassetteTransport."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, mode: Optional[str] = None):
+        self.transport = transport
+        self.mode = mode or CASSETTE_MODE
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self.mode == 'off':
+            return await self.transport.handle_async_request(request)
+
+        started = time.perf_counter()
+        key = _key_for(request, await request.aread())
+
+        if self.mode == 'replay':
+            entry = await asyncio.to_thread(get_store().lookup, key)
+            if entry is not None:
+                await asyncio.sleep(entry['headers_ms'] / 1000 * CASSETTE_LATENCY_SCALE)
+                return httpx.Response(entry['status'], headers=entry['headers'],
+                                      stream=_AsyncReplayStream(entry, started))
+            log_miss(request.method, str(request.url))
+            if CASSETTE_ON_MISS != 'live':
+                return httpx.Response(404, headers={'content-type': 'application/json', 'x-cassette': 'miss'},
+                                      content=MISS_BODY)
+            return await self.transport.handle_async_request(request)
+
+        raw = await self.transport.handle_async_request(request)
+        response = httpx.Response(raw.status_code, headers=raw.headers, stream=raw.stream, request=request)
+        save = _Save(key, request, response, started)
+        return httpx.Response(raw.status_code, headers=save.headers, stream=_AsyncRecordingStream(response, save),
+                              extensions=raw.extensions)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+def wrap(transport: httpx.BaseTransport) -> httpx.BaseTransport:
+    """transport wrapped in a CassetteTransport when cassettes are on."""
+    return CassetteTransport(transport) if enabled() else transport
+
+
+def wrap_async(transport: httpx.AsyncBaseTransport) -> httpx.AsyncBaseTransport:
+    return AsyncCassetteTransport(transport) if enabled() else transport
+
+
+# ============================================================================
+# REQUESTS ADAPTER (sync website fetches)
+# ============================================================================
+
+class CassetteAdapter(HTTPAdapter):
+    """requests adapter that records to or replays from the cassette store."""
+
+    def __init__(self, mode: Optional[str] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.mode = mode or CASSETTE_MODE
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if self.mode == 'off':
+            return super().send(request, stream, timeout, verify, cert, proxies)
+
+        started = time.perf_counter()
+        body = request.body.encode('utf-8') if isinstance(request.body, str) else request.body
+        key = request_key(request.method, request.url, body, request.headers)
+
+        if self.mode == 'replay':
+            entry = get_store().lookup(key)
+            if entry is not None:
+                for _chunk, at in replay_delays(entry):
+                    time.sleep(max(0.0, started + at - time.perf_counter()))
+                return self._build_replay(request, entry, started)
+            log_miss(request.method, request.url)
+            if CASSETTE_ON_MISS != 'live':
+                return self._build_replay(request, {'status': 404, 'body': MISS_BODY, 'headers': [
+                    ('content-type', 'application/json'), ('x-cassette', 'miss')]}, started)
+            return super().send(request, stream, timeout, verify, cert, proxies)
+
+        response = super().send(request, stream, timeout, verify, cert, proxies)
+        body = response.content
+        total_ms = (time.perf_counter() - started) * 1000
+        get_store().record(key, request.method, request.url, response.status_code, list(response.headers.items()),
+                           body, response.elapsed.total_seconds() * 1000, [(len(body), total_ms)])
+        return response
+
+    def _build_replay(self, request, entry: Dict[str, Any], started: float) -> requests.Response:
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.reason = http.client.responses.get(entry['status'], '')
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response._content = entry['body']
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.elapsed = timedelta(seconds=time.perf_counter() - started)
+        return response
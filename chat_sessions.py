@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Chat Session Store
+==================
+Server-side conversation transcripts for the chatbot, keyed by session id, so
+the widget sends only its new message instead of replaying (and asking the
+server to trust) the whole conversation every turn.
+
+A session is a JSON dict: 'messages' holds the recent messages exactly as
+they were sent to Claude, plus the reply, so the next turn's prompt starts
+with the same bytes and hits the prompt cache; 'summary' holds the rolling
+summary of older turns folded away by chatbot.compact_conversation();
+'industry_tally' holds the visitor's running industry keyword scores and
+'prompt_industry' the system prompt variant the session is pinned to.
+
+Sessions live in a bounded in-memory LRU (CHAT_SESSION_MEMORY_ENTRIES per
+process). With CHAT_SESSION_DB_PATH set (the default) every save is also
+written to a SQLite table shared by all gunicorn workers and tool
+subprocesses, which keeps sessions across restarts and evictions. Each save
+gets a new version id; a read checks the stored version and only loads the
+transcript when another process changed it, so a worker never serves a stale
+copy. Sessions expire CHAT_SESSION_TTL_HOURS after their last turn, and the
+table keeps at most CHAT_SESSION_MAX_SESSIONS.
+
+Like the result cache, a store that cannot be read or written is logged and
+treated as a miss: the visitor starts a new conversation, the request does
+not fail.
+
+Usage:
+    store = get_store()
+    session = store.get(session_id)         # None if unknown or expired
+    store.save(session_id, {'messages': messages, 'summary': summary})
+"""
+
+import os
+import re
+import json
+import time
+import secrets
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+from sqlite_store import connect, init_db, evict, degrade
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Empty to keep sessions in memory only (single-process, in-process mode)
+CHAT_SESSION_DB_PATH = os.getenv('CHAT_SESSION_DB_PATH', os.path.join(SCRIPT_DIR, 'chat_sessions.db'))
+CHAT_SESSION_TTL_HOURS = float(os.getenv('CHAT_SESSION_TTL_HOURS', '72'))
+CHAT_SESSION_MEMORY_ENTRIES = int(os.getenv('CHAT_SESSION_MEMORY_ENTRIES', '1000'))
+CHAT_SESSION_MAX_SESSIONS = int(os.getenv('CHAT_SESSION_MAX_SESSIONS', '50000'))
+# Backstop for compaction: oldest messages beyond this are dropped from a session
+CHAT_SESSION_MAX_MESSAGES = int(os.getenv('CHAT_SESSION_MAX_MESSAGES', '100'))
+
+SESSION_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{16,64}$')
+
+
+def new_session_id() -> str:
+    return secrets.token_urlsafe(18)
+
+
+def is_valid_session_id(session_id: Any) -> bool:
+    return isinstance(session_id, str) and bool(SESSION_ID_PATTERN.match(session_id))
+
+
+def trimmed(messages: List[Dict[str, Any]], max_messages: int) -> List[Dict[str, Any]]:
+    """The last max_messages messages, starting on a user message as the Messages API expects."""
+    if len(messages) <= max_messages:
+        return messages
+    messages = messages[-max_messages:]
+    while messages and messages[0].get('role') != 'user':
+        messages = messages[1:]
+    return messages
+
+
+# ============================================================================
+# STORE
+# ============================================================================
+
+class ChatSessionStore:
+    """In-memory LRU of chat sessions, optionally persisted to SQLite (see sqlite_store.py)."""
+
+    def __init__(self, path: Optional[str] = CHAT_SESSION_DB_PATH,
+                 ttl_seconds: float = CHAT_SESSION_TTL_HOURS * 3600,
+                 memory_entries: int = CHAT_SESSION_MEMORY_ENTRIES,
+                 max_sessions: int = CHAT_SESSION_MAX_SESSIONS,
+                 max_messages: int = CHAT_SESSION_MAX_MESSAGES):
+        self.path = path or None
+        self.ttl_seconds = ttl_seconds
+        self.memory_entries = memory_entries
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self.hits = 0
+        self.misses = 0
+        # session id -> (version, expires_at, session), most recently used last
+        self._sessions: 'OrderedDict[str, Tuple[str, float, Dict[str, Any]]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+        if self.path:
+            init_db(self.path, """
+                CREATE TABLE IF NOT EXISTS chat_sessions (
+                    session_id TEXT PRIMARY KEY,
+                    version TEXT NOT NULL,
+                    session TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_chat_sessions_last_accessed ON chat_sessions (last_accessed);
+            """)
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """A copy of a session ({'messages': [...], ...}), or None if it is unknown or expired."""
+        now = time.time()
+        with self._lock:
+            cached = self._sessions.get(session_id)
+            if cached is not None:
+                self._sessions.move_to_end(session_id)
+
+        if self.path:
+            cached = self._read_through(session_id, cached, now)
+        elif cached is not None and cached[1] <= now:
+            cached = None
+
+        with self._lock:
+            if cached is None:
+                self._sessions.pop(session_id, None)
+                self.misses += 1
+                return None
+            self._remember(session_id, cached)
+            self.hits += 1
+            return {**cached[2], 'messages': list(cached[2]['messages'])}
+
+    def _read_through(self, session_id: str, cached: Optional[Tuple[str, float, Dict[str, Any]]],
+                      now: float) -> Optional[Tuple[str, float, Dict[str, Any]]]:
+        """The stored session, reusing the in-memory copy when its version is current."""
+        cached_version = cached[0] if cached else ''
+        row = None
+        with degrade('chat_session_error', 'read'):
+            with connect(self.path) as conn:
+                row = conn.execute(
+                    'SELECT version, expires_at, CASE WHEN version = ? THEN NULL ELSE session END AS session '
+                    'FROM chat_sessions WHERE session_id = ? AND expires_at > ?',
+                    (cached_version, session_id, now)
+                ).fetchone()
+                if row is not None:
+                    conn.execute('UPDATE chat_sessions SET last_accessed = ? WHERE session_id = ?', (now, session_id))
+
+        if row is None:
+            return None
+        session = cached[2] if row['session'] is None else json.loads(row['session'])
+        return row['version'], row['expires_at'], session
+
+    def save(self, session_id: str, session: Dict[str, Any]) -> None:
+        """Replace a session (messages trimmed to max_messages) and restart its TTL."""
+        now = time.time()
+        session = {**session, 'messages': trimmed(session['messages'], self.max_messages)}
+        entry = (secrets.token_hex(8), now + self.ttl_seconds, session)
+
+        if self.path:
+            with degrade('chat_session_error', 'write'):
+                with connect(self.path) as conn:
+                    conn.execute(
+                        'INSERT OR REPLACE INTO chat_sessions (session_id, version, session, expires_at, last_accessed) '
+                        'VALUES (?, ?, ?, ?, ?)',
+                        (session_id, entry[0], json.dumps(entry[2], ensure_ascii=False), entry[1], now)
+                    )
+                    evict(conn, 'chat_sessions', 'session_id', self.max_sessions, now)
+
+        with self._lock:
+            self._remember(session_id, entry)
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        if self.path:
+            with degrade('chat_session_error', 'delete'):
+                with connect(self.path) as conn:
+                    conn.execute('DELETE FROM chat_sessions WHERE session_id = ?', (session_id,))
+
+    def _remember(self, session_id: str, entry: Tuple[str, float, Dict[str, Any]]) -> None:
+        """Put an entry in the LRU and evict past memory_entries (caller holds the lock)."""
+        self._sessions[session_id] = entry
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.memory_entries:
+            self._sessions.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Sessions in memory (and in SQLite, None if unreadable) plus this process's hit/miss counters."""
+        with self._lock:
+            stats = {'in_memory': len(self._sessions), 'memory_entries': self.memory_entries,
+                     'hits': self.hits, 'misses': self.misses}
+        if self.path:
+            stats['stored'] = None
+            with degrade('chat_session_error', 'stats'):
+                with connect(self.path) as conn:
+                    stats['stored'] = conn.execute('SELECT COUNT(*) FROM chat_sessions').fetchone()[0]
+        return stats
+
+
+_store: Optional[ChatSessionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> ChatSessionStore:
+    """The process-wide session store (created on first use)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ChatSessionStore()
+        return _store
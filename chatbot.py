@@ -8,6 +8,7 @@ Handles industry detection, page-aware context, and conversation management.
 Expected JSON Input:
 {
     "message": "user's message",
+    "session_id": "from the previous reply; omit to start a conversation",
     "conversation_history": [
         {"role": "user", "content": "previous message"},
         {"role": "assistant", "content": "previous response"}
@@ -23,44 +24,121 @@ Expected JSON Input:
 Output JSON:
 {
     "response": "chatbot response text",
+    "session_id": "send with the next message",
     "detected_industry": "propane|concrete|field-services|agency|b2b|general",
     "should_offer_booking": true/false,
     "booking_url": "https://meetings.hubspot.com/...",
-    "timestamp": "ISO timestamp"
+    "timestamp": "ISO timestamp",
+    "usage": {"input_tokens": 0, "output_tokens": 0,
+              "cache_read_input_tokens": 0, "cache_creation_input_tokens": 0}
 }
+
+Conversation state lives on the server (chat_sessions.py): each reply carries
+a session_id, and a request with a known session_id is answered from the
+stored transcript. conversation_history is only read when a conversation
+starts without one (older clients, Make.com). A session_id the store no
+longer knows (expired, evicted, or lost with the disk on redeploy) gets an
+error with "session_expired": true unless conversation_history came with it;
+the client resends the message once with its history. Once a conversation passes its
+page type's token budget, older turns are folded into a rolling summary
+(compact_conversation).
+
+Industry detection: keywords and weights come from industry_keywords.json
+(INDUSTRY_KEYWORDS_PATH) and are compiled into one pattern at first use.
+Each turn scores only the new message; the session keeps a running tally of
+the visitor's earlier messages, so history is never rescanned.
+
+System prompt slicing (CHAT_PROMPT_SLICING): once detect_industry() has
+placed the visitor, the system prompt carries only that industry's context,
+proof points, pricing and competitors (SYSTEM_PROMPT_VARIANTS, built at
+import). Visitors detected as 'general' get the full SYSTEM_PROMPT. The
+session pins its variant (prompt_industry) and only switches on a clear lead
+in its tally, since every switch costs the cached prefix.
+
+Prompt caching (CHAT_PROMPT_CACHE): the system prompt is sent as a cacheable
+block, so visitors given the same variant share one entry in Anthropic's
+prompt cache instead of paying for it as fresh input. With 'conversation' (the default)
+the last message also gets a cache breakpoint: each turn replays the whole
+conversation, so the next turn reads everything up to this one from the
+cache and only the new exchange is fresh input. usage shows the split for
+each request.
 """
 
 import os
+import re
 import sys
 import json
+import time
+import asyncio
+import logging
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Iterator, AsyncIterator, Tuple, Union
 import anthropic
 
+from admission import parse_limits
+from shared_clients import get_anthropic_client, get_async_anthropic_client
+import chat_sessions
+import deadline
+import fast_json
+import llm_calls
+import metrics
+import rate_governor
+import request_log
+
 # ============================================================================
 # CONFIGURATION
 # ============================================================================
 
 # Get API key from environment
 ANTHROPIC_API_KEY = os.getenv('ANTHROPIC_API_KEY')
-if not ANTHROPIC_API_KEY:
-    print(json.dumps({
-        'error': 'ANTHROPIC_API_KEY not found in environment',
-        'timestamp': datetime.utcnow().isoformat() + 'Z'
-    }))
-    sys.exit(1)
 
 MODEL_NAME = os.getenv('MODEL_NAME', 'claude-sonnet-4-5-20250929')
 MAX_TOKENS = int(os.getenv('MAX_TOKENS', '2048'))
 
-# Initialize Anthropic client
-client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
+BOOKING_URL = "https://meetings.hubspot.com/resultantai/paper-to-digital"
+
+# Prompt caching: 'conversation' caches the system prompt and each
+# conversation's prefix, 'system' only the system prompt, 'off' neither
+CHAT_PROMPT_CACHE = os.getenv('CHAT_PROMPT_CACHE', 'conversation').lower()
+
+# Send only the detected industry's part of the system prompt (see build_system_prompt)
+CHAT_PROMPT_SLICING = os.getenv('CHAT_PROMPT_SLICING', 'true').lower() == 'true'
+
+# A session keeps its prompt variant until another industry leads its tally
+# with at least this score and this many times the current one's (see
+# prompt_industry); every switch misses the cached prompt prefix
+CHAT_PROMPT_SWITCH_SCORE = float(os.getenv('CHAT_PROMPT_SWITCH_SCORE', '3'))
+CHAT_PROMPT_SWITCH_RATIO = float(os.getenv('CHAT_PROMPT_SWITCH_RATIO', '2'))
+
+# Conversation compaction: once a conversation's messages are estimated past
+# the page type's token budget, all but the last CHAT_KEEP_TURNS turns are
+# folded into a rolling summary (see compact_conversation)
+CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv('CHAT_HISTORY_TOKEN_BUDGET', '4000'))
+CHAT_HISTORY_TOKEN_BUDGETS = parse_limits(os.getenv('CHAT_HISTORY_TOKEN_BUDGETS', ''), {})
+CHAT_KEEP_TURNS = int(os.getenv('CHAT_KEEP_TURNS', '3'))
+CHAT_SUMMARY_MODEL = os.getenv('CHAT_SUMMARY_MODEL', 'claude-haiku-4-5-20251001')
+CHAT_SUMMARY_MAX_TOKENS = int(os.getenv('CHAT_SUMMARY_MAX_TOKENS', '400'))
+CACHE_CONTROL = {'type': 'ephemeral'}
+
+# Keywords and weights detect_industry() scores visitor messages with
+INDUSTRY_KEYWORDS_PATH = os.getenv('INDUSTRY_KEYWORDS_PATH',
+                                   os.path.join(os.path.dirname(os.path.abspath(__file__)), 'industry_keywords.json'))
+
+# Sent when Claude can't start a reply before the request deadline
+DEADLINE_RESPONSE = ("Sorry, I'm taking longer than usual to answer. Please try again in a moment, "
+                     "or book a quick call and we'll walk you through it.")
+
 
 # ============================================================================
 # SYSTEM PROMPT
 # ============================================================================
 
-SYSTEM_PROMPT = """You are the AI assistant for ResultantAI.com, a company that builds revenue systems for service businesses. You help visitors understand how ResultantAI can solve their operational problems and recover revenue they are losing to manual processes.
+# The prompt is assembled from a shared core plus per-industry modules, so a
+# visitor detect_industry() has placed only pays for their industry's context,
+# proof points, pricing and competitors. 'general' gets every module, which is
+# exactly the full SYSTEM_PROMPT.
+
+PROMPT_INTRO = """You are the AI assistant for ResultantAI.com, a company that builds revenue systems for service businesses. You help visitors understand how ResultantAI can solve their operational problems and recover revenue they are losing to manual processes.
 
 === COMPANY IDENTITY ===
 
@@ -88,11 +166,10 @@ DO NOT:
 - Use jargon, buzzwords, or "synergy"
 - Use em dashes. Use commas or periods instead.
 - Over-promise or guarantee specific results without context
-- Be pushy. Answer questions directly and let the value speak for itself.
-
-=== INDUSTRY-SPECIFIC CONTEXT ===
+- Be pushy. Answer questions directly and let the value speak for itself."""
 
-PROPANE / HEATING OIL DELIVERY:
+INDUSTRY_CONTEXT = {
+    'propane': """PROPANE / HEATING OIL DELIVERY:
 - Target: 3-10 truck operators, $5M-$15M revenue, family-owned (often 2nd/3rd generation)
 - Geography: Cold weather states (PA, OH, NY, MA, MI, WI, MN)
 - Current tools: ADD Systems, Suburban Software, or spreadsheets
@@ -103,9 +180,9 @@ PROPANE / HEATING OIL DELIVERY:
   * 4+ day wait for payment after delivery
   * Legacy software costs $50K+ and syncs once daily
   * 40% of failed deliveries come from address issues
-  * 7% fewer gallons delivered per hour with poor routing
+  * 7% fewer gallons delivered per hour with poor routing""",
 
-READY-MIX CONCRETE:
+    'concrete': """READY-MIX CONCRETE:
 - Target: 5-20 truck producers, $2M-$20M revenue
 - Geography: Active construction markets (PNW, TX, Southeast)
 - Current tools: Paper tickets, manual dispatch, whiteboards
@@ -115,103 +192,105 @@ READY-MIX CONCRETE:
   * $64K/year lost on missed surcharges (10-truck operation)
   * Manual tickets lead to wrong mix designs or wrong customers
   * Dispatch and batching systems that do not communicate
-  * $25/yd profit spread between top and bottom performers
+  * $25/yd profit spread between top and bottom performers""",
 
-FIELD SERVICES (Plumbing, HVAC, Electrical):
+    'field-services': """FIELD SERVICES (Plumbing, HVAC, Electrical):
 - Target: Service businesses with 5-50 technicians
 - Pain points to address:
   * Missing 40%+ of after-hours calls
   * Dispatch changes requiring endless phone tag
   * Customer data scattered across spreadsheets
   * Manual invoicing and data entry
-  * No real-time visibility into field operations
+  * No real-time visibility into field operations""",
 
-MARKETING AGENCIES:
+    'agency': """MARKETING AGENCIES:
 - Target: Agencies with 5-50 employees doing repetitive client work
 - Pain points to address:
   * Reporting requiring copy-paste spreadsheet work
   * Manual lead qualification
   * Client onboarding taking 47+ steps
   * Reinventing proposals from scratch each time
-  * Unpredictable AI costs from API usage
+  * Unpredictable AI costs from API usage""",
 
-B2B SERVICES:
+    'b2b': """B2B SERVICES:
 - Target: Founder-led service businesses ready to scale
 - Pain points to address:
   * Founder is the only closer
   * Onboarding is different every time
   * Follow-up falling through cracks
-  * Scaling means expensive hiring
+  * Scaling means expensive hiring""",
 
-TRUCKING / LOGISTICS:
+    'trucking': """TRUCKING / LOGISTICS:
 - Target: 5-30 truck fleets
 - Pain points to address:
   * Paper delivery tickets and weight slips
   * Manual dispatch logs and BOLs
   * Lost or illegible paperwork
-  * Delayed billing from paperwork processing
-
-=== PROOF POINTS ===
+  * Delayed billing from paperwork processing"""
+}
 
-Wayne Conn Plumbing:
+# (industries the case study is relevant to, text), in prompt order
+PROOF_POINTS = [
+    (('field-services',), """Wayne Conn Plumbing:
 - Problem: Missing 40% of after-hours calls
 - Solution: AI voice agent for 24/7 call handling
-- Result: +$5K/month in captured revenue, 18-day payback
+- Result: +$5K/month in captured revenue, 18-day payback"""),
 
-Adleg Marketing Agency:
+    (('agency',), """Adleg Marketing Agency:
 - Problem: Marketing audits took 90 minutes each
 - Solution: Multi-LLM automation system
-- Result: 97% time savings (90 min to 2 min), helped close 4 new clients in 30 days, $1.50 cost per audit
+- Result: 97% time savings (90 min to 2 min), helped close 4 new clients in 30 days, $1.50 cost per audit"""),
 
-Beaver Pumice (Quarry Operation):
+    (('propane', 'concrete', 'trucking'), """Beaver Pumice (Quarry Operation):
 - Problem: Paper loading tickets getting lost, creating billing disputes
 - Solution: Digital ticketing system with tablet-friendly forms
-- Result: $500/week in recovered tickets, 2+ hours daily time saved, 1 week to deploy
-
-AI Gateway Users:
-- Result: 60-80% savings on AI costs through smart routing
+- Result: $500/week in recovered tickets, 2+ hours daily time saved, 1 week to deploy"""),
 
-=== PRICING (Share when asked, but focus on outcomes first) ===
+    (('agency', 'b2b'), """AI Gateway Users:
+- Result: 60-80% savings on AI costs through smart routing""")
+]
 
-PROPANE SYSTEMS:
+INDUSTRY_PRICING = {
+    'propane': """PROPANE SYSTEMS:
 - Core ($20K): Customer database + delivery tickets + QuickBooks integration
 - Routing Add-on ($10K): Route optimization + driver app
 - IoT Add-on ($8K): Tank monitor integration
-- Support ($600/month): Includes AI auto-fix
+- Support ($600/month): Includes AI auto-fix""",
 
-CONCRETE SYSTEMS:
+    'concrete': """CONCRETE SYSTEMS:
 - Phase 1 ($15K): Ticketing + QuickBooks export
 - Phase 2 ($12K): Dispatch board + driver app
 - Phase 3 ($8K): Customer portal + GPS
-- Support ($750/month): Includes AI auto-fix
+- Support ($750/month): Includes AI auto-fix"""
+}
 
-GENERAL:
+GENERAL_PRICING = """GENERAL:
 - Custom builds range from $15K-$40K depending on complexity
 - Typical timeline: 1-4 weeks from kickoff to deployment
-- You own everything. Full documentation included.
-
-=== COMPETITOR POSITIONING ===
+- You own everything. Full documentation included."""
 
-PROPANE COMPETITORS:
+INDUSTRY_COMPETITORS = {
+    'propane': """PROPANE COMPETITORS:
 - ADD Systems (E3 + Raven): Expensive, batch sync (not real-time), VPN required
 - Suburban Software: Propane-specific but weak mobile experience
 - Droplet Fuel: Good dispatch, weak accounting integration
-- Cargas Energy: Modern interface but custom pricing (hard to budget)
+- Cargas Energy: Modern interface but custom pricing (hard to budget)""",
 
-CONCRETE COMPETITORS:
+    'concrete': """CONCRETE COMPETITORS:
 - Command Alkon: Enterprise-grade but too expensive for small producers
 - Jonel: Better fit for mid-size but still complex
 - Marcotte: Focused on batching, weak dispatch integration
-- ConcreteGo/Dispatch360: Limited accounting integration
+- ConcreteGo/Dispatch360: Limited accounting integration"""
+}
 
-ResultantAI advantages to emphasize:
+RESULTANT_ADVANTAGES = """ResultantAI advantages to emphasize:
 - Fixed pricing (no surprises)
 - Real-time sync vs. daily batch updates
 - QuickBooks native integration
 - Deploys in weeks, not months
-- You own everything, including documentation
+- You own everything, including documentation"""
 
-=== CONVERSATION FLOW ===
+PROMPT_GUIDANCE = """=== CONVERSATION FLOW ===
 
 Follow the Hook → Story → Proof → CTA structure:
 
@@ -268,6 +347,64 @@ If a visitor asks something you cannot answer:
 
 Keep responses concise (2-4 short paragraphs). Be conversational but professional. Ask clarifying questions when needed to better understand their situation."""
 
+# Added to a sliced prompt so Claude doesn't improvise details it was not given
+SLICED_PROMPT_NOTE = ("Only the {industry} details are included above because this visitor appears to be in that "
+                      "industry. ResultantAI also serves {others}. If the visitor asks about another industry, answer "
+                      "from the company information here and offer a discovery call for specifics.")
+
+INDUSTRY_LABELS = {
+    'propane': 'propane / heating oil delivery',
+    'concrete': 'ready-mix concrete',
+    'field-services': 'field services',
+    'agency': 'marketing agency',
+    'b2b': 'B2B services',
+    'trucking': 'trucking / logistics'
+}
+
+# Page type names for industries, as older detect_industry() results used
+INDUSTRY_ALIASES = {'agencies': 'agency', 'logistics': 'trucking'}
+
+
+def build_system_prompt(industry: Optional[str] = None) -> str:
+    """
+    Assemble the system prompt for one industry, or the full prompt (every
+    module) when industry is None.
+    """
+    industries = list(INDUSTRY_CONTEXT) if industry is None else [industry]
+
+    def section(title: str, parts: List[str]) -> str:
+        return f"=== {title} ===\n\n" + "\n\n".join(parts)
+
+    competitors = [INDUSTRY_COMPETITORS[name] for name in industries if name in INDUSTRY_COMPETITORS]
+    context = [INDUSTRY_CONTEXT[name] for name in industries]
+    if industry is not None:
+        others = [label for name, label in INDUSTRY_LABELS.items() if name != industry]
+        context.append(SLICED_PROMPT_NOTE.format(industry=INDUSTRY_LABELS[industry], others=', '.join(others)))
+
+    return "\n\n".join([
+        PROMPT_INTRO,
+        section('INDUSTRY-SPECIFIC CONTEXT', context),
+        section('PROOF POINTS', [text for relevant, text in PROOF_POINTS
+                                 if industry is None or industry in relevant]),
+        section('PRICING (Share when asked, but focus on outcomes first)',
+                [INDUSTRY_PRICING[name] for name in industries if name in INDUSTRY_PRICING] + [GENERAL_PRICING]),
+        section('COMPETITOR POSITIONING', competitors + [RESULTANT_ADVANTAGES]),
+        PROMPT_GUIDANCE
+    ])
+
+
+SYSTEM_PROMPT = build_system_prompt()
+
+# Every variant built once at import, so a request only does a dict lookup
+SYSTEM_PROMPT_VARIANTS = {industry: build_system_prompt(industry) for industry in INDUSTRY_CONTEXT}
+
+
+def system_prompt_for(industry: str) -> str:
+    """The prompt sliced to a detect_industry() result; the full prompt for 'general' or when slicing is off."""
+    if not CHAT_PROMPT_SLICING:
+        return SYSTEM_PROMPT
+    return SYSTEM_PROMPT_VARIANTS.get(INDUSTRY_ALIASES.get(industry, industry), SYSTEM_PROMPT)
+
 # ============================================================================
 # PAGE-AWARE WELCOME MESSAGES
 # ============================================================================
@@ -285,55 +422,167 @@ WELCOME_MESSAGES = {
 }
 
 # ============================================================================
-# HELPER FUNCTIONS
+# INDUSTRY DETECTION
 # ============================================================================
 
-def detect_industry(message: str, conversation_history: List[Dict[str, str]], page_type: str) -> str:
+def load_industry_keywords(path: str = INDUSTRY_KEYWORDS_PATH) -> Dict[str, Any]:
+    """Load industry keywords and page type mapping from JSON, falling back to the built-in defaults."""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        print(f"Warning: Industry keywords file not found at {path}, using defaults", file=sys.stderr)
+    except json.JSONDecodeError as e:
+        print(f"Warning: Invalid JSON in industry keywords: {e}, using defaults", file=sys.stderr)
+    return get_default_industry_keywords()
+
+
+def get_default_industry_keywords() -> Dict[str, Any]:
+    """Return default industry keywords if the keywords file is not found."""
+    return {
+        'industries': {
+            'propane': {'propane': 3, 'heating oil': 3, 'degree day*': 3, 'tank monitor*': 3, 'fuel*': 2},
+            'concrete': {'concrete': 3, 'ready-mix': 3, 'ready mix': 3, 'batching': 2, 'yard*': 1, 'pour*': 1},
+            'field-services': {'plumb*': 3, 'hvac': 3, 'electric*': 2, 'technician*': 2, 'service call*': 2,
+                               'dispatch*': 1},
+            'agency': {'agency': 3, 'agencies': 3, 'marketing': 2, 'client work': 2, 'lead qual*': 2, 'reporting': 1},
+            'trucking': {'trucking': 3, 'logistics': 3, 'freight': 3, 'bill of lading': 3, 'bills of lading': 3,
+                         'hauling': 2, 'bol': 2, 'bols': 2},
+            'b2b': {'b2b': 3, 'professional services': 3, 'consulting': 2, 'founder*': 1, 'scale': 1, 'scaling': 1}
+        },
+        'page_types': {'propane': 'propane', 'field-services': 'field-services', 'agencies': 'agency',
+                       'b2b': 'b2b', 'logistics': 'trucking'}
+    }
+
+
+class IndustryClassifier:
+    """
+    Weighted industry scores from one precompiled pattern. The keywords are
+    merged into a trie, so each position in a message is checked against
+    their shared prefixes once instead of against every keyword in turn.
     """
-    Detect visitor's industry from their message, conversation history, and page context.
 
-    Returns: propane|concrete|field-services|agency|b2b|trucking|general
+    def __init__(self, config: Dict[str, Any]):
+        self.industries = list(config['industries'])
+        self.page_types = config.get('page_types', {})
+        # normalized keyword -> [(industry, weight)]
+        self.weights: Dict[str, List[Tuple[str, float]]] = {}
+        trie: Dict[str, Any] = {}
+        for industry, keywords in config['industries'].items():
+            for keyword, weight in keywords.items():
+                normalized = ' '.join(keyword.rstrip('*').lower().split())
+                self.weights.setdefault(normalized, []).append((industry, float(weight)))
+                node = trie
+                for char in normalized:
+                    node = node.setdefault(char, {})
+                # A keyword ending in * matches as a prefix, the rest as whole words
+                node[''] = '' if keyword.endswith('*') or node.get('') == '' else r'\b'
+        self.pattern = re.compile(r'\b' + self._trie_pattern(trie))
+
+    @classmethod
+    def _trie_pattern(cls, node: Dict[str, Any]) -> str:
+        """Regex for a trie node: longer keywords first, then the one ending here."""
+        branches = [(r'\s+' if char == ' ' else re.escape(char)) + cls._trie_pattern(child)
+                    for char, child in sorted(node.items()) if char]
+        if '' in node:
+            branches.append(node[''])
+        return branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """{industry: summed keyword weights} for every keyword occurrence in text."""
+        scores: Dict[str, float] = {}
+        for match in self.pattern.finditer((text or '').lower()):
+            for industry, weight in self.weights[' '.join(match.group(0).lower().split())]:
+                scores[industry] = scores.get(industry, 0.0) + weight
+        return scores
+
+    def best(self, scores: Dict[str, float]) -> Optional[str]:
+        """Highest-scoring industry (ties go to the one listed first), or None if nothing matched."""
+        if not scores:
+            return None
+        ranked = [industry for industry in self.industries if scores.get(industry, 0) > 0]
+        return max(ranked, key=lambda industry: scores[industry]) if ranked else None
+
+
+_industry_classifier: Optional[IndustryClassifier] = None
+
+
+def get_industry_classifier() -> IndustryClassifier:
+    """Shared classifier built from INDUSTRY_KEYWORDS_PATH (compiled on first use)."""
+    global _industry_classifier
+    if _industry_classifier is None:
+        _industry_classifier = IndustryClassifier(load_industry_keywords())
+    return _industry_classifier
+
+
+def add_scores(tally: Dict[str, float], scores: Dict[str, float]) -> Dict[str, float]:
+    if not scores:
+        return tally
+    return {industry: tally.get(industry, 0.0) + scores.get(industry, 0.0) for industry in {**tally, **scores}}
+
+
+def history_tally(conversation_history: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Industry tally of the visitor's messages, for a conversation that has none stored yet."""
+    classifier = get_industry_classifier()
+    tally: Dict[str, float] = {}
+    for msg in conversation_history:
+        if msg.get('role') == 'user' and isinstance(msg.get('content'), str):
+            tally = add_scores(tally, classifier.scores(msg['content']))
+    return tally
+
+
+@metrics.timed('chatbot', 'industry_detection')
+def classify_turn(message: str, page_type: str, tally: Dict[str, float]) -> Tuple[str, Dict[str, float]]:
     """
-    message_lower = message.lower()
+    Detect the visitor's industry for this turn.
 
-    # Check for explicit industry mentions in the current message
-    if any(word in message_lower for word in ['propane', 'fuel', 'heating oil', 'degree day', 'tank monitor']):
-        return 'propane'
+    The current message's keywords decide first, then the page being viewed,
+    then the session's running tally of earlier messages. Only the new
+    message is scanned; the tally carries the rest of the conversation.
 
-    if any(word in message_lower for word in ['concrete', 'ready-mix', 'ready mix', 'batching', 'yard', 'pour']):
-        return 'concrete'
+    Returns:
+        (propane|concrete|field-services|agency|b2b|trucking|general, tally including this message)
+    """
+    classifier = get_industry_classifier()
+    scores = classifier.scores(message)
+    industry = classifier.best(scores) or classifier.page_types.get(page_type) or classifier.best(tally) or 'general'
+    return industry, add_scores(tally, scores)
 
-    if any(word in message_lower for word in ['plumb', 'hvac', 'electric', 'technician', 'service call', 'dispatch']):
-        return 'field-services'
 
-    if any(word in message_lower for word in ['agency', 'marketing', 'client work', 'reporting', 'lead qual']):
-        return 'agency'
+def prompt_industry(pinned: Optional[str], detected: str, tally: Dict[str, float]) -> str:
+    """
+    Industry whose prompt variant a session uses this turn.
 
-    if any(word in message_lower for word in ['trucking', 'logistics', 'hauling', 'freight', 'bol', 'bill of lading']):
-        return 'trucking'
+    The first turn takes classify_turn()'s answer. After that the variant only
+    changes when the tally (this message included) is led by another industry
+    with at least CHAT_PROMPT_SWITCH_SCORE and CHAT_PROMPT_SWITCH_RATIO times
+    the pinned one's score. A leader short of the ratio means the visitor
+    spans industries, so they get the full prompt ('general').
+    """
+    if pinned is None:
+        return detected
+    leader = get_industry_classifier().best(tally)
+    if leader is None or leader == pinned or tally[leader] < CHAT_PROMPT_SWITCH_SCORE:
+        return pinned
+    if pinned == 'general':
+        rival = max([score for industry, score in tally.items() if industry != leader], default=0.0)
+    else:
+        rival = tally.get(pinned, 0.0)
+    return leader if tally[leader] >= CHAT_PROMPT_SWITCH_RATIO * rival else 'general'
 
-    if any(word in message_lower for word in ['b2b', 'consulting', 'professional services', 'founder', 'scale']):
-        return 'b2b'
 
-    # Check page context
-    if page_type in ['propane', 'field-services', 'agencies', 'b2b', 'logistics']:
-        return page_type
+def detect_industry(message: str, conversation_history: List[Dict[str, str]], page_type: str) -> str:
+    """
+    Detect visitor's industry from their message, conversation history, and page context.
 
-    # Check conversation history for industry clues
-    full_conversation = ' '.join([msg.get('content', '') for msg in conversation_history]).lower()
+    Returns: propane|concrete|field-services|agency|b2b|trucking|general
+    """
+    return classify_turn(message, page_type, history_tally(conversation_history))[0]
 
-    if 'propane' in full_conversation or 'fuel delivery' in full_conversation:
-        return 'propane'
-    if 'concrete' in full_conversation:
-        return 'concrete'
-    if 'plumb' in full_conversation or 'hvac' in full_conversation:
-        return 'field-services'
-    if 'agency' in full_conversation or 'marketing' in full_conversation:
-        return 'agency'
-    if 'trucking' in full_conversation or 'logistics' in full_conversation:
-        return 'trucking'
 
-    return 'general'
+# ============================================================================
+# HELPER FUNCTIONS
+# ============================================================================
 
 
 def should_offer_booking(message: str, assistant_response: str) -> bool:
@@ -371,6 +620,7 @@ def get_welcome_message(page_type: str) -> str:
     return WELCOME_MESSAGES.get(page_type, WELCOME_MESSAGES['default'])
 
 
+@metrics.timed('chatbot', 'message_formatting')
 def format_conversation_for_claude(conversation_history: List[Dict[str, str]], current_message: str, page_context: Dict[str, Any]) -> List[Dict[str, str]]:
     """
     Format conversation history for Claude API.
@@ -415,69 +665,387 @@ def format_conversation_for_claude(conversation_history: List[Dict[str, str]], c
     return messages
 
 
+def cached_system(prompt: str) -> Union[str, List[Dict[str, Any]]]:
+    """System prompt as a text block with a cache breakpoint, unless CHAT_PROMPT_CACHE is off."""
+    if CHAT_PROMPT_CACHE == 'off':
+        return prompt
+    return [{'type': 'text', 'text': prompt, 'cache_control': CACHE_CONTROL}]
+
+
+def mark_conversation_prefix(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Put a cache breakpoint on the last message. The next turn resends these
+    messages unchanged, so its request reads them from the cache.
+    """
+    if CHAT_PROMPT_CACHE != 'conversation' or not messages:
+        return messages
+    last = messages[-1]
+    content = last['content']
+    blocks = list(content) if isinstance(content, list) else [{'type': 'text', 'text': content}]
+    blocks[-1] = {**blocks[-1], 'cache_control': CACHE_CONTROL}
+    return messages[:-1] + [{**last, 'content': blocks}]
+
+
 # ============================================================================
-# MAIN CHAT FUNCTION
+# CONVERSATION COMPACTION
 # ============================================================================
 
-def chat(input_data: Dict[str, Any]) -> Dict[str, Any]:
+SUMMARY_SYSTEM_PROMPT = """You keep a running summary of a website chat between a visitor and ResultantAI's assistant. The assistant will see your summary instead of the messages it replaces.
+
+Update the summary with the new messages. Keep: the visitor's business, industry, size and location; the problems they described; what they asked and what was already answered (pricing quoted, case studies shared, competitors compared); and any next step agreed, such as a booked call. Drop greetings and filler.
+
+Reply with the updated summary only, in plain sentences, under 150 words."""
+
+
+def history_budget(page_type: str) -> int:
+    """Token budget for a conversation's messages on this page type."""
+    return CHAT_HISTORY_TOKEN_BUDGETS.get(page_type, CHAT_HISTORY_TOKEN_BUDGET)
+
+
+def with_summary(summary: Optional[str], messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Messages to send: the rolling summary goes in front of the first (user) message."""
+    if not summary:
+        return messages
+    note = {'type': 'text', 'text': f"[Summary of the conversation so far: {summary}]"}
+    if not messages or messages[0]['role'] != 'user':
+        return [{'role': 'user', 'content': [note]}] + messages
+    first = messages[0]
+    content = first['content']
+    blocks = list(content) if isinstance(content, list) else [{'type': 'text', 'text': content}]
+    return [{**first, 'content': [note] + blocks}] + messages[1:]
+
+
+def recent_turns_start(messages: List[Dict[str, Any]], keep_turns: int) -> int:
+    """Index of the user message that starts the last keep_turns turns before the current message."""
+    user_messages = [index for index, message in enumerate(messages) if message['role'] == 'user']
+    if len(user_messages) <= keep_turns + 1:
+        return 0
+    return user_messages[-(keep_turns + 1)]
+
+
+def summarize_turns(summary: Optional[str], messages: List[Dict[str, Any]]) -> str:
+    """Fold messages into the rolling summary with one small Claude call."""
+    transcript = '\n'.join(
+        f"{'Visitor' if message['role'] == 'user' else 'Assistant'}: {message['content']}"
+        for message in messages
+    )
+    response = llm_calls.create_message('chatbot_summary', get_anthropic_client(ANTHROPIC_API_KEY),
+        model=CHAT_SUMMARY_MODEL,
+        max_tokens=CHAT_SUMMARY_MAX_TOKENS,
+        system=SUMMARY_SYSTEM_PROMPT,
+        messages=[{
+            'role': 'user',
+            'content': f"Current summary:\n{summary or '(none yet)'}\n\nNew messages:\n{transcript}"
+        }]
+    )
+    metrics.record_tokens('chatbot_summary', response.usage)
+    return response.content[0].text.strip()
+
+
+@metrics.timed('chatbot', 'compaction')
+def compact_conversation(summary: Optional[str], messages: List[Dict[str, Any]],
+                         page_type: str) -> Tuple[Optional[str], List[Dict[str, Any]]]:
     """
-    Main chatbot function. Processes user message and returns assistant response.
+    Keep a conversation within its page type's token budget.
+
+    Under budget, nothing changes. Over it, everything before the last
+    CHAT_KEEP_TURNS turns is folded into the summary, so the next compaction
+    only summarizes the turns added since. Between compactions the messages
+    sent to Claude only grow at the end, which keeps the prompt cache
+    hitting. If the summary call fails, this turn goes out uncompacted.
+
+    Returns:
+        (summary, messages) to send and store
     """
+    if rate_governor.estimate_input_tokens({'messages': with_summary(summary, messages)}) <= history_budget(page_type):
+        return summary, messages
+
+    start = recent_turns_start(messages, CHAT_KEEP_TURNS)
+    if start == 0:
+        return summary, messages
+
     try:
-        # Extract input data
-        user_message = input_data.get('message', '').strip()
-        conversation_history = input_data.get('conversation_history', [])
-        page_context = input_data.get('page_context', {})
+        summary = summarize_turns(summary, messages[:start])
+    except Exception as e:
+        request_log.log_event('chat_compaction_failed', logging.WARNING, error_type=type(e).__name__, error=str(e))
+        return summary, messages
+    return summary, messages[start:]
+
+
+# ============================================================================
+# MAIN CHAT FUNCTION
+# ============================================================================
+
+def prepare_chat(input_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validate input and build everything the Claude call needs.
+
+    Returns an error dict (with 'error') or a dict with 'user_message',
+    'detected_industry', 'session_id', 'summary', 'industry_tally',
+    'prompt_industry' and 'transcript' (what to store with the reply), 'system' and 'messages' (summary added, cache
+    breakpoints set). Shared by every chat variant.
+    """
+    # Extract input data
+    user_message = input_data.get('message', '').strip()
+    page_context = input_data.get('page_context', {})
+
+    if not user_message:
+        return {
+            'error': 'Message is required',
+            'timestamp': datetime.utcnow().isoformat() + 'Z'
+        }
+
+    if not ANTHROPIC_API_KEY:
+        return {
+            'error': 'ANTHROPIC_API_KEY not found in environment',
+            'timestamp': datetime.utcnow().isoformat() + 'Z'
+        }
 
-        if not user_message:
+    # A known session's stored transcript replaces any history the client sent
+    session_id = input_data.get('session_id')
+    session = None
+    if chat_sessions.is_valid_session_id(session_id):
+        session = chat_sessions.get_store().get(session_id)
+        if session is None and 'conversation_history' not in input_data:
+            # Expired, evicted or lost with the disk: answering without the
+            # conversation would ignore everything the visitor still sees
             return {
-                'error': 'Message is required',
+                'error': 'Chat session expired',
+                'error_type': 'session_expired',
+                'session_expired': True,
                 'timestamp': datetime.utcnow().isoformat() + 'Z'
             }
+    if session is None:
+        session_id = chat_sessions.new_session_id()
+        session = {'messages': input_data.get('conversation_history', []), 'summary': None}
+    conversation_history = session['messages']
+    summary = session.get('summary')
+
+    # Detect industry, scanning only the new message: the session's tally
+    # carries every earlier one (a session without one is tallied once)
+    page_type = page_context.get('page_type', 'homepage')
+    industry_tally = session.get('industry_tally')
+    if industry_tally is None:
+        clues = [{'role': 'user', 'content': summary}] if summary else []
+        industry_tally = history_tally(clues + conversation_history)
+    detected_industry, industry_tally = classify_turn(user_message, page_type, industry_tally)
+    # The prompt variant stays put on a passing keyword, keeping the cached prefix
+    pinned_industry = prompt_industry(session.get('prompt_industry'), detected_industry, industry_tally)
+
+    # Format messages for Claude, folding old turns away once over the token budget
+    messages = format_conversation_for_claude(conversation_history, user_message, page_context)
+    summary, messages = compact_conversation(summary, messages, page_type)
+
+    return {
+        'user_message': user_message,
+        'detected_industry': detected_industry,
+        'session_id': session_id,
+        'summary': summary,
+        'industry_tally': industry_tally,
+        'prompt_industry': pinned_industry,
+        'transcript': messages,
+        'system': cached_system(system_prompt_for(pinned_industry)),
+        'messages': mark_conversation_prefix(with_summary(summary, messages))
+    }
 
-        # Detect industry
-        page_type = page_context.get('page_type', 'homepage')
-        detected_industry = detect_industry(user_message, conversation_history, page_type)
 
-        # Format messages for Claude
-        messages = format_conversation_for_claude(conversation_history, user_message, page_context)
+def save_turn(prepared: Dict[str, Any], assistant_message: str) -> None:
+    """Store the conversation so far, with Claude's reply, under the session id."""
+    chat_sessions.get_store().save(prepared['session_id'], {
+        'messages': prepared['transcript'] + [{'role': 'assistant', 'content': assistant_message}],
+        'summary': prepared['summary'],
+        'industry_tally': prepared['industry_tally'],
+        'prompt_industry': prepared['prompt_industry']
+    })
+
 
-        # Call Claude API
-        response = client.messages.create(
-            model=MODEL_NAME,
-            max_tokens=MAX_TOKENS,
-            system=SYSTEM_PROMPT,
-            messages=messages
-        )
+def build_chat_result(prepared: Dict[str, Any], assistant_message: str) -> Dict[str, Any]:
+    """Final chat fields: session id, industry plus whether to offer a booking link."""
+    # Determine if we should offer booking
+    offer_booking = should_offer_booking(prepared['user_message'], assistant_message)
 
-        # Extract assistant response
-        assistant_message = response.content[0].text
+    return {
+        'session_id': prepared['session_id'],
+        'detected_industry': prepared['detected_industry'],
+        'should_offer_booking': offer_booking,
+        'booking_url': BOOKING_URL if offer_booking else None,
+        'timestamp': datetime.utcnow().isoformat() + 'Z'
+    }
 
-        # Determine if we should offer booking
-        offer_booking = should_offer_booking(user_message, assistant_message)
-        booking_url = "https://meetings.hubspot.com/resultantai/paper-to-digital" if offer_booking else None
 
-        return {
-            'response': assistant_message,
-            'detected_industry': detected_industry,
-            'should_offer_booking': offer_booking,
-            'booking_url': booking_url,
-            'timestamp': datetime.utcnow().isoformat() + 'Z'
-        }
+def partial_chat_result(prepared: Dict[str, Any], error: deadline.DeadlineExceeded) -> Dict[str, Any]:
+    """Reply cut short by the request deadline: Claude's text so far, or DEADLINE_RESPONSE with the booking link."""
+    assistant_message = (error.partial_text or '').strip()
+    if not assistant_message:
+        result = {'response': DEADLINE_RESPONSE, **build_chat_result(prepared, DEADLINE_RESPONSE),
+                  'should_offer_booking': True, 'booking_url': BOOKING_URL}
+    else:
+        result = {'response': assistant_message, **build_chat_result(prepared, assistant_message)}
+    return deadline.partial_result('chatbot', result, error)
+
 
-    except anthropic.APIError as e:
+def chat_error(e: Exception) -> Dict[str, Any]:
+    """Map an exception from the Claude call to the chatbot's error response."""
+    if isinstance(e, anthropic.APIError):
         return {
             'error': f'Anthropic API error: {str(e)}',
             'error_type': 'api_error',
             'timestamp': datetime.utcnow().isoformat() + 'Z'
         }
 
+    return {
+        'error': f'Unexpected error: {str(e)}',
+        'error_type': type(e).__name__,
+        'timestamp': datetime.utcnow().isoformat() + 'Z'
+    }
+
+
+@metrics.with_timings
+@deadline.from_input
+def chat(input_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Main chatbot function. Processes user message and returns assistant response.
+
+    If the reply can't be finished before the request deadline (see
+    deadline.py), whatever Claude wrote so far is returned as a partial result.
+    """
+    try:
+        prepared = prepare_chat(input_data)
+        if 'error' in prepared:
+            return prepared
+
+        # Call Claude API
+        with metrics.stage_timer('chatbot', 'llm'):
+            response = llm_calls.create_message('chatbot', get_anthropic_client(ANTHROPIC_API_KEY),
+                model=MODEL_NAME,
+                max_tokens=MAX_TOKENS,
+                system=prepared['system'],
+                messages=prepared['messages']
+            )
+        metrics.record_tokens('chatbot', response.usage)
+
+        # Extract assistant response
+        assistant_message = response.content[0].text
+        save_turn(prepared, assistant_message)
+
+        return {'response': assistant_message, **build_chat_result(prepared, assistant_message),
+                'usage': metrics.usage_summary(response.usage)}
+
+    except deadline.DeadlineExceeded as e:
+        # Stored like a full reply, so the next turn keeps the visitor's message
+        result = partial_chat_result(prepared, e)
+        save_turn(prepared, result['response'])
+        return result
     except Exception as e:
-        return {
-            'error': f'Unexpected error: {str(e)}',
-            'error_type': type(e).__name__,
-            'timestamp': datetime.utcnow().isoformat() + 'Z'
-        }
+        return chat_error(e)
+
+
+def chat_stream(input_data: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Streaming variant of chat() using the streaming Messages API.
+
+    Yields events as they happen:
+        {'event': 'delta', 'data': {'text': '...'}}   for each text chunk
+        {'event': 'done', 'data': {...}}               once, with detected_industry,
+                                                       session_id, should_offer_booking, booking_url,
+                                                       timings, usage
+        {'event': 'error', 'data': {...}}              instead of 'done' on failure
+    """
+    started = time.perf_counter()
+    try:
+        # Collected explicitly: a generator must not hold a context variable across yields
+        with metrics.collect_timings() as timings:
+            prepared = prepare_chat(input_data)
+        if 'error' in prepared:
+            yield {'event': 'error', 'data': prepared}
+            return
+
+        # Stream Claude's response, forwarding text deltas as they arrive
+        chunks = []
+        with metrics.stage_timer('chatbot', 'llm', timings):
+            with get_anthropic_client(ANTHROPIC_API_KEY).messages.stream(
+                model=MODEL_NAME,
+                max_tokens=MAX_TOKENS,
+                system=prepared['system'],
+                messages=prepared['messages']
+            ) as stream:
+                for text in stream.text_stream:
+                    chunks.append(text)
+                    yield {'event': 'delta', 'data': {'text': text}}
+                usage = stream.get_final_message().usage
+                metrics.record_tokens('chatbot', usage)
+        save_turn(prepared, ''.join(chunks))
+
+        timings['total_ms'] = metrics.to_ms(time.perf_counter() - started)
+        yield {'event': 'done', 'data': {**build_chat_result(prepared, ''.join(chunks)), 'timings': timings,
+                                         'usage': metrics.usage_summary(usage)}}
+
+    except Exception as e:
+        yield {'event': 'error', 'data': chat_error(e)}
+
+
+@metrics.with_timings
+@deadline.from_input
+async def chat_async(input_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Async variant of chat() using the shared AsyncAnthropic client."""
+    try:
+        prepared = await asyncio.to_thread(prepare_chat, input_data)
+        if 'error' in prepared:
+            return prepared
+
+        with metrics.stage_timer('chatbot', 'llm'):
+            response = await llm_calls.create_message_async('chatbot', get_async_anthropic_client(),
+                model=MODEL_NAME,
+                max_tokens=MAX_TOKENS,
+                system=prepared['system'],
+                messages=prepared['messages']
+            )
+        metrics.record_tokens('chatbot', response.usage)
+        assistant_message = response.content[0].text
+        await asyncio.to_thread(save_turn, prepared, assistant_message)
+
+        return {'response': assistant_message, **build_chat_result(prepared, assistant_message),
+                'usage': metrics.usage_summary(response.usage)}
+
+    except deadline.DeadlineExceeded as e:
+        result = partial_chat_result(prepared, e)
+        await asyncio.to_thread(save_turn, prepared, result['response'])
+        return result
+    except Exception as e:
+        return chat_error(e)
+
+
+async def chat_stream_async(input_data: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+    """Async variant of chat_stream(); yields the same events."""
+    started = time.perf_counter()
+    try:
+        with metrics.collect_timings() as timings:
+            prepared = await asyncio.to_thread(prepare_chat, input_data)
+        if 'error' in prepared:
+            yield {'event': 'error', 'data': prepared}
+            return
+
+        chunks = []
+        with metrics.stage_timer('chatbot', 'llm', timings):
+            async with get_async_anthropic_client().messages.stream(
+                model=MODEL_NAME,
+                max_tokens=MAX_TOKENS,
+                system=prepared['system'],
+                messages=prepared['messages']
+            ) as stream:
+                async for text in stream.text_stream:
+                    chunks.append(text)
+                    yield {'event': 'delta', 'data': {'text': text}}
+                usage = (await stream.get_final_message()).usage
+                metrics.record_tokens('chatbot', usage)
+        await asyncio.to_thread(save_turn, prepared, ''.join(chunks))
+
+        timings['total_ms'] = metrics.to_ms(time.perf_counter() - started)
+        yield {'event': 'done', 'data': {**build_chat_result(prepared, ''.join(chunks)), 'timings': timings,
+                                         'usage': metrics.usage_summary(usage)}}
+
+    except Exception as e:
+        yield {'event': 'error', 'data': chat_error(e)}
 
 
 # ============================================================================
@@ -485,11 +1053,18 @@ def chat(input_data: Dict[str, Any]) -> Dict[str, Any]:
 # ============================================================================
 
 if __name__ == '__main__':
+    if not ANTHROPIC_API_KEY:
+        print(json.dumps({
+            'error': 'ANTHROPIC_API_KEY not found in environment',
+            'timestamp': datetime.utcnow().isoformat() + 'Z'
+        }))
+        sys.exit(1)
+
     # Read JSON from stdin
     try:
         input_data = json.loads(sys.stdin.read())
         result = chat(input_data)
-        print(json.dumps(result, indent=2))
+        fast_json.write_output(result)
 
     except json.JSONDecodeError as e:
         print(json.dumps({
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Request Deadlines
+=================
+The server gives every tool call a timeout (120s audits, 90s enrichment and
+chat, 60s qualification). This module carries that limit into the tool as an
+absolute deadline so each stage sizes itself to the time that is left instead
+of running on after the caller has given up:
+
+    - website fetches get min(REQUEST_TIMEOUT, time left - DEADLINE_LLM_RESERVE_SECONDS),
+      so a slow site can't eat the time the Claude call needs
+    - Claude calls get the time left as their HTTP timeout, and max_tokens is
+      cut to what can be generated in that time (DEADLINE_OUTPUT_TOKENS_PER_SECOND)
+    - retries are skipped when their backoff would run past the deadline
+
+When the deadline can't be met, DeadlineExceeded is raised and the tool
+returns its best partial result (marked 'partial': true) instead of being
+killed with nothing. The deadline is set DEADLINE_GRACE_SECONDS before the
+server's own timeout so there is time to build and send that result.
+
+The deadline travels with the tool input under '_deadline' (Unix time), so it
+works the same in-process, in warm pool workers and in tool subprocesses.
+Entry points decorated with from_input() remove the key and bind the deadline
+for the duration of the call. Without one (CLI use, batch items, streams)
+every helper here leaves the defaults unchanged.
+
+Usage:
+    input_data = deadline.with_deadline(input_data, timeout)   # server side
+
+    @deadline.from_input
+    def handle_request(params): ...                            # tool side
+
+    requests.get(url, timeout=deadline.stage_timeout(TIMEOUT, reserve=deadline.DEADLINE_LLM_RESERVE_SECONDS))
+"""
+
+import os
+import time
+import logging
+import functools
+import inspect
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import metrics
+import request_log
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+DEADLINE_GRACE_SECONDS = float(os.getenv('DEADLINE_GRACE_SECONDS', '3'))
+DEADLINE_LLM_RESERVE_SECONDS = float(os.getenv('DEADLINE_LLM_RESERVE_SECONDS', '20'))
+DEADLINE_OUTPUT_TOKENS_PER_SECOND = float(os.getenv('DEADLINE_OUTPUT_TOKENS_PER_SECOND', '50'))
+DEADLINE_LLM_OVERHEAD_SECONDS = float(os.getenv('DEADLINE_LLM_OVERHEAD_SECONDS', '2'))
+DEADLINE_MIN_OUTPUT_TOKENS = int(os.getenv('DEADLINE_MIN_OUTPUT_TOKENS', '256'))
+
+# Shortest timeout given to a stage that still has time to run
+MIN_STAGE_SECONDS = 1.0
+
+INPUT_KEY = '_deadline'
+
+_deadline: ContextVar[Optional[float]] = ContextVar('request_deadline', default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a stage can't finish before the request deadline."""
+
+    def __init__(self, message: str, partial_text: Optional[str] = None):
+        super().__init__(message)
+        # Text Claude produced before max_tokens cut it short, if any
+        self.partial_text = partial_text
+
+
+# ============================================================================
+# BINDING
+# ============================================================================
+
+def with_deadline(input_data: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+    """Copy of input_data carrying a deadline DEADLINE_GRACE_SECONDS inside timeout."""
+    budget = max(MIN_STAGE_SECONDS, timeout - DEADLINE_GRACE_SECONDS)
+    return {**input_data, INPUT_KEY: time.time() + budget}
+
+
+@contextmanager
+def bound(at: Optional[float]) -> Iterator[None]:
+    """Make at (Unix time, or None for no deadline) the deadline of the code inside."""
+    token = _deadline.set(at)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def from_input(fn: Callable) -> Callable:
+    """
+    Decorator for tool entry points: removes '_deadline' from the input dict
+    (the first argument) and binds it while fn runs.
+    """
+    def split(args):
+        if not args or not isinstance(args[0], dict) or INPUT_KEY not in args[0]:
+            return None, args
+        params = dict(args[0])
+        at = params.pop(INPUT_KEY)
+        return (float(at) if at is not None else None), (params,) + tuple(args[1:])
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            at, args = split(args)
+            with bound(at):
+                return await fn(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        at, args = split(args)
+        with bound(at):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+# ============================================================================
+# BUDGETS
+# ============================================================================
+
+def remaining() -> Optional[float]:
+    """Seconds until the current deadline, or None if there is none."""
+    at = _deadline.get()
+    return None if at is None else at - time.time()
+
+
+def allows(seconds: float) -> bool:
+    """Whether seconds more can be spent (always true without a deadline)."""
+    left = remaining()
+    return left is None or left > seconds
+
+
+def stage_timeout(default: float, reserve: float = 0.0) -> float:
+    """
+    Timeout for the next stage: default, cut so that reserve seconds are left
+    for later stages (but never below MIN_STAGE_SECONDS or past the deadline).
+
+    Raises:
+        DeadlineExceeded: If the deadline has already passed
+    """
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceeded('Request deadline passed before the stage started')
+    return min(default, left, max(MIN_STAGE_SECONDS, left - reserve))
+
+
+def output_tokens(max_tokens: int) -> int:
+    """
+    max_tokens cut to what Claude can generate before the deadline.
+
+    Raises:
+        DeadlineExceeded: If there isn't time for even DEADLINE_MIN_OUTPUT_TOKENS
+    """
+    left = remaining()
+    if left is None:
+        return max_tokens
+    affordable = int((left - DEADLINE_LLM_OVERHEAD_SECONDS) * DEADLINE_OUTPUT_TOKENS_PER_SECOND)
+    if affordable < min(max_tokens, DEADLINE_MIN_OUTPUT_TOKENS):
+        raise DeadlineExceeded(f'Only {max(left, 0):.1f}s left before the request deadline, too little for a Claude call')
+    return min(max_tokens, affordable)
+
+
+# ============================================================================
+# PARTIAL RESULTS
+# ============================================================================
+
+def partial_result(tool: str, result: Dict[str, Any], error: DeadlineExceeded) -> Dict[str, Any]:
+    """Mark result as the best a tool could do before the deadline."""
+    metrics.record_partial_result(tool)
+    request_log.log_event('partial_result', logging.WARNING, tool=tool, reason=str(error))
+    return {**result, 'partial': True, 'partial_reason': str(error)}
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Fast JSON
+=========
+One JSON encoder/decoder for every hop a tool result makes: tool stdout,
+warm pool worker pipes, the job queue, streamed lines and (through
+http_encoding.FastJSONProvider) the HTTP response itself.
+
+orjson is used when installed - it encodes and decodes several times faster
+than the json module and produces bytes, ready to write to a pipe or socket
+without another encode. Values orjson can't handle (ints past 64 bits,
+types only a default= hook knows) fall back to the json module, so output
+never differs in meaning, only in whitespace.
+
+Usage:
+    body = fast_json.dumps(result)                 # compact UTF-8 bytes
+    result = fast_json.loads(stdout)               # str or bytes
+    fast_json.write_output(result)                 # tool main(): print the result
+"""
+
+import sys
+import json
+from typing import Any, Callable, Optional, Union
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+if ORJSON_AVAILABLE:
+    # Datetimes go through default= like they do with the json module
+    _OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def dumps(obj: Any, pretty: bool = False, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """Serialize obj to UTF-8 JSON bytes, compact unless pretty (2-space indent)."""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(obj, default=default, option=_OPTIONS | (orjson.OPT_INDENT_2 if pretty else 0))
+        except TypeError:
+            pass
+    return json.dumps(
+        obj, default=default, ensure_ascii=False,
+        indent=2 if pretty else None, separators=None if pretty else (',', ':')
+    ).encode('utf-8')
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """
+    Parse JSON from str or bytes.
+
+    Raises:
+        json.JSONDecodeError: If data is not valid JSON
+    """
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # NaN/Infinity are accepted by the json module only
+            pass
+    return json.loads(data)
+
+
+def write_output(obj: Any) -> None:
+    """
+    Write a tool's result to stdout: indented for a terminal, compact when
+    piped to server.py or a script, which parses it anyway.
+    """
+    sys.stdout.flush()
+    sys.stdout.buffer.write(dumps(obj, pretty=sys.stdout.isatty(), default=str) + b'\n')
+    sys.stdout.buffer.flush()
@@ -0,0 +1,48 @@
+"""
+Gunicorn Configuration
+======================
+Loaded automatically by `gunicorn server:app` from the working directory.
+
+Sets up prometheus_client multiprocess mode so /metrics reports totals across
+every worker, not just the one that answers the scrape. The directory must be
+set before any worker imports prometheus_client, hence module level here.
+A fresh directory per master keeps counters from a previous deploy out of the
+new totals; set PROMETHEUS_MULTIPROC_DIR yourself to choose the location (and
+empty it on each deploy).
+
+Workers are threaded (gthread) so a worker whose tool requests are all waiting
+on Anthropic can still answer /health. Admission control (admission.py) holds
+running tool requests to IN_PROCESS_MAX_THREADS per worker plus short wait
+queues; GUNICORN_THREADS must stay above that total. -k / --threads on the
+command line still win.
+
+Each worker starts its job executor (job_queue.py) once it has loaded the app;
+outside gunicorn the executor starts on the first /jobs request.
+"""
+
+import os
+import tempfile
+
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '32'))
+
+if not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = tempfile.mkdtemp(prefix='resultant-metrics-')
+os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+
+def post_worker_init(worker):
+    """
+    Start draining the job queue, including jobs left over from a restart.
+
+    Done per worker after the fork, never at import, so a --preload master
+    does not claim jobs itself.
+    """
+    import server
+    server.get_job_executor()
+
+
+def child_exit(server, worker):
+    """Drop a dead worker's live-process samples from the aggregated metrics."""
+    import metrics
+    metrics.mark_process_dead(worker.pid)
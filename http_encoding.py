@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+HTTP Response Encoding
+======================
+How server.py and asgi_server.py turn results into response bodies.
+
+FastJSONProvider makes jsonify() encode with fast_json (orjson when
+installed) straight to bytes, keeping the key order the tool produced
+instead of sorting it.
+
+compressed_body() gzip- or brotli-compresses a finished JSON or text
+response when the client sends a matching Accept-Encoding: brotli (quality
+COMPRESS_BROTLI_QUALITY) when the brotli package is installed and accepted,
+else gzip (level COMPRESS_GZIP_LEVEL). Bodies under COMPRESS_MIN_BYTES are
+sent as-is, since compressing them saves less than it costs. Streamed
+responses (/chat/stream, /enrich/batch) are never compressed, so every event
+still reaches the client as soon as it is written.
+
+Usage:
+    app.json = FastJSONProvider(app)
+
+    encoded = compressed_body(body, request.headers.get('Accept-Encoding'), response.mimetype)
+    if encoded:
+        body, encoding = encoded
+"""
+
+import os
+import gzip
+from typing import Any, Optional, Tuple
+
+from flask.json.provider import DefaultJSONProvider
+
+import fast_json
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+COMPRESS_RESPONSES = os.getenv('COMPRESS_RESPONSES', 'true').lower() == 'true'
+COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', '1024'))
+COMPRESS_GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', '6'))
+COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', '4'))
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/')
+
+
+# ============================================================================
+# JSON
+# ============================================================================
+
+class FastJSONProvider(DefaultJSONProvider):
+    """DefaultJSONProvider (same default= handling) encoding with fast_json."""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        default = kwargs.get('default', self.default)
+        return fast_json.dumps(obj, pretty='indent' in kwargs, default=default).decode('utf-8')
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        return fast_json.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(fast_json.dumps(obj, pretty=pretty, default=self.default) + b'\n',
+                                        mimetype=self.mimetype)
+
+
+# ============================================================================
+# COMPRESSION
+# ============================================================================
+
+def accepted_encodings(accept_encoding: Optional[str]) -> dict:
+    """{'gzip': 1.0, 'br': 0.5, ...} from an Accept-Encoding header."""
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name.strip().lower()] = quality
+    return accepted
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """'br', 'gzip' or None for a client's Accept-Encoding."""
+    accepted = accepted_encodings(accept_encoding)
+    wildcard = accepted.get('*', 0.0)
+    if BROTLI_AVAILABLE and accepted.get('br', wildcard) > 0:
+        return 'br'
+    if accepted.get('gzip', wildcard) > 0:
+        return 'gzip'
+    return None
+
+
+def is_compressible(mimetype: Optional[str]) -> bool:
+    return bool(mimetype) and mimetype.startswith(COMPRESSIBLE_TYPES)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=COMPRESS_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=COMPRESS_GZIP_LEVEL, mtime=0)
+
+
+def compressed_body(body: bytes, accept_encoding: Optional[str], mimetype: Optional[str]) -> Optional[Tuple[bytes, str]]:
+    """(compressed body, Content-Encoding) if this response should be compressed, else None."""
+    if not COMPRESS_RESPONSES or len(body) < COMPRESS_MIN_BYTES or not is_compressible(mimetype):
+        return None
+    encoding = choose_encoding(accept_encoding)
+    if encoding is None:
+        return None
+    return compress(body, encoding), encoding
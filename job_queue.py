@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Durable Job Queue
+=================
+SQLite-backed queue and background executor for long-running tool calls.
+
+server.py enqueues /jobs requests here and returns a job id immediately. A few
+executor threads in each server worker claim queued jobs, run them, and store
+the result, so no web worker is held hostage by an outbound fetch or LLM call.
+Because the queue lives in SQLite, every gunicorn worker shares it and queued
+jobs survive a restart. Jobs left 'running' by a worker that died are put back
+in the queue once they go stale, up to JOB_MAX_ATTEMPTS runs; after that they
+are marked failed so a job that keeps killing its worker is not retried forever.
+"""
+
+import os
+import json
+import time
+import uuid
+import logging
+import sqlite3
+import asyncio
+import threading
+from datetime import datetime
+from typing import Dict, Any, Tuple, Callable, Optional, List, Awaitable
+
+import fast_json
+import request_log
+from sqlite_store import connect, init_db
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+JOB_DB_PATH = os.getenv('JOB_DB_PATH', os.path.join(SCRIPT_DIR, 'jobs.db'))
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', '1.0'))
+JOB_STALE_SECONDS = int(os.getenv('JOB_STALE_SECONDS', '600'))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+JOB_RETENTION_HOURS = int(os.getenv('JOB_RETENTION_HOURS', '24'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    http_status INTEGER,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs (status, created_at);
+"""
+
+
+def iso(timestamp: Optional[float]) -> Optional[str]:
+    """Format a unix timestamp the way the rest of the API does."""
+    if timestamp is None:
+        return None
+    return datetime.utcfromtimestamp(timestamp).isoformat() + 'Z'
+
+
+# ============================================================================
+# QUEUE
+# ============================================================================
+
+class JobQueue:
+    """Jobs table in a local SQLite database (see sqlite_store.py)."""
+
+    def __init__(self, path: str = JOB_DB_PATH):
+        self.path = path
+        init_db(self.path, SCHEMA)
+
+    def enqueue(self, kind: str, payload: Dict[str, Any]) -> str:
+        """Store a new job and return its id."""
+        job_id = uuid.uuid4().hex
+        with connect(self.path) as conn:
+            conn.execute(
+                'INSERT INTO jobs (id, kind, payload, status, created_at) VALUES (?, ?, ?, ?, ?)',
+                (job_id, kind, json.dumps(payload), 'queued', time.time())
+            )
+        return job_id
+
+    def claim_next(self) -> Optional[Dict[str, Any]]:
+        """
+        Atomically move the oldest queued job to 'running' and return it.
+
+        BEGIN IMMEDIATE takes the write lock up front, so two workers can never
+        claim the same job.
+        """
+        with connect(self.path) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                now = time.time()
+                # Fail jobs whose worker died on every attempt, requeue the rest
+                abandoned = {
+                    'error': f'Job abandoned after {JOB_MAX_ATTEMPTS} attempts (worker stopped mid-run)',
+                    'timestamp': iso(now)
+                }
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', result = ?, http_status = 500, finished_at = ? "
+                    "WHERE status = 'running' AND started_at < ? AND attempts >= ?",
+                    (json.dumps(abandoned), now, now - JOB_STALE_SECONDS, JOB_MAX_ATTEMPTS)
+                )
+                conn.execute(
+                    "UPDATE jobs SET status = 'queued' WHERE status = 'running' AND started_at < ?",
+                    (now - JOB_STALE_SECONDS,)
+                )
+                row = conn.execute(
+                    "SELECT id, kind, payload FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                        (now, row['id'])
+                    )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+        if row is None:
+            return None
+        return {'id': row['id'], 'kind': row['kind'], 'payload': json.loads(row['payload'])}
+
+    def complete(self, job_id: str, result: Dict[str, Any], http_status: int) -> None:
+        """Store a job's result; any non-2xx status marks the job failed."""
+        status = 'succeeded' if 200 <= http_status < 300 else 'failed'
+        with connect(self.path) as conn:
+            conn.execute(
+                'UPDATE jobs SET status = ?, result = ?, http_status = ?, finished_at = ? WHERE id = ?',
+                (status, fast_json.dumps(result, default=str).decode('utf-8'), http_status, time.time(), job_id)
+            )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a job's public status document, or None if it does not exist."""
+        with connect(self.path) as conn:
+            row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        job = {
+            'job_id': row['id'],
+            'type': row['kind'],
+            'status': row['status'],
+            'attempts': row['attempts'],
+            'created_at': iso(row['created_at']),
+            'started_at': iso(row['started_at']),
+            'finished_at': iso(row['finished_at']),
+        }
+        if row['result'] is not None:
+            job['http_status'] = row['http_status']
+            job['result'] = fast_json.loads(row['result'])
+        return job
+
+    def purge_finished(self, older_than_seconds: float) -> int:
+        """Delete finished jobs older than the retention window."""
+        with connect(self.path) as conn:
+            cursor = conn.execute(
+                "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND finished_at < ?",
+                (time.time() - older_than_seconds,)
+            )
+        return cursor.rowcount
+
+
+# ============================================================================
+# EXECUTOR
+# ============================================================================
+
+class JobExecutor:
+    """
+    Background threads that drain a JobQueue.
+
+    runner(kind, payload) must return (response_dict, http_status_code), the
+    same contract as server.run_tool(). Threads do not survive a fork, so the
+    executor is (re)started lazily from whichever process first needs it.
+    """
+
+    def __init__(self, queue: JobQueue, runner: Callable[[str, Dict[str, Any]], Tuple[Dict[str, Any], int]],
+                 workers: int = JOB_WORKERS):
+        self.queue = queue
+        self.runner = runner
+        self.workers = workers
+        self._wake = threading.Event()
+        self._owner_pid: Optional[int] = None
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+
+    def ensure_started(self) -> None:
+        """Start the executor threads once per process."""
+        with self._lock:
+            if self._owner_pid == os.getpid():
+                return
+            self._owner_pid = os.getpid()
+            self._threads = [
+                threading.Thread(target=self._loop, name=f'job-executor-{i}', daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def notify(self) -> None:
+        """Wake an idle executor thread (a job was just enqueued in this process)."""
+        self._wake.set()
+
+    def _loop(self) -> None:
+        while True:
+            try:
+                job = self.queue.claim_next()
+            except sqlite3.Error as e:
+                request_log.log_event('job_queue_error', logging.ERROR, action='claim', error=str(e))
+                job = None
+
+            if job is None:
+                self._maybe_purge()
+                self._wake.wait(JOB_POLL_INTERVAL)
+                self._wake.clear()
+                continue
+
+            request_log.log_event('job_started', job_id=job['id'], kind=job['kind'])
+            try:
+                result, http_status = self.runner(job['kind'], job['payload'])
+            except Exception as e:
+                result, http_status = {
+                    'error': f'Unexpected error running job: {str(e)}',
+                    'error_type': type(e).__name__,
+                    'timestamp': datetime.utcnow().isoformat() + 'Z'
+                }, 500
+            try:
+                self.queue.complete(job['id'], result, http_status)
+            except sqlite3.Error as e:
+                # The job stays 'running' until the stale requeue picks it up again
+                request_log.log_event('job_queue_error', logging.ERROR, action='complete', job_id=job['id'],
+                                      error=str(e))
+
+    def _maybe_purge(self) -> None:
+        now = time.time()
+        if now - self._last_purge < 3600:
+            return
+        self._last_purge = now
+        try:
+            self.queue.purge_finished(JOB_RETENTION_HOURS * 3600)
+        except sqlite3.Error:
+            pass
+
+
+class AsyncJobExecutor:
+    """
+    asyncio counterpart of JobExecutor, used by the ASGI server.
+
+    runner(kind, payload) is a coroutine returning (response_dict, http_status_code).
+    SQLite calls run in a thread so they never block the event loop.
+    """
+
+    def __init__(self, queue: JobQueue, runner: Callable[[str, Dict[str, Any]], Awaitable[Tuple[Dict[str, Any], int]]],
+                 workers: int = JOB_WORKERS):
+        self.queue = queue
+        self.runner = runner
+        self.workers = workers
+        self._wake: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._last_purge = 0.0
+
+    def ensure_started(self) -> None:
+        """Start the executor tasks on the running event loop (once)."""
+        if self._tasks:
+            return
+        self._wake = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._loop()) for _ in range(self.workers)]
+
+    def notify(self) -> None:
+        """Wake an idle executor task (a job was just enqueued)."""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                job = await asyncio.to_thread(self.queue.claim_next)
+            except sqlite3.Error as e:
+                request_log.log_event('job_queue_error', logging.ERROR, action='claim', error=str(e))
+                job = None
+
+            if job is None:
+                await self._maybe_purge()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+                continue
+
+            request_log.log_event('job_started', job_id=job['id'], kind=job['kind'])
+            try:
+                result, http_status = await self.runner(job['kind'], job['payload'])
+            except Exception as e:
+                result, http_status = {
+                    'error': f'Unexpected error running job: {str(e)}',
+                    'error_type': type(e).__name__,
+                    'timestamp': datetime.utcnow().isoformat() + 'Z'
+                }, 500
+            try:
+                await asyncio.to_thread(self.queue.complete, job['id'], result, http_status)
+            except sqlite3.Error as e:
+                request_log.log_event('job_queue_error', logging.ERROR, action='complete', job_id=job['id'],
+                                      error=str(e))
+
+    async def _maybe_purge(self) -> None:
+        now = time.time()
+        if now - self._last_purge < 3600:
+            return
+        self._last_purge = now
+        try:
+            await asyncio.to_thread(self.queue.purge_finished, JOB_RETENTION_HOURS * 3600)
+        except sqlite3.Error:
+            pass
@@ -7,23 +7,33 @@
  * - Conversation history management
  * - Auto-detection of booking opportunities
  * - Mobile responsive
- * - localStorage for conversation persistence
+ * - localStorage for the displayed conversation; the server keeps the
+ *   conversation itself under a session id, so only new messages are sent
+ * - Token streaming over Server-Sent Events (falls back to /chat when the
+ *   browser can't read a stream or /chat/stream answers with an error)
  */
 
 (function() {
   'use strict';
 
   // Configuration
+  const API_BASE = window.location.hostname === 'localhost' || window.location.hostname === '127.0.0.1'
+    ? 'http://localhost:5000'
+    : 'https://resultantai-github-io.onrender.com';
+
   const CONFIG = {
-    apiEndpoint: window.location.hostname === 'localhost' || window.location.hostname === '127.0.0.1'
-      ? 'http://localhost:5000/chat'
-      : 'https://resultantai-github-io.onrender.com/chat',
+    apiEndpoint: `${API_BASE}/chat`,
+    streamEndpoint: `${API_BASE}/chat/stream`,
+    // Stream tokens when the browser can read a fetch body incrementally
+    streaming: typeof ReadableStream !== 'undefined' && typeof TextDecoder !== 'undefined',
     storageKey: 'resultant_chat_history',
+    sessionKey: 'resultant_chat_session',
     maxHistoryLength: 20, // Keep last 20 messages
   };
 
   // State
   let conversationHistory = [];
+  let sessionId = null;
   let isTyping = false;
   let isOpen = false;
 
@@ -265,38 +275,12 @@
     setTypingState(true);
 
     try {
-      // Prepare request data
-      const requestData = {
-        message: message,
-        conversation_history: conversationHistory.map(msg => ({
-          role: msg.role,
-          content: msg.content
-        })),
-        page_context: getPageContext()
-      };
-
-      // Call API
-      const response = await fetch(CONFIG.apiEndpoint, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify(requestData)
-      });
-
-      if (!response.ok) {
-        throw new Error(`API error: ${response.status}`);
-      }
-
-      const data = await response.json();
-
-      // Add assistant response to UI
-      if (data.response) {
-        addMessage('assistant', data.response, data.booking_url);
-      } else if (data.error) {
-        addMessage('assistant', `Sorry, I encountered an error: ${data.error}. Please try again or email support@resultantai.com`, null, true);
+      if (await requestReply(message)) {
+        // The server lost the session (expired, evicted or redeployed): start
+        // a new one from the conversation this page still shows
+        sessionId = null;
+        await requestReply(message);
       }
-
     } catch (error) {
       console.error('Chatbot error:', error);
       addMessage('assistant', 'Sorry, I\'m having trouble connecting right now. Please try again in a moment, or email us at support@resultantai.com', null, true);
@@ -305,6 +289,219 @@
     }
   }
 
+  /**
+   * Send a message and render the reply; resolves true, with nothing
+   * rendered, when the server no longer has our session
+   */
+  async function requestReply(message) {
+    // The server holds the conversation under sessionId; only a conversation
+    // without one yet sends its history (excludes the message we just added)
+    const requestData = {
+      message: message,
+      page_context: getPageContext()
+    };
+    if (sessionId) {
+      requestData.session_id = sessionId;
+    } else {
+      requestData.conversation_history = conversationHistory.slice(0, -1).map(msg => ({
+        role: msg.role,
+        content: msg.content
+      }));
+    }
+
+    if (CONFIG.streaming) {
+      return streamResponse(requestData);
+    }
+    return fetchResponse(requestData);
+  }
+
+  /**
+   * Call the non-streaming endpoint and render its reply; resolves true
+   * when the server no longer has our session
+   */
+  async function fetchResponse(requestData) {
+    const response = await fetch(CONFIG.apiEndpoint, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify(requestData)
+    });
+
+    if (response.status === 429) {
+      addBusyMessage(response);
+      return false;
+    }
+    if (!response.ok) {
+      throw new Error(`API error: ${response.status}`);
+    }
+
+    const data = await response.json();
+    if (data.session_expired) {
+      return true;
+    }
+    saveSessionId(data.session_id);
+
+    // Add assistant response to UI
+    if (data.response) {
+      addMessage('assistant', data.response, data.booking_url);
+    } else if (data.error) {
+      addMessage('assistant', `Sorry, I encountered an error: ${data.error}. Please try again or email support@resultantai.com`, null, true);
+    }
+    return false;
+  }
+
+  /**
+   * Call the streaming endpoint and render text deltas as they arrive;
+   * resolves true when the server no longer has our session
+   */
+  async function streamResponse(requestData) {
+    const response = await fetch(CONFIG.streamEndpoint, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'Accept': 'text/event-stream',
+      },
+      body: JSON.stringify(requestData)
+    });
+
+    if (response.status === 429) {
+      addBusyMessage(response);
+      return false;
+    }
+    if (!response.ok || !response.body) {
+      // e.g. a server without /chat/stream: send the same request to /chat
+      return fetchResponse(requestData);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let content = '';
+    let messageEl = null;
+
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+
+      buffer += decoder.decode(value, { stream: true });
+
+      // SSE frames are separated by a blank line
+      let boundary;
+      while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+        const frame = parseSseFrame(buffer.slice(0, boundary));
+        buffer = buffer.slice(boundary + 2);
+        if (!frame) continue;
+
+        if (frame.event === 'delta') {
+          if (!messageEl) {
+            // Swap the typing dots for the message; input stays disabled until done
+            const typingEl = document.getElementById('typing-indicator');
+            if (typingEl) typingEl.remove();
+            messageEl = createMessageElement('assistant');
+          }
+          content += frame.data.text;
+          messageEl.querySelector('.message-content').innerHTML = formatMessageContent(content);
+          scrollToBottom();
+        } else if (frame.event === 'done') {
+          saveSessionId(frame.data.session_id);
+          if (!messageEl) {
+            messageEl = createMessageElement('assistant');
+          }
+          finalizeStreamedMessage(messageEl, content, frame.data.booking_url);
+          return false;
+        } else if (frame.event === 'error') {
+          if (messageEl) messageEl.remove();
+          if (frame.data.session_expired) {
+            return true;
+          }
+          addMessage('assistant', `Sorry, I encountered an error: ${frame.data.error}. Please try again or email support@resultantai.com`, null, true);
+          return false;
+        }
+      }
+    }
+
+    // Stream closed without a final event: keep whatever text arrived
+    if (messageEl && content) {
+      finalizeStreamedMessage(messageEl, content, null);
+      return false;
+    } else {
+      throw new Error('Stream ended before any response');
+    }
+  }
+
+  /**
+   * Tell the visitor the server is at capacity (429 from admission control)
+   */
+  function addBusyMessage(response) {
+    const retryAfter = parseInt(response.headers.get('Retry-After'), 10);
+    const wait = retryAfter > 0 ? `in about ${retryAfter} seconds` : 'in a moment';
+    addMessage('assistant', `I'm answering a lot of questions right now. Please try again ${wait}, or email us at support@resultantai.com`, null, true);
+  }
+
+  /**
+   * Parse one SSE frame ("event: x\ndata: {...}") into {event, data}
+   */
+  function parseSseFrame(frame) {
+    let event = 'message';
+    const dataLines = [];
+
+    frame.split('\n').forEach(line => {
+      if (line.startsWith('event:')) event = line.slice(6).trim();
+      else if (line.startsWith('data:')) dataLines.push(line.slice(5).trim());
+    });
+
+    if (dataLines.length === 0) return null;
+
+    try {
+      return { event, data: JSON.parse(dataLines.join('\n')) };
+    } catch (e) {
+      console.error('Failed to parse stream event:', e);
+      return null;
+    }
+  }
+
+  /**
+   * Add the booking link and store a fully streamed message in history
+   */
+  function finalizeStreamedMessage(messageEl, content, bookingUrl) {
+    const contentEl = messageEl.querySelector('.message-content');
+    contentEl.innerHTML = formatMessageContent(content) +
+      (bookingUrl ? `<a href="${bookingUrl}" target="_blank" class="quick-action">Book a Call →</a>` : '');
+    scrollToBottom();
+    recordMessage('assistant', content);
+  }
+
+  /**
+   * Create an empty message element and append it to the chat
+   */
+  function createMessageElement(role) {
+    const messagesContainer = document.getElementById('chat-messages');
+    const messageEl = document.createElement('div');
+    messageEl.className = `message ${role}`;
+    messageEl.innerHTML = `
+      <div class="message-avatar">${role === 'user' ? 'U' : 'R'}</div>
+      <div class="message-content"></div>
+    `;
+    messagesContainer.appendChild(messageEl);
+    return messageEl;
+  }
+
+  /**
+   * Store a message in history and localStorage
+   */
+  function recordMessage(role, content) {
+    conversationHistory.push({ role, content });
+
+    // Trim history if it gets too long
+    if (conversationHistory.length > CONFIG.maxHistoryLength) {
+      conversationHistory = conversationHistory.slice(-CONFIG.maxHistoryLength);
+    }
+
+    // Save to localStorage
+    saveConversationHistory();
+  }
+
   /**
    * Add message to conversation
    */
@@ -313,15 +510,7 @@
 
     // Add to conversation history (don't store errors in history)
     if (!isError) {
-      conversationHistory.push({ role, content });
-
-      // Trim history if it gets too long
-      if (conversationHistory.length > CONFIG.maxHistoryLength) {
-        conversationHistory = conversationHistory.slice(-CONFIG.maxHistoryLength);
-      }
-
-      // Save to localStorage
-      saveConversationHistory();
+      recordMessage(role, content);
     }
 
     // Create message element
@@ -425,7 +614,20 @@
   }
 
   /**
-   * Load conversation history from localStorage
+   * Remember the server's session id for the next message
+   */
+  function saveSessionId(id) {
+    if (!id) return;
+    sessionId = id;
+    try {
+      localStorage.setItem(CONFIG.sessionKey, id);
+    } catch (e) {
+      console.error('Failed to save chat session:', e);
+    }
+  }
+
+  /**
+   * Load conversation history and session id from localStorage
    */
   function loadConversationHistory() {
     try {
@@ -433,9 +635,11 @@
       if (stored) {
         conversationHistory = JSON.parse(stored);
       }
+      sessionId = localStorage.getItem(CONFIG.sessionKey);
     } catch (e) {
       console.error('Failed to load conversation history:', e);
       conversationHistory = [];
+      sessionId = null;
     }
   }
 
@@ -473,7 +677,9 @@
    */
   window.clearChatHistory = function() {
     conversationHistory = [];
+    sessionId = null;
     localStorage.removeItem(CONFIG.storageKey);
+    localStorage.removeItem(CONFIG.sessionKey);
     renderConversationHistory();
     console.log('Chat history cleared');
   };
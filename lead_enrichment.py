@@ -13,20 +13,37 @@ Usage:
 
     # With custom company name
     python lead_enrichment.py --domain example.com --company "Example Corp"
+
+    # Ignore a cached report and enrich again
+    python lead_enrichment.py --domain stripe.com --force-refresh
 """
 
 import os
 import sys
 import json
+import hashlib
+import asyncio
 import argparse
+import threading
+import time
 import requests
+import httpx
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
 from datetime import datetime, timezone
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple, Iterator, AsyncIterator, Union
 from dotenv import load_dotenv
 import anthropic
 from bs4 import BeautifulSoup
 import re
 
+from shared_clients import get_anthropic_client, get_async_anthropic_client, get_async_http_client, http_get
+from result_cache import ResultCache, is_truthy
+import deadline
+import fast_json
+import llm_calls
+import metrics
+
 # Load environment variables
 load_dotenv()
 
@@ -39,13 +56,22 @@ API_KEY = os.getenv('ANTHROPIC_API_KEY')
 MODEL_NAME = os.getenv('MODEL_NAME', 'claude-sonnet-4-5-20250929')
 MAX_TOKENS = int(os.getenv('MAX_TOKENS', '4096'))
 TIMEOUT = int(os.getenv('REQUEST_TIMEOUT', '30'))
-ICP_CONFIG_PATH = os.getenv('ICP_CONFIG_PATH', 'icp_config.json')
+ICP_CONFIG_PATH = os.getenv(
+    'ICP_CONFIG_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'icp_config.json')
+)
+ENRICH_CACHE_TTL_HOURS = float(os.getenv('ENRICH_CACHE_TTL_HOURS', '168'))
+ENRICH_CACHE_MAX_ENTRIES = int(os.getenv('ENRICH_CACHE_MAX_ENTRIES', '5000'))
+BATCH_MAX_ITEMS = int(os.getenv('ENRICH_BATCH_MAX_ITEMS', '1000'))
+BATCH_FETCH_CONCURRENCY = int(os.getenv('ENRICH_BATCH_FETCH_CONCURRENCY', '10'))
+BATCH_LLM_CONCURRENCY = int(os.getenv('ENRICH_BATCH_LLM_CONCURRENCY', '4'))
 
 
 # ============================================================================
 # ICP CONFIGURATION LOADING
 # ============================================================================
 
+@metrics.timed('lead_enrichment', 'config_load')
 def load_icp_config(config_path: str = ICP_CONFIG_PATH) -> Dict[str, Any]:
     """
     Load ICP (Ideal Customer Profile) configuration from JSON file.
@@ -121,76 +147,145 @@ def get_default_icp_config() -> Dict[str, Any]:
 # COMPANY DATA EXTRACTION
 # ============================================================================
 
-def fetch_company_data(domain: str, company_name: Optional[str] = None) -> Dict[str, Any]:
+FETCH_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+
+def normalize_company_url(domain: str) -> Tuple[str, str]:
     """
-    Fetch company website and extract basic information.
+    Turn a domain or URL into the URL to fetch plus a clean domain.
 
     Args:
-        domain: Company domain (e.g., 'stripe.com')
+        domain: Company domain (e.g., 'stripe.com') or full URL
+
+    Returns:
+        Tuple of (url, domain)
+    """
+    # Ensure domain has protocol
+    if not domain.startswith(('http://', 'https://')):
+        return 'https://' + domain, domain
+
+    # Extract domain from URL for cleaner data
+    return domain, domain.split('://')[1].split('/')[0]
+
+
+@metrics.timed('lead_enrichment', 'parse')
+def parse_company_page(
+    content: bytes,
+    url: str,
+    domain: str,
+    company_name: Optional[str],
+    status_code: int
+) -> Dict[str, Any]:
+    """
+    Extract company data from a fetched homepage.
+
+    Args:
+        content: Raw HTML bytes
+        url: URL the page was fetched from
+        domain: Clean company domain
         company_name: Optional company name if known
+        status_code: HTTP status of the fetch
 
     Returns:
         Dictionary containing scraped company data
     """
-    try:
-        # Ensure domain has protocol
-        if not domain.startswith(('http://', 'https://')):
-            url = 'https://' + domain
-        else:
-            url = domain
-            # Extract domain from URL for cleaner data
-            domain = url.split('://')[1].split('/')[0]
+    soup = BeautifulSoup(content, 'html.parser')
 
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
+    # Extract basic SEO and content data
+    title = soup.find('title')
+    meta_desc = soup.find('meta', attrs={'name': 'description'})
 
-        response = requests.get(url, headers=headers, timeout=TIMEOUT)
-        response.raise_for_status()
+    # Get page text for analysis
+    text_content = soup.get_text(separator=' ', strip=True)[:10000]
 
-        soup = BeautifulSoup(response.content, 'html.parser')
+    # Try to detect technologies from page source
+    page_source = str(soup)[:20000]
+    detected_tech = detect_technologies(page_source)
 
-        # Extract basic SEO and content data
-        title = soup.find('title')
-        meta_desc = soup.find('meta', attrs={'name': 'description'})
+    # Look for social links
+    social_links = extract_social_links(soup)
 
-        # Get page text for analysis
-        text_content = soup.get_text(separator=' ', strip=True)[:10000]
+    # Extract company name from title if not provided
+    if not company_name and title:
+        company_name = extract_company_name(title.string)
 
-        # Try to detect technologies from page source
-        page_source = str(soup)[:20000]
-        detected_tech = detect_technologies(page_source)
+    return {
+        'domain': domain,
+        'company_name': company_name,
+        'url': url,
+        'title': title.string if title else None,
+        'meta_description': meta_desc.get('content') if meta_desc else None,
+        'text_content': text_content,
+        'detected_technologies': detected_tech,
+        'social_links': social_links,
+        'status_code': status_code,
+        'has_https': url.startswith('https://'),
+        'fetch_timestamp': datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+    }
 
-        # Look for social links
-        social_links = extract_social_links(soup)
 
-        # Extract company name from title if not provided
-        if not company_name and title:
-            company_name = extract_company_name(title.string)
+def fetch_error(domain: str, company_name: Optional[str], error: Exception) -> Dict[str, Any]:
+    """Company data placeholder used when the website could not be fetched."""
+    return {
+        'domain': domain,
+        'company_name': company_name,
+        'error': f'Failed to fetch website: {str(error)}',
+        'text_content': ''
+    }
 
-        return {
-            'domain': domain,
-            'company_name': company_name,
-            'url': url,
-            'title': title.string if title else None,
-            'meta_description': meta_desc.get('content') if meta_desc else None,
-            'text_content': text_content,
-            'detected_technologies': detected_tech,
-            'social_links': social_links,
-            'status_code': response.status_code,
-            'has_https': url.startswith('https://'),
-            'fetch_timestamp': datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
-        }
+
+def fetch_timeout() -> float:
+    """REQUEST_TIMEOUT, shortened so the fetch leaves time for the Claude call before the deadline."""
+    return deadline.stage_timeout(TIMEOUT, reserve=deadline.DEADLINE_LLM_RESERVE_SECONDS)
+
+
+@metrics.timed('lead_enrichment', 'fetch')
+def fetch_company_data(domain: str, company_name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Fetch company website and extract basic information.
+
+    Args:
+        domain: Company domain (e.g., 'stripe.com')
+        company_name: Optional company name if known
+
+    Returns:
+        Dictionary containing scraped company data
+    """
+    url, domain = normalize_company_url(domain)
+
+    try:
+        response = http_get(url, headers=FETCH_HEADERS, timeout=fetch_timeout())
+        response.raise_for_status()
+        return parse_company_page(response.content, url, domain, company_name, response.status_code)
 
     except requests.RequestException as e:
-        return {
-            'domain': domain,
-            'company_name': company_name,
-            'error': f'Failed to fetch website: {str(e)}',
-            'text_content': ''
-        }
+        return fetch_error(domain, company_name, e)
+
 
+@metrics.timed('lead_enrichment', 'fetch')
+async def fetch_company_data_async(domain: str, company_name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Async variant of fetch_company_data() for the ASGI server.
+
+    Uses the shared httpx.AsyncClient and parses the page in a worker thread so
+    BeautifulSoup does not block the event loop.
+    """
+    url, domain = normalize_company_url(domain)
+
+    try:
+        response = await get_async_http_client().get(url, headers=FETCH_HEADERS, timeout=fetch_timeout())
+        response.raise_for_status()
+        return await asyncio.to_thread(
+            parse_company_page, response.content, url, domain, company_name, response.status_code
+        )
 
+    except httpx.HTTPError as e:
+        return fetch_error(domain, company_name, e)
+
+
+@metrics.timed('lead_enrichment', 'detect_technologies')
 def detect_technologies(page_source: str) -> List[str]:
     """
     Detect technologies used based on page source analysis.
@@ -279,24 +374,17 @@ def extract_company_name(title: str) -> str:
 # AI-POWERED ENRICHMENT
 # ============================================================================
 
-def enrich_company_data(company_data: Dict[str, Any], icp_config: Dict[str, Any]) -> Dict[str, Any]:
+def build_enrichment_prompt(company_data: Dict[str, Any]) -> str:
     """
-    Use Claude to enrich company data with additional insights.
+    Build the Claude prompt for company enrichment.
 
     Args:
         company_data: Basic company data from web scraping
-        icp_config: ICP configuration for context
 
     Returns:
-        Enriched company data dictionary
+        Prompt text
     """
-    if not API_KEY:
-        raise ValueError("ANTHROPIC_API_KEY not found in environment variables")
-
-    client = anthropic.Anthropic(api_key=API_KEY)
-
-    # Build enrichment prompt
-    prompt = f"""You are a B2B sales intelligence analyst enriching company data for lead qualification.
+    return f"""You are a B2B sales intelligence analyst enriching company data for lead qualification.
 
 COMPANY INFORMATION:
 - Domain: {company_data.get('domain', 'Unknown')}
@@ -359,38 +447,95 @@ Based on the available information, provide a comprehensive company enrichment a
 
 Provide ONLY the JSON output, no additional text. Be specific and realistic in your assessments. If information is not available, use "unknown" or null rather than guessing."""
 
+
+def parse_enrichment_response(response_text: str) -> Dict[str, Any]:
+    """
+    Parse Claude's enrichment response, stripping markdown code fences.
+
+    Args:
+        response_text: Raw text of Claude's reply
+
+    Returns:
+        Enrichment data dictionary
+    """
+    if '```json' in response_text:
+        response_text = response_text.split('```json')[1].split('```')[0].strip()
+    elif '```' in response_text:
+        response_text = response_text.split('```')[1].split('```')[0].strip()
+
+    try:
+        return json.loads(response_text)
+    except json.JSONDecodeError as e:
+        metrics.record_json_parse_failure('lead_enrichment')
+        raise Exception(f"Failed to parse Claude's response as JSON: {str(e)}")
+
+
+def enrich_company_data(company_data: Dict[str, Any], icp_config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Use Claude to enrich company data with additional insights.
+
+    Args:
+        company_data: Basic company data from web scraping
+        icp_config: ICP configuration for context
+
+    Returns:
+        Enriched company data dictionary
+    """
+    if not API_KEY:
+        raise ValueError("ANTHROPIC_API_KEY not found in environment variables")
+
+    client = get_anthropic_client(API_KEY)
+
+    # Build enrichment prompt
+    prompt = build_enrichment_prompt(company_data)
+
     try:
         # Call Claude API
-        message = client.messages.create(
-            model=MODEL_NAME,
-            max_tokens=MAX_TOKENS,
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
-        )
+        with metrics.stage_timer('lead_enrichment', 'llm'):
+            message = llm_calls.create_message('lead_enrichment', client,
+                model=MODEL_NAME,
+                max_tokens=MAX_TOKENS,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ]
+            )
+        metrics.record_tokens('lead_enrichment', message.usage)
+
+        # Extract response text and parse JSON from response
+        return parse_enrichment_response(message.content[0].text)
 
-        # Extract response text
-        response_text = message.content[0].text
+    except anthropic.APIError as e:
+        raise Exception(f"Anthropic API error: {str(e)}")
 
-        # Parse JSON from response
-        if '```json' in response_text:
-            response_text = response_text.split('```json')[1].split('```')[0].strip()
-        elif '```' in response_text:
-            response_text = response_text.split('```')[1].split('```')[0].strip()
 
-        enrichment_data = json.loads(response_text)
-        return enrichment_data
+async def enrich_company_data_async(company_data: Dict[str, Any], icp_config: Dict[str, Any]) -> Dict[str, Any]:
+    """Async variant of enrich_company_data() using the shared AsyncAnthropic client."""
+    if not API_KEY:
+        raise ValueError("ANTHROPIC_API_KEY not found in environment variables")
+
+    prompt = build_enrichment_prompt(company_data)
+
+    try:
+        with metrics.stage_timer('lead_enrichment', 'llm'):
+            message = await llm_calls.create_message_async('lead_enrichment', get_async_anthropic_client(),
+                model=MODEL_NAME,
+                max_tokens=MAX_TOKENS,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ]
+            )
+        metrics.record_tokens('lead_enrichment', message.usage)
+        return parse_enrichment_response(message.content[0].text)
 
     except anthropic.APIError as e:
         raise Exception(f"Anthropic API error: {str(e)}")
-    except json.JSONDecodeError as e:
-        raise Exception(f"Failed to parse Claude's response as JSON: {str(e)}")
 
 
 # ============================================================================
 # LEAD SCORING ENGINE
 # ============================================================================
 
+@metrics.timed('lead_enrichment', 'score')
 def score_lead(enriched_data: Dict[str, Any], icp_config: Dict[str, Any]) -> Dict[str, Any]:
     """
     Score lead based on ICP fit criteria.
@@ -693,6 +838,11 @@ def parse_arguments() -> Optional[Dict[str, str]]:
         type=str,
         help='Company name (optional, will be detected if not provided)'
     )
+    parser.add_argument(
+        '--force-refresh',
+        action='store_true',
+        help='Ignore any cached report for this domain and enrich again'
+    )
 
     args = parser.parse_args()
 
@@ -701,6 +851,8 @@ def parse_arguments() -> Optional[Dict[str, str]]:
         result = {'domain': args.domain}
         if args.company:
             result['company'] = args.company
+        if args.force_refresh:
+            result['force_refresh'] = True
         return result
 
     # If no args, check stdin (for Make.com webhook mode)
@@ -765,6 +917,422 @@ def format_output(
     }
 
 
+# ============================================================================
+# RESULT CACHE
+# ============================================================================
+
+_enrichment_cache: Optional[ResultCache] = None
+
+
+def get_enrichment_cache() -> ResultCache:
+    """Shared enrichment report cache (created on first use)."""
+    global _enrichment_cache
+    if _enrichment_cache is None:
+        _enrichment_cache = ResultCache(
+            'enrichment',
+            ttl_seconds=ENRICH_CACHE_TTL_HOURS * 3600,
+            max_entries=ENRICH_CACHE_MAX_ENTRIES
+        )
+    return _enrichment_cache
+
+
+def normalize_domain(domain: str) -> str:
+    """
+    Reduce a domain or URL to its bare host so equivalent inputs share a cache entry.
+
+    'https://www.Stripe.com/pricing?x=1' -> 'stripe.com'
+    """
+    host = domain.strip().lower()
+    if '://' in host:
+        host = host.split('://', 1)[1]
+    host = host.split('/')[0].split('?')[0].split('#')[0]
+    host = host.rsplit('@', 1)[-1].rstrip('.')
+    if host.startswith('www.'):
+        host = host[4:]
+    return host
+
+
+def icp_config_hash(icp_config: Dict[str, Any]) -> str:
+    """Stable short hash of the ICP config; editing icp_config.json invalidates cached scores."""
+    canonical = json.dumps(icp_config, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+def enrichment_cache_key(domain: str, icp_config: Dict[str, Any]) -> str:
+    return f"{normalize_domain(domain)}|{icp_config_hash(icp_config)}"
+
+
+def with_cache_metadata(report: Dict[str, Any], status: str, cached_at: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Return a copy of report with cache status in enrichment_metadata.
+
+    Args:
+        status: 'hit' (served from cache), 'miss' (freshly enriched) or
+                'refresh' (force_refresh bypassed the cache)
+        cached_at: Unix time the cached report was created (hits only)
+    """
+    metadata = dict(report.get('enrichment_metadata', {}))
+    metadata['cache'] = status
+    if cached_at is not None:
+        metadata['cached_at'] = datetime.fromtimestamp(cached_at, timezone.utc).isoformat().replace('+00:00', 'Z')
+    return {**report, 'enrichment_metadata': metadata}
+
+
+def partial_report(company_data: Dict[str, Any], domain: str, company_name: Optional[str], status: str,
+                   error: deadline.DeadlineExceeded) -> Dict[str, Any]:
+    """
+    Report with only the scraped website data, for when Claude's enrichment
+    can't finish before the deadline. Without it there is nothing to score, so
+    lead_score, lead_category and recommendation are None.
+    """
+    report = {
+        'enrichment_metadata': {
+            'timestamp': datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z'),
+            'domain': domain,
+            'company_name': company_name or company_data.get('company_name') or 'Unknown',
+            'model_used': MODEL_NAME
+        },
+        'lead_score': None,
+        'lead_category': None,
+        'recommendation': None,
+        'scoring_details': None,
+        'enrichment_data': {'website': {key: value for key, value in company_data.items() if key != 'text_content'}}
+    }
+    return deadline.partial_result('lead_enrichment', with_cache_metadata(report, status), error)
+
+
+# ============================================================================
+# REQUEST HANDLER
+# ============================================================================
+
+@metrics.with_timings
+@deadline.from_input
+def handle_request(
+    params: Dict[str, Any],
+    fetch_slots: Optional[threading.Semaphore] = None,
+    llm_slots: Optional[threading.Semaphore] = None
+) -> Dict[str, Any]:
+    """
+    Run the full enrichment pipeline for a single request.
+
+    This is the entry point shared by the CLI/stdin mode below and by
+    server.py, which calls it directly when running tools in-process.
+
+    Reports are cached per normalized domain and ICP config. A cached report
+    is returned without fetching the site or calling Claude unless
+    'force_refresh' is set.
+
+    With a request deadline (see deadline.py) the fetch and Claude call are
+    sized to the time left, and an enrichment that can't finish in time
+    returns the scraped website data as an unscored partial report.
+
+    Args:
+        params: Dictionary with 'domain', optional 'company' and optional 'force_refresh'
+        fetch_slots: Semaphore held around the website fetch (batch mode)
+        llm_slots: Semaphore held around the Claude call (batch mode)
+
+    Returns:
+        Complete enrichment report with scoring
+    """
+    if 'domain' not in params:
+        raise ValueError("JSON must contain 'domain' field")
+
+    domain = params['domain']
+    company_name = params.get('company')
+    force_refresh = is_truthy(params.get('force_refresh', False))
+
+    # Step 1: Load ICP configuration
+    print(f"Loading ICP configuration...", file=sys.stderr)
+    icp_config = load_icp_config()
+
+    cache = get_enrichment_cache()
+    cache_key = enrichment_cache_key(domain, icp_config)
+    if not force_refresh:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            print(f"Using cached enrichment for {normalize_domain(domain)}", file=sys.stderr)
+            return with_cache_metadata(cached['value'], 'hit', cached['created_at'])
+
+    # Step 2: Fetch company data
+    print(f"Fetching company data from {domain}...", file=sys.stderr)
+    with fetch_slots or nullcontext():
+        company_data = fetch_company_data(domain, company_name)
+
+    if 'error' in company_data:
+        print(f"Warning: {company_data['error']}", file=sys.stderr)
+        print("Continuing with limited data...", file=sys.stderr)
+
+    # Step 3: Enrich data using Claude
+    print(f"Enriching company data with AI...", file=sys.stderr)
+    status = 'refresh' if force_refresh else 'miss'
+    try:
+        with llm_slots or nullcontext():
+            enriched_data = enrich_company_data(company_data, icp_config)
+    except deadline.DeadlineExceeded as e:
+        return partial_report(company_data, domain, company_name, status, e)
+
+    # Step 4: Score lead against ICP
+    print(f"Scoring lead against ICP criteria...", file=sys.stderr)
+    scoring_results = score_lead(enriched_data, icp_config)
+
+    # Step 5: Format output
+    final_output = format_output(
+        enriched_data,
+        scoring_results,
+        domain,
+        company_name
+    )
+
+    # Reports built from a failed fetch are not worth keeping
+    if 'error' not in company_data:
+        cache.set(cache_key, final_output)
+
+    return with_cache_metadata(final_output, status)
+
+
+@metrics.with_timings
+@deadline.from_input
+async def handle_request_async(
+    params: Dict[str, Any],
+    fetch_slots: Optional[asyncio.Semaphore] = None,
+    llm_slots: Optional[asyncio.Semaphore] = None
+) -> Dict[str, Any]:
+    """
+    Async variant of handle_request() used by the ASGI server.
+
+    The website fetch and Claude call are awaited, so one worker process can
+    keep many enrichments in flight at once.
+    """
+    if 'domain' not in params:
+        raise ValueError("JSON must contain 'domain' field")
+
+    domain = params['domain']
+    company_name = params.get('company')
+    force_refresh = is_truthy(params.get('force_refresh', False))
+
+    icp_config = load_icp_config()
+
+    cache = get_enrichment_cache()
+    cache_key = enrichment_cache_key(domain, icp_config)
+    if not force_refresh:
+        cached = await asyncio.to_thread(cache.get, cache_key)
+        if cached is not None:
+            print(f"Using cached enrichment for {normalize_domain(domain)}", file=sys.stderr)
+            return with_cache_metadata(cached['value'], 'hit', cached['created_at'])
+
+    print(f"Fetching company data from {domain}...", file=sys.stderr)
+    async with fetch_slots or nullcontext():
+        company_data = await fetch_company_data_async(domain, company_name)
+
+    if 'error' in company_data:
+        print(f"Warning: {company_data['error']}", file=sys.stderr)
+        print("Continuing with limited data...", file=sys.stderr)
+
+    print(f"Enriching company data with AI...", file=sys.stderr)
+    status = 'refresh' if force_refresh else 'miss'
+    try:
+        async with llm_slots or nullcontext():
+            enriched_data = await enrich_company_data_async(company_data, icp_config)
+    except deadline.DeadlineExceeded as e:
+        return partial_report(company_data, domain, company_name, status, e)
+
+    scoring_results = score_lead(enriched_data, icp_config)
+
+    final_output = format_output(
+        enriched_data,
+        scoring_results,
+        domain,
+        company_name
+    )
+
+    if 'error' not in company_data:
+        await asyncio.to_thread(cache.set, cache_key, final_output)
+
+    return with_cache_metadata(final_output, status)
+
+
+# ============================================================================
+# BATCH ENRICHMENT
+# ============================================================================
+
+def batch_item_params(item: Union[str, Dict[str, Any]], force_refresh: bool) -> Dict[str, Any]:
+    """Turn one batch entry ('stripe.com' or {"domain": ..., "company": ...}) into handle_request params."""
+    if isinstance(item, str):
+        item = {'domain': item}
+    if not isinstance(item, dict) or not item.get('domain'):
+        raise ValueError("Each batch item must be a domain string or an object with a 'domain' field")
+    return {'force_refresh': force_refresh, **item}
+
+
+def batch_item_key(params: Dict[str, Any]) -> str:
+    """Duplicate rows in one batch (same domain, company and refresh flag) are enriched once."""
+    return f"{normalize_domain(params['domain'])}|{params.get('company')}|{is_truthy(params.get('force_refresh'))}"
+
+
+def batch_result(index: int, item: Any, result: Optional[Dict[str, Any]] = None,
+                 error: Optional[Exception] = None) -> Dict[str, Any]:
+    """One NDJSON line: the item's report, or its error without failing the batch."""
+    domain = item.get('domain') if isinstance(item, dict) else item
+    if error is not None:
+        return {
+            'type': 'result',
+            'index': index,
+            'domain': domain,
+            'status': 'error',
+            'error': str(error),
+            'error_type': type(error).__name__
+        }
+    return {'type': 'result', 'index': index, 'domain': domain, 'status': 'ok', 'result': result}
+
+
+def batch_summary(results: List[Dict[str, Any]], started: float) -> Dict[str, Any]:
+    failed = sum(1 for result in results if result['status'] == 'error')
+    cache_hits = sum(
+        1 for result in results
+        if result['status'] == 'ok' and result['result']['enrichment_metadata'].get('cache') == 'hit'
+    )
+    return {
+        'type': 'summary',
+        'total': len(results),
+        'succeeded': len(results) - failed,
+        'failed': failed,
+        'cache_hits': cache_hits,
+        'elapsed_seconds': round(time.perf_counter() - started, 3),
+        'timestamp': datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+    }
+
+
+def parse_batch_request(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validate a /enrich/batch body and return enrich_batch() keyword arguments.
+
+    Requested concurrency can lower the server's limits but never raise them.
+
+    Raises:
+        ValueError: If 'domains' is missing, empty, too long, or a limit is not a positive integer
+    """
+    items = data.get('domains')
+    if not isinstance(items, list) or not items:
+        raise ValueError("'domains' must be a non-empty list of domains or {\"domain\", \"company\"} objects")
+    if len(items) > BATCH_MAX_ITEMS:
+        raise ValueError(f"Batch too large: {len(items)} items (maximum {BATCH_MAX_ITEMS})")
+
+    limits = {}
+    for field, server_limit in (('fetch_concurrency', BATCH_FETCH_CONCURRENCY),
+                                ('llm_concurrency', BATCH_LLM_CONCURRENCY)):
+        value = data.get(field, server_limit)
+        if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+            raise ValueError(f"'{field}' must be a positive integer")
+        limits[field] = min(value, server_limit)
+
+    return {'items': items, 'force_refresh': is_truthy(data.get('force_refresh', False)), **limits}
+
+
+def group_batch_items(
+    items: List[Union[str, Dict[str, Any]]],
+    force_refresh: bool
+) -> Tuple[List[Tuple[Dict[str, Any], List[Tuple[int, Any]]]], List[Dict[str, Any]]]:
+    """
+    Validate batch items and group duplicate rows so each is enriched once.
+
+    Returns:
+        Tuple of ([(params, [(index, item), ...]), ...], error lines for invalid items)
+    """
+    groups: Dict[str, Tuple[Dict[str, Any], List[Tuple[int, Any]]]] = {}
+    invalid = []
+    for index, item in enumerate(items):
+        try:
+            params = batch_item_params(item, force_refresh)
+        except ValueError as e:
+            invalid.append(batch_result(index, item, error=e))
+            continue
+        groups.setdefault(batch_item_key(params), (params, []))[1].append((index, item))
+    return list(groups.values()), invalid
+
+
+def enrich_batch(
+    items: List[Union[str, Dict[str, Any]]],
+    fetch_concurrency: int = BATCH_FETCH_CONCURRENCY,
+    llm_concurrency: int = BATCH_LLM_CONCURRENCY,
+    force_refresh: bool = False
+) -> Iterator[Dict[str, Any]]:
+    """
+    Enrich and score many domains, yielding each result as soon as it finishes.
+
+    At most fetch_concurrency website fetches and llm_concurrency Claude calls
+    run at once; cache hits skip both. A failing item yields an error result
+    and the rest of the batch carries on. A final summary is yielded last.
+
+    Yields:
+        {'type': 'result', 'index', 'domain', 'status': 'ok', 'result': {...}}
+        {'type': 'result', 'index', 'domain', 'status': 'error', 'error', 'error_type'}
+        {'type': 'summary', 'total', 'succeeded', 'failed', 'cache_hits', 'elapsed_seconds'}
+    """
+    started = time.perf_counter()
+    fetch_slots = threading.Semaphore(fetch_concurrency)
+    llm_slots = threading.Semaphore(llm_concurrency)
+    groups, results = group_batch_items(items, force_refresh)
+    yield from results
+
+    # Enough threads to keep both stages full; the semaphores do the limiting
+    executor = ThreadPoolExecutor(max_workers=fetch_concurrency + llm_concurrency, thread_name_prefix='enrich-batch')
+    try:
+        futures = {
+            executor.submit(handle_request, params, fetch_slots, llm_slots): members
+            for params, members in groups
+        }
+        for future in as_completed(futures):
+            try:
+                result, error = future.result(), None
+            except Exception as e:
+                result, error = None, e
+            for index, item in futures[future]:
+                line = batch_result(index, item, result=result, error=error)
+                results.append(line)
+                yield line
+    finally:
+        # Client went away (generator closed): drop the items that have not started
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    yield batch_summary(results, started)
+
+
+async def enrich_batch_async(
+    items: List[Union[str, Dict[str, Any]]],
+    fetch_concurrency: int = BATCH_FETCH_CONCURRENCY,
+    llm_concurrency: int = BATCH_LLM_CONCURRENCY,
+    force_refresh: bool = False
+) -> AsyncIterator[Dict[str, Any]]:
+    """Async variant of enrich_batch() for the ASGI server; yields the same lines."""
+    started = time.perf_counter()
+    fetch_slots = asyncio.Semaphore(fetch_concurrency)
+    llm_slots = asyncio.Semaphore(llm_concurrency)
+    groups, results = group_batch_items(items, force_refresh)
+    for line in list(results):
+        yield line
+
+    async def run_group(params, members):
+        try:
+            return members, await handle_request_async(params, fetch_slots, llm_slots), None
+        except Exception as e:
+            return members, None, e
+
+    tasks = [asyncio.ensure_future(run_group(params, members)) for params, members in groups]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            members, result, error = await next_done
+            for index, item in members:
+                line = batch_result(index, item, result=result, error=error)
+                results.append(line)
+                yield line
+    finally:
+        # Client went away: stop the enrichments still running
+        for task in tasks:
+            task.cancel()
+
+    yield batch_summary(results, started)
+
+
 # ============================================================================
 # MAIN EXECUTION
 # ============================================================================
@@ -781,45 +1349,20 @@ def main():
             # Read from stdin (Make.com mode)
             params = read_stdin_json()
 
-        domain = params['domain']
-        company_name = params.get('company')
-
-        # Step 2: Load ICP configuration
-        print(f"Loading ICP configuration...", file=sys.stderr)
-        icp_config = load_icp_config()
-
-        # Step 3: Fetch company data
-        print(f"Fetching company data from {domain}...", file=sys.stderr)
-        company_data = fetch_company_data(domain, company_name)
-
-        if 'error' in company_data:
-            print(f"Warning: {company_data['error']}", file=sys.stderr)
-            print("Continuing with limited data...", file=sys.stderr)
+        # Step 2: Run the enrichment pipeline
+        final_output = handle_request(params)
 
-        # Step 4: Enrich data using Claude
-        print(f"Enriching company data with AI...", file=sys.stderr)
-        enriched_data = enrich_company_data(company_data, icp_config)
+        # Step 3: Output JSON to stdout
+        fast_json.write_output(final_output)
 
-        # Step 5: Score lead against ICP
-        print(f"Scoring lead against ICP criteria...", file=sys.stderr)
-        scoring_results = score_lead(enriched_data, icp_config)
-
-        # Step 6: Format output
-        final_output = format_output(
-            enriched_data,
-            scoring_results,
-            domain,
-            company_name
-        )
-
-        # Step 7: Output JSON to stdout
-        print(json.dumps(final_output, indent=2))
-
-        # Show summary to stderr
-        score = scoring_results['total_score']
-        category = scoring_results['category'].replace('_', ' ').title()
-        print(f"\n✓ Enrichment completed!", file=sys.stderr)
-        print(f"  Lead Score: {score}/100 ({category})", file=sys.stderr)
+        # Show summary to stderr (a deadline partial report has no score yet)
+        score = final_output.get('lead_score')
+        category = final_output.get('lead_category')
+        if score is None or category is None:
+            print(f"\n✓ Enrichment returned a partial report", file=sys.stderr)
+        else:
+            print(f"\n✓ Enrichment completed!", file=sys.stderr)
+            print(f"  Lead Score: {score}/100 ({category.replace('_', ' ').title()})", file=sys.stderr)
 
     except KeyboardInterrupt:
         print("\n\nEnrichment cancelled by user.", file=sys.stderr)
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Resilient LLM Calls
+===================
+create_message() / create_message_async() replace client.messages.create() in
+every tool: same arguments, same Message back, but with retries and optional
+hedging so one slow or overloaded response doesn't fail the whole request.
+
+Retries: connection errors, timeouts, 408/409/429 and 5xx (including 529
+overloaded) are retried up to LLM_MAX_RETRIES times with full-jitter
+exponential backoff (a random delay up to LLM_RETRY_BASE_SECONDS * 2^attempt,
+capped at LLM_RETRY_MAX_SECONDS), or after the server's Retry-After when it
+sends one. The SDK's own retries are turned off for these calls so the two
+don't multiply.
+
+Hedging (tools listed in LLM_HEDGE_TOOLS): if an attempt hasn't returned
+within this tool's recent p95 latency, a second identical request is sent and
+whichever finishes first wins. The delay only kicks in after
+LLM_HEDGE_MIN_SAMPLES calls have been observed, so at most about 5% of calls
+are duplicated. Hedges go through the rate governor like any other call, but
+never wait for budget: if the governor has none to spare, the hedge is dropped
+and the original request carries on. Async losers are cancelled; a sync loser
+runs to completion in the background and its result is discarded.
+
+Deadlines (see deadline.py): with a request deadline bound, each attempt's
+HTTP timeout is the time left and max_tokens is cut to what can be generated
+before it. A retry whose backoff would run past the deadline, or a reply cut
+short by the reduced max_tokens, raises DeadlineExceeded so the tool can
+return a partial result. So does a call the rate governor can't find budget
+for before the deadline.
+
+Streaming calls (/chat/stream) are not wrapped - a stream can't be retried or
+hedged once tokens have reached the client.
+"""
+
+import os
+import time
+import random
+import asyncio
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Dict, Deque, Optional
+
+import anthropic
+
+import deadline
+import metrics
+import rate_governor
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '3'))
+LLM_RETRY_BASE_SECONDS = float(os.getenv('LLM_RETRY_BASE_SECONDS', '0.5'))
+LLM_RETRY_MAX_SECONDS = float(os.getenv('LLM_RETRY_MAX_SECONDS', '8'))
+
+LLM_HEDGE_TOOLS = {name.strip() for name in os.getenv('LLM_HEDGE_TOOLS', 'chatbot,mca_qualification').split(',')
+                   if name.strip()}
+LLM_HEDGE_PERCENTILE = float(os.getenv('LLM_HEDGE_PERCENTILE', '95'))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv('LLM_HEDGE_MIN_SAMPLES', '20'))
+LLM_HEDGE_MIN_DELAY_SECONDS = float(os.getenv('LLM_HEDGE_MIN_DELAY_SECONDS', '1.0'))
+
+# Recent successful call durations kept per tool for the hedge delay
+LATENCY_WINDOW = 200
+
+HEDGE_THREADS = 32
+
+_latencies: Dict[str, Deque[float]] = {}
+_latencies_lock = threading.Lock()
+_hedge_executor: Optional[ThreadPoolExecutor] = None
+_hedge_executor_lock = threading.Lock()
+
+
+# ============================================================================
+# POLICY
+# ============================================================================
+
+def is_retryable(error: Exception) -> bool:
+    """Transient failures worth another attempt (what the SDK itself would retry)."""
+    if isinstance(error, anthropic.APIConnectionError):
+        return True
+    if isinstance(error, anthropic.APIStatusError):
+        if error.response.headers.get('x-should-retry') == 'false':
+            return False
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    return False
+
+
+def backoff_seconds(attempt: int, error: Optional[Exception] = None) -> float:
+    """Retry-After if the server sent one, else a full-jitter exponential delay."""
+    if isinstance(error, anthropic.APIStatusError):
+        try:
+            retry_after = float(error.response.headers.get('retry-after', ''))
+            if 0 < retry_after <= LLM_RETRY_MAX_SECONDS * 4:
+                return retry_after
+        except ValueError:
+            pass
+    return random.uniform(0, min(LLM_RETRY_MAX_SECONDS, LLM_RETRY_BASE_SECONDS * 2 ** attempt))
+
+
+def observe_latency(tool: str, seconds: float) -> None:
+    with _latencies_lock:
+        _latencies.setdefault(tool, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+
+def hedge_delay(tool: str) -> Optional[float]:
+    """Seconds to wait before hedging tool's call, or None if it shouldn't be hedged (yet)."""
+    if tool not in LLM_HEDGE_TOOLS:
+        return None
+    with _latencies_lock:
+        samples = sorted(_latencies.get(tool, ()))
+    if len(samples) < LLM_HEDGE_MIN_SAMPLES:
+        return None
+    index = min(len(samples) - 1, int(len(samples) * LLM_HEDGE_PERCENTILE / 100))
+    return max(LLM_HEDGE_MIN_DELAY_SECONDS, samples[index])
+
+
+def hedge_options() -> Dict[str, Any]:
+    """Extra request options that tell the rate governor a hedge must not wait for budget."""
+    if not rate_governor.enabled():
+        return {}
+    return {'extra_headers': {rate_governor.NO_WAIT_HEADER: '1'}}
+
+
+def merge_options(kwargs: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
+    """options with extra_headers merged into any the caller already passed."""
+    if 'extra_headers' not in options:
+        return options
+    return {**options, 'extra_headers': {**(kwargs.get('extra_headers') or {}), **options['extra_headers']}}
+
+
+def deadline_options(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """kwargs with max_tokens and timeout cut to the request deadline, if there is one."""
+    left = deadline.remaining()
+    if left is None:
+        return kwargs
+    timeout = kwargs.get('timeout')
+    return {
+        **kwargs,
+        'max_tokens': deadline.output_tokens(kwargs['max_tokens']),
+        'timeout': min(timeout, left) if isinstance(timeout, (int, float)) else left
+    }
+
+
+def check_cut_short(kwargs: Dict[str, Any], sent: Dict[str, Any], message: Any) -> Any:
+    """Raise DeadlineExceeded if the deadline's smaller max_tokens truncated message."""
+    if message.stop_reason == 'max_tokens' and sent['max_tokens'] < kwargs['max_tokens']:
+        text = ''.join(block.text for block in message.content if block.type == 'text')
+        raise deadline.DeadlineExceeded(
+            f"Claude's reply was cut to {sent['max_tokens']} tokens to meet the request deadline",
+            partial_text=text
+        )
+    return message
+
+
+def retry_delay(tool: str, attempt: int, error: anthropic.APIError) -> float:
+    """
+    Seconds to wait before retrying error, recording the retry.
+
+    Raises:
+        error: If it isn't retryable or the retries are used up
+        DeadlineExceeded: If the wait would run past the request deadline, or
+            the rate governor had no budget for the call before it
+    """
+    # The rate governor found no budget before the deadline (the SDK wraps it as a connection error)
+    if isinstance(error.__cause__, deadline.DeadlineExceeded):
+        raise error.__cause__
+    if not is_retryable(error):
+        raise error
+    if attempt >= LLM_MAX_RETRIES:
+        raise error
+    delay = backoff_seconds(attempt, error)
+    if not deadline.allows(delay):
+        raise deadline.DeadlineExceeded(
+            f'No time left before the request deadline to retry after {type(error).__name__}'
+        ) from error
+    metrics.record_llm_retry(tool, type(error).__name__)
+    return delay
+
+
+def get_hedge_executor() -> ThreadPoolExecutor:
+    global _hedge_executor
+    with _hedge_executor_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(max_workers=HEDGE_THREADS, thread_name_prefix='llm-hedge')
+        return _hedge_executor
+
+
+# ============================================================================
+# SYNC
+# ============================================================================
+
+def _timed_call(tool: str, client: anthropic.Anthropic, kwargs: Dict[str, Any]) -> Any:
+    started = time.perf_counter()
+    message = client.messages.create(**kwargs)
+    observe_latency(tool, time.perf_counter() - started)
+    return message
+
+
+def _hedged_call(tool: str, client: anthropic.Anthropic, kwargs: Dict[str, Any]) -> Any:
+    delay = hedge_delay(tool)
+    if delay is None:
+        return _timed_call(tool, client, kwargs)
+
+    # Run in copies of this context so stage timings still land in the tool's timings block
+    executor = get_hedge_executor()
+    primary = executor.submit(contextvars.copy_context().run, _timed_call, tool, client, kwargs)
+    wait([primary], timeout=delay)
+    if primary.done():
+        return primary.result()
+
+    hedge = executor.submit(contextvars.copy_context().run, _timed_call, tool, client,
+                            {**kwargs, **merge_options(kwargs, hedge_options())})
+    labels = {primary: 'primary', hedge: 'hedge'}
+    pending, error = {primary, hedge}, None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                metrics.record_llm_hedge(tool, labels[future])
+                return future.result()
+            # The original request's error is the one worth reporting
+            if future is primary or error is None:
+                error = future.exception()
+    metrics.record_llm_hedge(tool, 'none')
+    raise error
+
+
+def create_message(tool: str, client: anthropic.Anthropic, **kwargs) -> Any:
+    """client.messages.create(**kwargs) with jittered retries and, for hedged tools, a hedge request."""
+    client = client.with_options(max_retries=0)
+    attempt = 0
+    while True:
+        sent = deadline_options(kwargs)
+        try:
+            message = _hedged_call(tool, client, sent)
+        except anthropic.APIError as e:
+            time.sleep(retry_delay(tool, attempt, e))
+            attempt += 1
+            continue
+        return check_cut_short(kwargs, sent, message)
+
+
+# ============================================================================
+# ASYNC
+# ============================================================================
+
+async def _timed_call_async(tool: str, client: anthropic.AsyncAnthropic, kwargs: Dict[str, Any]) -> Any:
+    started = time.perf_counter()
+    message = await client.messages.create(**kwargs)
+    observe_latency(tool, time.perf_counter() - started)
+    return message
+
+
+async def _hedged_call_async(tool: str, client: anthropic.AsyncAnthropic, kwargs: Dict[str, Any]) -> Any:
+    delay = hedge_delay(tool)
+    if delay is None:
+        return await _timed_call_async(tool, client, kwargs)
+
+    primary = asyncio.ensure_future(_timed_call_async(tool, client, kwargs))
+    tasks = {primary}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if done:
+            return primary.result()
+
+        hedge = asyncio.ensure_future(_timed_call_async(
+            tool, client, {**kwargs, **merge_options(kwargs, hedge_options())}
+        ))
+        tasks.add(hedge)
+        labels = {primary: 'primary', hedge: 'hedge'}
+        pending, error = set(tasks), None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    metrics.record_llm_hedge(tool, labels[task])
+                    return task.result()
+                if task is primary or error is None:
+                    error = task.exception()
+        metrics.record_llm_hedge(tool, 'none')
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def create_message_async(tool: str, client: anthropic.AsyncAnthropic, **kwargs) -> Any:
+    """Async variant of create_message()."""
+    client = client.with_options(max_retries=0)
+    attempt = 0
+    while True:
+        sent = deadline_options(kwargs)
+        try:
+            message = await _hedged_call_async(tool, client, sent)
+        except anthropic.APIError as e:
+            await asyncio.sleep(retry_delay(tool, attempt, e))
+            attempt += 1
+            continue
+        return check_cut_short(kwargs, sent, message)
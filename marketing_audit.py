@@ -10,13 +10,19 @@ Usage:
 
     # Make.com webhook mode (reads JSON from stdin)
     echo '{"url": "https://example.com", "industry": "SaaS"}' | python marketing_audit.py
+
+    # Ignore cached page content and audits, fetch and audit again
+    python marketing_audit.py --url https://example.com --industry "SaaS" --force-refresh
 """
 
 import os
 import sys
 import json
+import hashlib
+import asyncio
 import argparse
 import requests
+import httpx
 from datetime import datetime, timezone
 from typing import Dict, Any, Optional
 from dotenv import load_dotenv
@@ -24,6 +30,13 @@ import anthropic
 from bs4 import BeautifulSoup
 import time
 
+from shared_clients import get_anthropic_client, get_async_anthropic_client, get_async_http_client, http_get
+from result_cache import ResultCache, is_truthy
+import deadline
+import fast_json
+import llm_calls
+import metrics
+
 # Load environment variables
 load_dotenv()
 
@@ -36,93 +49,198 @@ API_KEY = os.getenv('ANTHROPIC_API_KEY')
 MODEL_NAME = os.getenv('MODEL_NAME', 'claude-sonnet-4-5-20250929')
 MAX_TOKENS = int(os.getenv('MAX_TOKENS', '4096'))
 TIMEOUT = int(os.getenv('REQUEST_TIMEOUT', '30'))
+AUDIT_CACHE_TTL_HOURS = float(os.getenv('AUDIT_CACHE_TTL_HOURS', '720'))
+AUDIT_CACHE_MAX_ENTRIES = int(os.getenv('AUDIT_CACHE_MAX_ENTRIES', '2000'))
 
 
 # ============================================================================
 # WEBSITE FETCHING & ANALYSIS
 # ============================================================================
 
-def fetch_website_content(url: str) -> Dict[str, Any]:
+FETCH_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+
+def normalize_url(url: str) -> str:
+    """Ensure URL has protocol."""
+    if not url.startswith(('http://', 'https://')):
+        return 'https://' + url
+    return url
+
+
+@metrics.timed('marketing_audit', 'parse')
+def parse_website_content(content: bytes, url: str, status_code: int, load_time_seconds: float) -> Dict[str, Any]:
+    """
+    Extract key SEO elements from a fetched page.
+
+    Args:
+        content: Raw HTML bytes
+        url: URL the page was fetched from
+        status_code: HTTP status of the fetch
+        load_time_seconds: Time the fetch took
+
+    Returns:
+        Dictionary containing page content, title, meta description, etc.
+    """
+    soup = BeautifulSoup(content, 'html.parser')
+
+    # Extract SEO elements
+    title = soup.find('title')
+    meta_desc = soup.find('meta', attrs={'name': 'description'})
+    h1_tags = soup.find_all('h1')
+    h2_tags = soup.find_all('h2')
+
+    # Get text content (limited for API efficiency)
+    text_content = soup.get_text(separator=' ', strip=True)[:8000]
+
+    # Extract links for structure analysis
+    links = [a.get('href') for a in soup.find_all('a', href=True)]
+
+    return {
+        'url': url,
+        'title': title.string if title else None,
+        'meta_description': meta_desc.get('content') if meta_desc else None,
+        'h1_count': len(h1_tags),
+        'h1_tags': [h1.get_text(strip=True) for h1 in h1_tags[:5]],
+        'h2_count': len(h2_tags),
+        'text_content': text_content,
+        'internal_links_count': len([l for l in links if l.startswith('/')]),
+        'status_code': status_code,
+        'load_time_seconds': load_time_seconds
+    }
+
+
+def content_hash(website_data: Dict[str, Any]) -> str:
+    """
+    Hash the extracted page content (title, meta, headings, text).
+
+    Markup, scripts and load time changes that do not change what we send to
+    Claude keep the same hash, so they reuse the cached audit.
+    """
+    content = {
+        'title': website_data.get('title'),
+        'meta_description': website_data.get('meta_description'),
+        'h1_tags': website_data.get('h1_tags', []),
+        'h2_count': website_data.get('h2_count', 0),
+        'text_content': website_data.get('text_content', '')
+    }
+    canonical = json.dumps(content, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def conditional_headers(cached_page: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """Fetch headers, plus If-None-Match / If-Modified-Since from a previous fetch."""
+    headers = dict(FETCH_HEADERS)
+    if cached_page:
+        if cached_page.get('etag'):
+            headers['If-None-Match'] = cached_page['etag']
+        if cached_page.get('last_modified'):
+            headers['If-Modified-Since'] = cached_page['last_modified']
+    return headers
+
+
+def add_page_validators(website_data: Dict[str, Any], response_headers) -> Dict[str, Any]:
+    """Record the page's ETag, Last-Modified and content hash for the next fetch."""
+    website_data['etag'] = response_headers.get('ETag')
+    website_data['last_modified'] = response_headers.get('Last-Modified')
+    website_data['content_hash'] = content_hash(website_data)
+    website_data['not_modified'] = False
+    return website_data
+
+
+def not_modified_page(cached_page: Dict[str, Any]) -> Dict[str, Any]:
+    """Website data for a 304 response: the previous fetch, flagged as unchanged."""
+    return {**cached_page, 'not_modified': True}
+
+
+def fetch_error(url: str, error: Exception) -> Dict[str, Any]:
+    """Website data placeholder used when the page could not be fetched."""
+    return {
+        'url': url,
+        'error': f'Failed to fetch website: {str(error)}',
+        'title': None,
+        'meta_description': None,
+        'text_content': ''
+    }
+
+
+def fetch_timeout() -> float:
+    """REQUEST_TIMEOUT, shortened so the fetch leaves time for the Claude call before the deadline."""
+    return deadline.stage_timeout(TIMEOUT, reserve=deadline.DEADLINE_LLM_RESERVE_SECONDS)
+
+
+@metrics.timed('marketing_audit', 'fetch')
+def fetch_website_content(url: str, cached_page: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
     Fetch website content and extract key SEO elements.
 
     Args:
         url: The website URL to analyze
+        cached_page: Website data from a previous fetch of this URL. Its ETag and
+                     Last-Modified are sent as a conditional request, and it is
+                     returned as-is if the server answers 304 Not Modified.
 
     Returns:
         Dictionary containing page content, title, meta description, etc.
     """
+    url = normalize_url(url)
+
     try:
-        # Ensure URL has protocol
-        if not url.startswith(('http://', 'https://')):
-            url = 'https://' + url
+        response = http_get(url, headers=conditional_headers(cached_page), timeout=fetch_timeout())
+        if response.status_code == 304 and cached_page:
+            return not_modified_page(cached_page)
+        response.raise_for_status()
+        website_data = parse_website_content(
+            response.content, url, response.status_code, response.elapsed.total_seconds()
+        )
+        return add_page_validators(website_data, response.headers)
 
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
+    except requests.RequestException as e:
+        return fetch_error(url, e)
 
-        response = requests.get(url, headers=headers, timeout=TIMEOUT)
-        response.raise_for_status()
 
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        # Extract SEO elements
-        title = soup.find('title')
-        meta_desc = soup.find('meta', attrs={'name': 'description'})
-        h1_tags = soup.find_all('h1')
-        h2_tags = soup.find_all('h2')
-
-        # Get text content (limited for API efficiency)
-        text_content = soup.get_text(separator=' ', strip=True)[:8000]
-
-        # Extract links for structure analysis
-        links = [a.get('href') for a in soup.find_all('a', href=True)]
-
-        return {
-            'url': url,
-            'title': title.string if title else None,
-            'meta_description': meta_desc.get('content') if meta_desc else None,
-            'h1_count': len(h1_tags),
-            'h1_tags': [h1.get_text(strip=True) for h1 in h1_tags[:5]],
-            'h2_count': len(h2_tags),
-            'text_content': text_content,
-            'internal_links_count': len([l for l in links if l.startswith('/')]),
-            'status_code': response.status_code,
-            'load_time_seconds': response.elapsed.total_seconds()
-        }
+@metrics.timed('marketing_audit', 'fetch')
+async def fetch_website_content_async(url: str, cached_page: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Async variant of fetch_website_content() for the ASGI server.
+
+    Uses the shared httpx.AsyncClient and parses the page in a worker thread so
+    BeautifulSoup does not block the event loop.
+    """
+    url = normalize_url(url)
 
-    except requests.RequestException as e:
-        return {
-            'url': url,
-            'error': f'Failed to fetch website: {str(e)}',
-            'title': None,
-            'meta_description': None,
-            'text_content': ''
-        }
+    try:
+        response = await get_async_http_client().get(url, headers=conditional_headers(cached_page),
+                                                     timeout=fetch_timeout())
+        if response.status_code == 304 and cached_page:
+            return not_modified_page(cached_page)
+        response.raise_for_status()
+        website_data = await asyncio.to_thread(
+            parse_website_content, response.content, url, response.status_code, response.elapsed.total_seconds()
+        )
+        return add_page_validators(website_data, response.headers)
+
+    except httpx.HTTPError as e:
+        return fetch_error(url, e)
 
 
 # ============================================================================
 # CLAUDE API INTEGRATION
 # ============================================================================
 
-def generate_marketing_audit(website_data: Dict[str, Any], industry: str) -> Dict[str, Any]:
+def build_audit_prompt(website_data: Dict[str, Any], industry: str) -> str:
     """
-    Use Claude to generate a comprehensive marketing audit.
+    Build the Claude prompt for a marketing audit.
 
     Args:
         website_data: Data extracted from the website
         industry: The company's industry/sector
 
     Returns:
-        Structured audit findings as a dictionary
+        Prompt text
     """
-    if not API_KEY:
-        raise ValueError("ANTHROPIC_API_KEY not found in environment variables")
-
-    client = anthropic.Anthropic(api_key=API_KEY)
-
-    # Build the analysis prompt
-    prompt = f"""You are a senior marketing consultant conducting a comprehensive marketing audit.
+    return f"""You are a senior marketing consultant conducting a comprehensive marketing audit.
 
 COMPANY INFORMATION:
 - Website: {website_data['url']}
@@ -216,33 +334,89 @@ Please conduct a thorough marketing audit and provide your analysis in the follo
 
 Provide ONLY the JSON output, no additional text. Be specific and actionable in your recommendations."""
 
+
+def parse_audit_response(response_text: str) -> Dict[str, Any]:
+    """
+    Parse Claude's audit response into a dictionary.
+
+    Args:
+        response_text: Raw text of Claude's reply
+
+    Returns:
+        Structured audit findings
+    """
+    # Claude might wrap it in markdown code blocks, so clean that up
+    if '```json' in response_text:
+        response_text = response_text.split('```json')[1].split('```')[0].strip()
+    elif '```' in response_text:
+        response_text = response_text.split('```')[1].split('```')[0].strip()
+
+    try:
+        return json.loads(response_text)
+    except json.JSONDecodeError as e:
+        metrics.record_json_parse_failure('marketing_audit')
+        raise Exception(f"Failed to parse Claude's response as JSON: {str(e)}\nResponse: {response_text}")
+
+
+def generate_marketing_audit(website_data: Dict[str, Any], industry: str) -> Dict[str, Any]:
+    """
+    Use Claude to generate a comprehensive marketing audit.
+
+    Args:
+        website_data: Data extracted from the website
+        industry: The company's industry/sector
+
+    Returns:
+        Structured audit findings as a dictionary
+    """
+    if not API_KEY:
+        raise ValueError("ANTHROPIC_API_KEY not found in environment variables")
+
+    client = get_anthropic_client(API_KEY)
+
+    # Build the analysis prompt
+    prompt = build_audit_prompt(website_data, industry)
+
     try:
         # Call Claude API
-        message = client.messages.create(
-            model=MODEL_NAME,
-            max_tokens=MAX_TOKENS,
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
-        )
+        with metrics.stage_timer('marketing_audit', 'llm'):
+            message = llm_calls.create_message('marketing_audit', client,
+                model=MODEL_NAME,
+                max_tokens=MAX_TOKENS,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ]
+            )
+        metrics.record_tokens('marketing_audit', message.usage)
+
+        # Extract response text and parse JSON from response
+        return parse_audit_response(message.content[0].text)
+
+    except anthropic.APIError as e:
+        raise Exception(f"Anthropic API error: {str(e)}")
 
-        # Extract response text
-        response_text = message.content[0].text
 
-        # Parse JSON from response
-        # Claude might wrap it in markdown code blocks, so clean that up
-        if '```json' in response_text:
-            response_text = response_text.split('```json')[1].split('```')[0].strip()
-        elif '```' in response_text:
-            response_text = response_text.split('```')[1].split('```')[0].strip()
+async def generate_marketing_audit_async(website_data: Dict[str, Any], industry: str) -> Dict[str, Any]:
+    """Async variant of generate_marketing_audit() using the shared AsyncAnthropic client."""
+    if not API_KEY:
+        raise ValueError("ANTHROPIC_API_KEY not found in environment variables")
 
-        audit_data = json.loads(response_text)
-        return audit_data
+    prompt = build_audit_prompt(website_data, industry)
+
+    try:
+        with metrics.stage_timer('marketing_audit', 'llm'):
+            message = await llm_calls.create_message_async('marketing_audit', get_async_anthropic_client(),
+                model=MODEL_NAME,
+                max_tokens=MAX_TOKENS,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ]
+            )
+        metrics.record_tokens('marketing_audit', message.usage)
+        return parse_audit_response(message.content[0].text)
 
     except anthropic.APIError as e:
         raise Exception(f"Anthropic API error: {str(e)}")
-    except json.JSONDecodeError as e:
-        raise Exception(f"Failed to parse Claude's response as JSON: {str(e)}\nResponse: {response_text}")
 
 
 # ============================================================================
@@ -269,12 +443,17 @@ def parse_arguments() -> Optional[Dict[str, str]]:
         type=str,
         help='Company industry/sector (e.g., "SaaS", "E-commerce", "Healthcare")'
     )
+    parser.add_argument(
+        '--force-refresh',
+        action='store_true',
+        help='Ignore cached page content and audits for this URL'
+    )
 
     args = parser.parse_args()
 
     # If both args provided, return them
     if args.url and args.industry:
-        return {'url': args.url, 'industry': args.industry}
+        return {'url': args.url, 'industry': args.industry, 'force_refresh': args.force_refresh}
 
     # If no args, check stdin (for Make.com webhook mode)
     if not sys.stdin.isatty():
@@ -293,7 +472,8 @@ def read_stdin_json() -> Dict[str, str]:
     Read JSON input from stdin (for Make.com webhook integration).
 
     Returns:
-        Dictionary with 'url' and 'industry'
+        Dictionary with 'url', 'industry' and any other request fields
+        (force_refresh, the server's deadline)
     """
     try:
         data = json.load(sys.stdin)
@@ -301,10 +481,7 @@ def read_stdin_json() -> Dict[str, str]:
         if 'url' not in data or 'industry' not in data:
             raise ValueError("JSON must contain 'url' and 'industry' fields")
 
-        return {
-            'url': data['url'],
-            'industry': data['industry']
-        }
+        return data
     except json.JSONDecodeError as e:
         raise ValueError(f"Invalid JSON input: {str(e)}")
 
@@ -332,6 +509,197 @@ def format_output(audit_results: Dict[str, Any], url: str, industry: str) -> Dic
     }
 
 
+# ============================================================================
+# AUDIT CACHE
+# ============================================================================
+
+_page_cache: Optional[ResultCache] = None
+_audit_cache: Optional[ResultCache] = None
+
+
+def get_page_cache() -> ResultCache:
+    """Last fetch of each URL: extracted content plus ETag/Last-Modified."""
+    global _page_cache
+    if _page_cache is None:
+        _page_cache = ResultCache(
+            'audit_pages',
+            ttl_seconds=AUDIT_CACHE_TTL_HOURS * 3600,
+            max_entries=AUDIT_CACHE_MAX_ENTRIES
+        )
+    return _page_cache
+
+
+def get_audit_cache() -> ResultCache:
+    """Audit findings keyed by page content hash and industry."""
+    global _audit_cache
+    if _audit_cache is None:
+        _audit_cache = ResultCache(
+            'audit_results',
+            ttl_seconds=AUDIT_CACHE_TTL_HOURS * 3600,
+            max_entries=AUDIT_CACHE_MAX_ENTRIES
+        )
+    return _audit_cache
+
+
+def audit_cache_key(website_data: Dict[str, Any], industry: str) -> str:
+    return f"{website_data['content_hash']}|{industry.strip().lower()}|{MODEL_NAME}"
+
+
+def add_cache_metadata(report: Dict[str, Any], website_data: Dict[str, Any], status: str) -> Dict[str, Any]:
+    """
+    Record how the audit was produced in audit_metadata.
+
+    Args:
+        status: 'hit' (findings reused for unchanged content), 'miss' (new
+                Claude call) or 'refresh' (force_refresh bypassed the caches)
+    """
+    report['audit_metadata']['cache'] = status
+    report['audit_metadata']['page_not_modified'] = website_data.get('not_modified', False)
+    report['audit_metadata']['content_hash'] = website_data.get('content_hash')
+    return report
+
+
+# Page facts reported when the audit itself can't finish before the deadline
+PARTIAL_PAGE_FIELDS = ('url', 'title', 'meta_description', 'h1_count', 'h1_tags', 'h2_count',
+                       'internal_links_count', 'status_code', 'load_time_seconds', 'error')
+
+
+def partial_report(website_data: Dict[str, Any], url: str, industry: str, status: str,
+                   error: deadline.DeadlineExceeded) -> Dict[str, Any]:
+    """Audit report with the fetched page facts in place of Claude's findings."""
+    findings = {'page_summary': {field: website_data.get(field) for field in PARTIAL_PAGE_FIELDS}}
+    report = add_cache_metadata(format_output(findings, url, industry), website_data, status)
+    return deadline.partial_result('marketing_audit', report, error)
+
+
+# ============================================================================
+# REQUEST HANDLER
+# ============================================================================
+
+@metrics.with_timings
+@deadline.from_input
+def handle_request(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run the full audit pipeline for a single request.
+
+    This is the entry point shared by the CLI/stdin mode below and by
+    server.py, which calls it directly when running tools in-process.
+
+    The fetch is conditional on the previous ETag/Last-Modified, and findings
+    are cached by content hash and industry, so re-auditing an unchanged page
+    costs one 304 (or one fetch) and no Claude call. 'force_refresh' skips both
+    caches.
+
+    With a request deadline (see deadline.py) the fetch and Claude call are
+    sized to the time left, and if the audit can't finish in time the page
+    facts are returned as a partial report.
+
+    Args:
+        params: Dictionary with 'url', 'industry' and optional 'force_refresh'
+
+    Returns:
+        Complete audit report with metadata
+    """
+    if 'url' not in params or 'industry' not in params:
+        raise ValueError("JSON must contain 'url' and 'industry' fields")
+
+    url = params['url']
+    industry = params['industry']
+    force_refresh = is_truthy(params.get('force_refresh', False))
+
+    page_cache = get_page_cache()
+    audit_cache = get_audit_cache()
+    page_key = normalize_url(url)
+    cached_page = None if force_refresh else page_cache.get(page_key)
+
+    # Step 1: Fetch website content
+    print(f"Fetching website content from {url}...", file=sys.stderr)
+    website_data = fetch_website_content(url, cached_page['value'] if cached_page else None)
+
+    if 'error' in website_data:
+        print(f"Warning: {website_data['error']}", file=sys.stderr)
+        print("Continuing with limited data...", file=sys.stderr)
+    elif website_data['not_modified']:
+        print("Page not modified since last fetch", file=sys.stderr)
+    else:
+        page_cache.set(page_key, website_data)
+
+    cacheable = 'error' not in website_data
+    cached_audit = audit_cache.get(audit_cache_key(website_data, industry)) if cacheable and not force_refresh else None
+
+    if cached_audit is not None:
+        print("Page content unchanged, reusing cached audit", file=sys.stderr)
+        return add_cache_metadata(format_output(cached_audit['value'], url, industry), website_data, 'hit')
+
+    # Step 2: Generate audit using Claude
+    print(f"Generating marketing audit for {industry} industry...", file=sys.stderr)
+    status = 'refresh' if force_refresh else 'miss'
+    try:
+        audit_results = generate_marketing_audit(website_data, industry)
+    except deadline.DeadlineExceeded as e:
+        return partial_report(website_data, url, industry, status, e)
+
+    if cacheable:
+        audit_cache.set(audit_cache_key(website_data, industry), audit_results)
+
+    # Step 3: Format output
+    return add_cache_metadata(format_output(audit_results, url, industry), website_data, status)
+
+
+@metrics.with_timings
+@deadline.from_input
+async def handle_request_async(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Async variant of handle_request() used by the ASGI server.
+
+    The website fetch and Claude call are awaited, so one worker process can
+    keep many audits in flight at once.
+    """
+    if 'url' not in params or 'industry' not in params:
+        raise ValueError("JSON must contain 'url' and 'industry' fields")
+
+    url = params['url']
+    industry = params['industry']
+    force_refresh = is_truthy(params.get('force_refresh', False))
+
+    page_cache = get_page_cache()
+    audit_cache = get_audit_cache()
+    page_key = normalize_url(url)
+    cached_page = None if force_refresh else await asyncio.to_thread(page_cache.get, page_key)
+
+    print(f"Fetching website content from {url}...", file=sys.stderr)
+    website_data = await fetch_website_content_async(url, cached_page['value'] if cached_page else None)
+
+    if 'error' in website_data:
+        print(f"Warning: {website_data['error']}", file=sys.stderr)
+        print("Continuing with limited data...", file=sys.stderr)
+    elif website_data['not_modified']:
+        print("Page not modified since last fetch", file=sys.stderr)
+    else:
+        await asyncio.to_thread(page_cache.set, page_key, website_data)
+
+    cacheable = 'error' not in website_data
+    cached_audit = None
+    if cacheable and not force_refresh:
+        cached_audit = await asyncio.to_thread(audit_cache.get, audit_cache_key(website_data, industry))
+
+    if cached_audit is not None:
+        print("Page content unchanged, reusing cached audit", file=sys.stderr)
+        return add_cache_metadata(format_output(cached_audit['value'], url, industry), website_data, 'hit')
+
+    print(f"Generating marketing audit for {industry} industry...", file=sys.stderr)
+    status = 'refresh' if force_refresh else 'miss'
+    try:
+        audit_results = await generate_marketing_audit_async(website_data, industry)
+    except deadline.DeadlineExceeded as e:
+        return partial_report(website_data, url, industry, status, e)
+
+    if cacheable:
+        await asyncio.to_thread(audit_cache.set, audit_cache_key(website_data, industry), audit_results)
+
+    return add_cache_metadata(format_output(audit_results, url, industry), website_data, status)
+
+
 # ============================================================================
 # MAIN EXECUTION
 # ============================================================================
@@ -348,26 +716,11 @@ def main():
             # Read from stdin (Make.com mode)
             params = read_stdin_json()
 
-        url = params['url']
-        industry = params['industry']
-
-        # Step 2: Fetch website content
-        print(f"Fetching website content from {url}...", file=sys.stderr)
-        website_data = fetch_website_content(url)
-
-        if 'error' in website_data:
-            print(f"Warning: {website_data['error']}", file=sys.stderr)
-            print("Continuing with limited data...", file=sys.stderr)
-
-        # Step 3: Generate audit using Claude
-        print(f"Generating marketing audit for {industry} industry...", file=sys.stderr)
-        audit_results = generate_marketing_audit(website_data, industry)
-
-        # Step 4: Format output
-        final_output = format_output(audit_results, url, industry)
+        # Step 2: Run the audit pipeline
+        final_output = handle_request(params)
 
-        # Step 5: Output JSON to stdout
-        print(json.dumps(final_output, indent=2))
+        # Step 3: Output JSON to stdout
+        fast_json.write_output(final_output)
 
         print("\n✓ Audit completed successfully!", file=sys.stderr)
 
@@ -14,7 +14,6 @@ Usage:
         echo '{"keyword": "education", "session": "2025"}' | python maryland_bill_tracker.py
 """
 
-import anthropic
 import argparse
 import json
 import os
@@ -25,6 +24,9 @@ from datetime import datetime
 from typing import Dict, List, Optional
 from dotenv import load_dotenv
 
+from shared_clients import get_anthropic_client
+import llm_calls
+
 # Load environment variables
 load_dotenv()
 
@@ -45,7 +47,7 @@ class MarylandBillTracker:
     def __init__(self):
         if not ANTHROPIC_API_KEY:
             raise ValueError("ANTHROPIC_API_KEY environment variable not set")
-        self.client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
+        self.client = get_anthropic_client(ANTHROPIC_API_KEY)
 
     def search_bills(self,
                     bill_number: Optional[str] = None,
@@ -212,7 +214,7 @@ Please provide:
 Provide analysis in structured JSON format."""
 
         try:
-            message = self.client.messages.create(
+            message = llm_calls.create_message("maryland_bill_tracker", self.client,
                 model=MODEL_NAME,
                 max_tokens=MAX_TOKENS,
                 messages=[{
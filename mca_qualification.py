@@ -11,7 +11,12 @@ import argparse
 from datetime import datetime
 from typing import Dict, Any, Optional
 from dotenv import load_dotenv
-import anthropic
+
+from shared_clients import get_anthropic_client, get_async_anthropic_client
+import deadline
+import fast_json
+import llm_calls
+import metrics
 
 # Load environment variables
 load_dotenv()
@@ -32,6 +37,7 @@ def log_progress(message: str):
     print(f"[MCA] {message}", file=sys.stderr)
 
 
+@metrics.timed("mca_qualification", "validate")
 def validate_inputs(data: Dict[str, Any]) -> tuple[bool, Optional[str]]:
     """Validate required inputs and ranges"""
     required_fields = ["company_name", "annual_revenue", "credit_score", "business_age_months"]
@@ -72,7 +78,7 @@ def validate_inputs(data: Dict[str, Any]) -> tuple[bool, Optional[str]]:
     return True, None
 
 
-def qualify_mca(
+def build_application(
     company_name: str,
     annual_revenue: float,
     credit_score: int,
@@ -82,38 +88,34 @@ def qualify_mca(
     existing_debt: Optional[float] = None,
     notes: Optional[str] = None
 ) -> Dict[str, Any]:
-    """
-    Qualify a business for Merchant Cash Advance
-
-    Returns structured qualification decision with AI-powered analysis
-    """
-
-    if not ANTHROPIC_API_KEY:
-        raise ValueError("ANTHROPIC_API_KEY not found in environment")
-
-    log_progress(f"Qualifying: {company_name}")
-    log_progress(f"Revenue: ${annual_revenue:,.0f} | Credit: {credit_score} | Age: {business_age_months}mo")
-
-    # Initialize Anthropic client
-    client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
+    """Collect application fields and derived metrics used by the prompt and output"""
+    return {
+        "company_name": company_name,
+        "industry": industry,
+        "annual_revenue": annual_revenue,
+        "monthly_revenue_avg": monthly_revenue if monthly_revenue else annual_revenue / 12,
+        "credit_score": credit_score,
+        "business_age_months": business_age_months,
+        "existing_debt": existing_debt or 0,
+        "debt_to_revenue_ratio": (existing_debt / annual_revenue * 100) if existing_debt else 0,
+        "notes": notes
+    }
 
-    # Calculate derived metrics
-    monthly_avg = monthly_revenue if monthly_revenue else annual_revenue / 12
-    debt_ratio = (existing_debt / annual_revenue * 100) if existing_debt else 0
 
-    # Build qualification prompt
-    qualification_prompt = f"""You are an MCA (Merchant Cash Advance) underwriter. Analyze this business application and provide a qualification decision.
+def build_qualification_prompt(application: Dict[str, Any]) -> str:
+    """Build the underwriting prompt for Claude"""
+    return f"""You are an MCA (Merchant Cash Advance) underwriter. Analyze this business application and provide a qualification decision.
 
 APPLICANT INFORMATION:
-- Company Name: {company_name}
-- Industry: {industry}
-- Annual Revenue: ${annual_revenue:,.2f}
-- Monthly Revenue (avg): ${monthly_avg:,.2f}
-- Credit Score: {credit_score}
-- Business Age: {business_age_months} months ({business_age_months/12:.1f} years)
-- Existing Debt: ${existing_debt:,.2f if existing_debt else 0}
-- Debt-to-Revenue Ratio: {debt_ratio:.1f}%
-{f"- Additional Notes: {notes}" if notes else ""}
+- Company Name: {application['company_name']}
+- Industry: {application['industry']}
+- Annual Revenue: ${application['annual_revenue']:,.2f}
+- Monthly Revenue (avg): ${application['monthly_revenue_avg']:,.2f}
+- Credit Score: {application['credit_score']}
+- Business Age: {application['business_age_months']} months ({application['business_age_months']/12:.1f} years)
+- Existing Debt: ${application['existing_debt']:,.2f}
+- Debt-to-Revenue Ratio: {application['debt_to_revenue_ratio']:.1f}%
+{f"- Additional Notes: {application['notes']}" if application['notes'] else ""}
 
 QUALIFICATION CRITERIA:
 - Minimum Revenue: ${MIN_REVENUE:,}/year
@@ -157,54 +159,45 @@ GUIDELINES:
 
 Provide ONLY the JSON output, no other text."""
 
-    log_progress("Analyzing qualification with AI...")
 
-    # Call Claude API
-    try:
-        message = client.messages.create(
-            model=MODEL_NAME,
-            max_tokens=MAX_TOKENS,
-            messages=[{
-                "role": "user",
-                "content": qualification_prompt
-            }]
-        )
+def parse_qualification_response(response_text: str) -> Dict[str, Any]:
+    """Parse Claude's qualification JSON, removing markdown code blocks if present"""
+    response_text = response_text.strip()
 
-        # Extract and parse response
-        response_text = message.content[0].text.strip()
+    if response_text.startswith("```json"):
+        response_text = response_text[7:]
+    if response_text.startswith("```"):
+        response_text = response_text[3:]
+    if response_text.endswith("```"):
+        response_text = response_text[:-3]
 
-        # Remove markdown code blocks if present
-        if response_text.startswith("```json"):
-            response_text = response_text[7:]
-        if response_text.startswith("```"):
-            response_text = response_text[3:]
-        if response_text.endswith("```"):
-            response_text = response_text[:-3]
+    try:
+        return json.loads(response_text.strip())
+    except json.JSONDecodeError:
+        metrics.record_json_parse_failure("mca_qualification")
+        raise
 
-        qualification_data = json.loads(response_text.strip())
 
-    except json.JSONDecodeError as e:
-        log_progress(f"Failed to parse AI response: {e}")
-        raise
-    except Exception as e:
-        log_progress(f"API call failed: {e}")
-        raise
+def build_qualification_output(application: Dict[str, Any], qualification_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Wrap the AI decision with application data and the compliance log"""
+    annual_revenue = application["annual_revenue"]
+    credit_score = application["credit_score"]
+    business_age_months = application["business_age_months"]
 
-    # Build complete output
     output = {
         "qualification_metadata": {
             "timestamp": datetime.utcnow().isoformat() + "Z",
-            "company_name": company_name,
-            "industry": industry,
+            "company_name": application["company_name"],
+            "industry": application["industry"],
             "model_used": MODEL_NAME
         },
         "application_data": {
             "annual_revenue": annual_revenue,
-            "monthly_revenue_avg": monthly_avg,
+            "monthly_revenue_avg": application["monthly_revenue_avg"],
             "credit_score": credit_score,
             "business_age_months": business_age_months,
-            "existing_debt": existing_debt or 0,
-            "debt_to_revenue_ratio": round(debt_ratio, 2)
+            "existing_debt": application["existing_debt"],
+            "debt_to_revenue_ratio": round(application["debt_to_revenue_ratio"], 2)
         },
         "qualification_result": qualification_data,
         "compliance_log": {
@@ -223,6 +216,182 @@ Provide ONLY the JSON output, no other text."""
     return output
 
 
+def partial_qualification(application: Dict[str, Any], error: deadline.DeadlineExceeded) -> Dict[str, Any]:
+    """Threshold checks only, for when the AI analysis can't finish before the request deadline"""
+    red_flags = []
+    if application["annual_revenue"] < MIN_REVENUE:
+        red_flags.append(f"Annual revenue below ${MIN_REVENUE:,}")
+    if application["credit_score"] < MIN_CREDIT_SCORE:
+        red_flags.append(f"Credit score below {MIN_CREDIT_SCORE}")
+    if application["business_age_months"] < MIN_BUSINESS_AGE_MONTHS:
+        red_flags.append(f"Business younger than {MIN_BUSINESS_AGE_MONTHS} months")
+
+    qualification_data = {
+        "decision": "PENDING_REVIEW",
+        "risk_level": "unknown",
+        "red_flags": red_flags,
+        "underwriter_notes": "AI analysis did not finish in time; only the minimum thresholds were checked."
+    }
+    return deadline.partial_result("mca_qualification", build_qualification_output(application, qualification_data), error)
+
+
+def qualify_mca(
+    company_name: str,
+    annual_revenue: float,
+    credit_score: int,
+    business_age_months: int,
+    industry: str = "General Business",
+    monthly_revenue: Optional[float] = None,
+    existing_debt: Optional[float] = None,
+    notes: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Qualify a business for Merchant Cash Advance
+
+    Returns structured qualification decision with AI-powered analysis
+    """
+
+    if not ANTHROPIC_API_KEY:
+        raise ValueError("ANTHROPIC_API_KEY not found in environment")
+
+    log_progress(f"Qualifying: {company_name}")
+    log_progress(f"Revenue: ${annual_revenue:,.0f} | Credit: {credit_score} | Age: {business_age_months}mo")
+
+    # Shared, pooled Anthropic client
+    client = get_anthropic_client(ANTHROPIC_API_KEY)
+
+    # Build qualification prompt
+    application = build_application(
+        company_name, annual_revenue, credit_score, business_age_months,
+        industry, monthly_revenue, existing_debt, notes
+    )
+    qualification_prompt = build_qualification_prompt(application)
+
+    log_progress("Analyzing qualification with AI...")
+
+    # Call Claude API
+    try:
+        with metrics.stage_timer("mca_qualification", "llm"):
+            message = llm_calls.create_message("mca_qualification", client,
+                model=MODEL_NAME,
+                max_tokens=MAX_TOKENS,
+                messages=[{
+                    "role": "user",
+                    "content": qualification_prompt
+                }]
+            )
+        metrics.record_tokens("mca_qualification", message.usage)
+
+        # Extract and parse response
+        qualification_data = parse_qualification_response(message.content[0].text)
+
+    except deadline.DeadlineExceeded as e:
+        return partial_qualification(application, e)
+    except json.JSONDecodeError as e:
+        log_progress(f"Failed to parse AI response: {e}")
+        raise
+    except Exception as e:
+        log_progress(f"API call failed: {e}")
+        raise
+
+    # Build complete output
+    return build_qualification_output(application, qualification_data)
+
+
+async def qualify_mca_async(
+    company_name: str,
+    annual_revenue: float,
+    credit_score: int,
+    business_age_months: int,
+    industry: str = "General Business",
+    monthly_revenue: Optional[float] = None,
+    existing_debt: Optional[float] = None,
+    notes: Optional[str] = None
+) -> Dict[str, Any]:
+    """Async variant of qualify_mca() using the shared AsyncAnthropic client"""
+
+    if not ANTHROPIC_API_KEY:
+        raise ValueError("ANTHROPIC_API_KEY not found in environment")
+
+    log_progress(f"Qualifying: {company_name}")
+
+    application = build_application(
+        company_name, annual_revenue, credit_score, business_age_months,
+        industry, monthly_revenue, existing_debt, notes
+    )
+    qualification_prompt = build_qualification_prompt(application)
+
+    try:
+        with metrics.stage_timer("mca_qualification", "llm"):
+            message = await llm_calls.create_message_async("mca_qualification", get_async_anthropic_client(),
+                model=MODEL_NAME,
+                max_tokens=MAX_TOKENS,
+                messages=[{
+                    "role": "user",
+                    "content": qualification_prompt
+                }]
+            )
+        metrics.record_tokens("mca_qualification", message.usage)
+        qualification_data = parse_qualification_response(message.content[0].text)
+
+    except deadline.DeadlineExceeded as e:
+        return partial_qualification(application, e)
+    except json.JSONDecodeError as e:
+        log_progress(f"Failed to parse AI response: {e}")
+        raise
+    except Exception as e:
+        log_progress(f"API call failed: {e}")
+        raise
+
+    return build_qualification_output(application, qualification_data)
+
+
+@metrics.with_timings
+@deadline.from_input
+def handle_request(input_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validate a JSON application and run the qualification.
+
+    Shared by the stdin mode below and by server.py, which calls it directly
+    when running tools in-process. Raises ValueError on invalid input.
+    A request deadline in '_deadline' bounds the Claude call (see deadline.py).
+    """
+    is_valid, error_msg = validate_inputs(input_data)
+    if not is_valid:
+        raise ValueError(error_msg)
+
+    return qualify_mca(
+        company_name=input_data["company_name"],
+        annual_revenue=float(input_data["annual_revenue"]),
+        credit_score=int(input_data["credit_score"]),
+        business_age_months=int(input_data["business_age_months"]),
+        industry=input_data.get("industry", "General Business"),
+        monthly_revenue=input_data.get("monthly_revenue"),
+        existing_debt=input_data.get("existing_debt"),
+        notes=input_data.get("notes")
+    )
+
+
+@metrics.with_timings
+@deadline.from_input
+async def handle_request_async(input_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Async variant of handle_request() used by the ASGI server"""
+    is_valid, error_msg = validate_inputs(input_data)
+    if not is_valid:
+        raise ValueError(error_msg)
+
+    return await qualify_mca_async(
+        company_name=input_data["company_name"],
+        annual_revenue=float(input_data["annual_revenue"]),
+        credit_score=int(input_data["credit_score"]),
+        business_age_months=int(input_data["business_age_months"]),
+        industry=input_data.get("industry", "General Business"),
+        monthly_revenue=input_data.get("monthly_revenue"),
+        existing_debt=input_data.get("existing_debt"),
+        notes=input_data.get("notes")
+    )
+
+
 def main():
     """Main entry point - supports both CLI args and JSON stdin"""
 
@@ -238,37 +407,28 @@ def main():
                     "error": error_msg,
                     "timestamp": datetime.utcnow().isoformat() + "Z"
                 }
-                print(json.dumps(error_output, indent=2))
+                fast_json.write_output(error_output)
                 sys.exit(1)
 
             # Run qualification
-            result = qualify_mca(
-                company_name=input_data["company_name"],
-                annual_revenue=float(input_data["annual_revenue"]),
-                credit_score=int(input_data["credit_score"]),
-                business_age_months=int(input_data["business_age_months"]),
-                industry=input_data.get("industry", "General Business"),
-                monthly_revenue=input_data.get("monthly_revenue"),
-                existing_debt=input_data.get("existing_debt"),
-                notes=input_data.get("notes")
-            )
+            result = handle_request(input_data)
 
             # Output JSON to stdout
-            print(json.dumps(result, indent=2))
+            fast_json.write_output(result)
 
         except json.JSONDecodeError:
             error_output = {
                 "error": "Invalid JSON input",
                 "timestamp": datetime.utcnow().isoformat() + "Z"
             }
-            print(json.dumps(error_output, indent=2))
+            fast_json.write_output(error_output)
             sys.exit(1)
         except Exception as e:
             error_output = {
                 "error": str(e),
                 "timestamp": datetime.utcnow().isoformat() + "Z"
             }
-            print(json.dumps(error_output, indent=2))
+            fast_json.write_output(error_output)
             sys.exit(1)
 
     else:
@@ -312,7 +472,7 @@ def main():
                 notes=args.notes
             )
 
-            print(json.dumps(result, indent=2))
+            fast_json.write_output(result)
 
         except Exception as e:
             print(f"ERROR: {e}", file=sys.stderr)
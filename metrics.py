@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Prometheus Metrics
+==================
+Request, stage and token metrics for the API servers and the tools they run.
+
+Metric families:
+    http_requests_total{endpoint, method, status}        - Requests served
+    http_request_duration_seconds{endpoint}              - Time to response headers
+    tool_stage_duration_seconds{tool, stage}             - Time per pipeline stage
+                                                           (queue, spawn, fetch, llm, ...)
+    anthropic_tokens_total{tool, type}                   - Tokens by type: input, output and
+                                                           prompt-cache cache_read / cache_write
+    tool_timeouts_total{tool}                            - Tool calls that hit their timeout (504)
+    json_parse_failures_total{tool}                      - Claude replies that were not valid JSON
+    admission_rejections_total{endpoint, reason}         - Requests shed with 429 (see admission.py)
+    admission_queue_wait_seconds{endpoint}               - Time admitted requests waited for a slot
+    anthropic_governor_wait_seconds{limited_by}          - Time Anthropic calls waited for rate budget
+                                                           (see rate_governor.py)
+    anthropic_governor_rejections_total{limited_by}      - Calls failed locally instead of waiting
+    llm_retries_total{tool, error}                       - Anthropic calls retried (see llm_calls.py)
+    llm_hedges_total{tool, winner}                       - Hedged calls by which request won
+    tool_partial_results_total{tool}                     - Partial results returned at the request
+                                                           deadline (see deadline.py)
+
+The same stage timers also fill the 'timings' block (milliseconds) that every
+tool response carries, so one slow request can be diagnosed from its own
+response:
+
+    "timings": {"fetch_ms": 412.3, "parse_ms": 35.1, "llm_ms": 8120.7,
+                "total_ms": 8571.0, "queue_ms": 2.4, "server_total_ms": 8573.4}
+
+Stages nest where the functions do (lead_enrichment's fetch_ms includes
+parse_ms, which includes detect_technologies_ms). queue_ms / spawn_ms and
+server_total_ms are added by the server.
+
+Under gunicorn every worker (and every tool subprocess or warm pool worker)
+writes to its own files in PROMETHEUS_MULTIPROC_DIR, and /metrics merges them,
+so any worker can serve the totals. gunicorn.conf.py sets the directory up.
+Short-lived tool subprocesses (EXECUTION_MODE=subprocess) would leave a set
+of pid-named files behind per request, so each one instead runs with a
+metrics slot (child_process_env) that it reuses from an earlier subprocess
+that has exited: its counts add to that slot's files, and the directory grows
+with the peak number of concurrent subprocesses, not with requests.
+
+prometheus_client is optional: without it every helper here is a no-op, so
+the tools still run standalone.
+"""
+
+import os
+import time
+import itertools
+import functools
+import inspect
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    from prometheus_client import (
+        CollectorRegistry, Counter, Histogram, CONTENT_TYPE_LATEST, generate_latest, multiprocess
+    )
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+# Set by child_process_env(): the metrics files a tool subprocess writes to
+METRICS_SLOT_ENV = 'METRICS_SLOT'
+
+if PROMETHEUS_AVAILABLE and os.environ.get('PROMETHEUS_MULTIPROC_DIR') and os.environ.get(METRICS_SLOT_ENV):
+    from prometheus_client import values
+    # Only one running process holds a slot at a time, as the multiprocess files require
+    values.ValueClass = values.MultiProcessValue(lambda: os.environ[METRICS_SLOT_ENV])
+
+# Tool calls range from a few ms (cache hits) to minutes (audits)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 90, 120, 180)
+
+if PROMETHEUS_AVAILABLE:
+    HTTP_REQUESTS = Counter(
+        'http_requests_total', 'HTTP requests served', ['endpoint', 'method', 'status']
+    )
+    HTTP_LATENCY = Histogram(
+        'http_request_duration_seconds', 'Time from request to response headers', ['endpoint'],
+        buckets=LATENCY_BUCKETS
+    )
+    STAGE_LATENCY = Histogram(
+        'tool_stage_duration_seconds', 'Time spent in each tool pipeline stage', ['tool', 'stage'],
+        buckets=LATENCY_BUCKETS
+    )
+    TOKENS = Counter(
+        'anthropic_tokens_total', 'Anthropic tokens used', ['tool', 'type']
+    )
+    TIMEOUTS = Counter(
+        'tool_timeouts_total', 'Tool calls that exceeded their timeout', ['tool']
+    )
+    JSON_PARSE_FAILURES = Counter(
+        'json_parse_failures_total', "Claude responses that could not be parsed as JSON", ['tool']
+    )
+    ADMISSION_REJECTIONS = Counter(
+        'admission_rejections_total', 'Requests rejected by admission control', ['endpoint', 'reason']
+    )
+    ADMISSION_WAIT = Histogram(
+        'admission_queue_wait_seconds', 'Time admitted requests waited in the admission queue', ['endpoint'],
+        buckets=LATENCY_BUCKETS
+    )
+    GOVERNOR_WAIT = Histogram(
+        'anthropic_governor_wait_seconds', 'Time Anthropic calls waited for RPM/ITPM budget', ['limited_by'],
+        buckets=(0,) + LATENCY_BUCKETS
+    )
+    GOVERNOR_REJECTIONS = Counter(
+        'anthropic_governor_rejections_total', 'Anthropic calls that would have waited too long for budget',
+        ['limited_by']
+    )
+    LLM_RETRIES = Counter(
+        'llm_retries_total', 'Anthropic calls retried after a transient error', ['tool', 'error']
+    )
+    LLM_HEDGES = Counter(
+        'llm_hedges_total', 'Hedge requests sent, by which request finished first', ['tool', 'winner']
+    )
+    PARTIAL_RESULTS = Counter(
+        'tool_partial_results_total', 'Tool calls that returned a partial result at their deadline', ['tool']
+    )
+
+
+# Stage durations (ms) of the tool call running in this context, if any
+_current_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar('tool_timings', default=None)
+
+
+def tool_label(script_name: str) -> str:
+    """'lead_enrichment.py' -> 'lead_enrichment'."""
+    return script_name[:-3] if script_name.endswith('.py') else script_name
+
+
+def to_ms(seconds: float) -> float:
+    return round(seconds * 1000, 1)
+
+
+# ============================================================================
+# RECORDING
+# ============================================================================
+
+def observe_request(endpoint: str, method: str, status: int, seconds: float) -> None:
+    if PROMETHEUS_AVAILABLE:
+        HTTP_REQUESTS.labels(endpoint, method, str(status)).inc()
+        HTTP_LATENCY.labels(endpoint).observe(seconds)
+
+
+def observe_admission(endpoint: str, waited_seconds: float, rejected_reason: Optional[str] = None) -> None:
+    if PROMETHEUS_AVAILABLE:
+        if rejected_reason:
+            ADMISSION_REJECTIONS.labels(endpoint, rejected_reason).inc()
+        else:
+            ADMISSION_WAIT.labels(endpoint).observe(waited_seconds)
+
+
+def observe_stage(tool: str, stage: str, seconds: float, timings: Optional[Dict[str, float]] = None) -> None:
+    """
+    Record one stage duration in the histogram and in the timings block of the
+    current tool call (or the one passed in); repeated stages add up.
+    """
+    if PROMETHEUS_AVAILABLE:
+        STAGE_LATENCY.labels(tool, stage).observe(seconds)
+
+    if timings is None:
+        timings = _current_timings.get()
+    if timings is not None:
+        key = f'{stage}_ms'
+        timings[key] = round(timings.get(key, 0.0) + seconds * 1000, 1)
+
+
+@contextmanager
+def stage_timer(tool: str, stage: str, timings: Optional[Dict[str, float]] = None) -> Iterator[None]:
+    """Time a block as one stage of a tool's pipeline (recorded even if it raises)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(tool, stage, time.perf_counter() - started, timings)
+
+
+def timed(tool: str, stage: str) -> Callable:
+    """Decorator form of stage_timer() for sync and async functions."""
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with stage_timer(tool, stage):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage_timer(tool, stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def collect_timings() -> Iterator[Dict[str, float]]:
+    """Collect the stages timed inside the block (this thread or task) into a dict."""
+    timings: Dict[str, float] = {}
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+def with_timings(fn: Callable) -> Callable:
+    """
+    Decorator for tool entry points: returns fn's result dict with a 'timings'
+    block of every stage timed during the call plus total_ms.
+    """
+    def attach(result, timings, started):
+        if not isinstance(result, dict):
+            return result
+        timings['total_ms'] = to_ms(time.perf_counter() - started)
+        return {**result, 'timings': timings}
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            with collect_timings() as timings:
+                result = await fn(*args, **kwargs)
+            return attach(result, timings, started)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        with collect_timings() as timings:
+            result = fn(*args, **kwargs)
+        return attach(result, timings, started)
+    return wrapper
+
+
+def add_overhead(tool: str, stage: str, result: Any, wall_seconds: float) -> None:
+    """
+    Server side: record the part of a tool call spent outside the tool itself
+    (wall time minus the tool's total_ms) as 'queue' or 'spawn', and add it and
+    server_total_ms to the result's timings block.
+    """
+    timings = result.get('timings') if isinstance(result, dict) else None
+    if not isinstance(timings, dict) or 'total_ms' not in timings:
+        return
+    overhead = max(0.0, wall_seconds - timings['total_ms'] / 1000)
+    observe_stage(tool, stage, overhead, timings)
+    timings['server_total_ms'] = to_ms(wall_seconds)
+
+
+def usage_summary(usage: Any) -> Dict[str, int]:
+    """
+    Token counts from an Anthropic response's usage block. input_tokens
+    excludes prompt-cache reads (cache_read_input_tokens) and writes
+    (cache_creation_input_tokens).
+    """
+    return {
+        'input_tokens': getattr(usage, 'input_tokens', 0) or 0,
+        'output_tokens': getattr(usage, 'output_tokens', 0) or 0,
+        'cache_read_input_tokens': getattr(usage, 'cache_read_input_tokens', 0) or 0,
+        'cache_creation_input_tokens': getattr(usage, 'cache_creation_input_tokens', 0) or 0
+    }
+
+
+def record_tokens(tool: str, usage: Any) -> None:
+    """Count tokens from an Anthropic response's usage block."""
+    if PROMETHEUS_AVAILABLE and usage is not None:
+        counts = usage_summary(usage)
+        TOKENS.labels(tool, 'input').inc(counts['input_tokens'])
+        TOKENS.labels(tool, 'output').inc(counts['output_tokens'])
+        TOKENS.labels(tool, 'cache_read').inc(counts['cache_read_input_tokens'])
+        TOKENS.labels(tool, 'cache_write').inc(counts['cache_creation_input_tokens'])
+
+
+def observe_governor_wait(seconds: float, limited_by: str) -> None:
+    """Record a rate-governor wait, adding it to the current tool call's timings as rate_limit_wait_ms."""
+    if PROMETHEUS_AVAILABLE:
+        GOVERNOR_WAIT.labels(limited_by).observe(seconds)
+    timings = _current_timings.get()
+    if timings is not None and seconds > 0:
+        timings['rate_limit_wait_ms'] = round(timings.get('rate_limit_wait_ms', 0.0) + seconds * 1000, 1)
+
+
+def record_governor_rejection(limited_by: str) -> None:
+    if PROMETHEUS_AVAILABLE:
+        GOVERNOR_REJECTIONS.labels(limited_by).inc()
+
+
+def record_llm_retry(tool: str, error: str) -> None:
+    if PROMETHEUS_AVAILABLE:
+        LLM_RETRIES.labels(tool, error).inc()
+
+
+def record_llm_hedge(tool: str, winner: str) -> None:
+    if PROMETHEUS_AVAILABLE:
+        LLM_HEDGES.labels(tool, winner).inc()
+
+
+def record_timeout(tool: str) -> None:
+    if PROMETHEUS_AVAILABLE:
+        TIMEOUTS.labels(tool).inc()
+
+
+def record_partial_result(tool: str) -> None:
+    if PROMETHEUS_AVAILABLE:
+        PARTIAL_RESULTS.labels(tool).inc()
+
+
+def record_json_parse_failure(tool: str) -> None:
+    if PROMETHEUS_AVAILABLE:
+        JSON_PARSE_FAILURES.labels(tool).inc()
+
+
+# ============================================================================
+# EXPOSITION
+# ============================================================================
+
+def render_latest() -> Tuple[bytes, str]:
+    """
+    Prometheus text exposition for /metrics.
+
+    Returns:
+        Tuple of (body, content_type)
+    """
+    if not PROMETHEUS_AVAILABLE:
+        return b'# prometheus_client is not installed\n', 'text/plain; version=0.0.4; charset=utf-8'
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
+    from prometheus_client import REGISTRY
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+_free_slots: List[int] = []
+_slot_counter = itertools.count()
+_slots_lock = threading.Lock()
+
+
+@contextmanager
+def child_process_env() -> Iterator[Dict[str, str]]:
+    """
+    Environment for a short-lived tool subprocess. Under multiprocess metrics
+    it carries a slot no other running subprocess of this process holds;
+    the subprocess must have exited when the block ends.
+    """
+    if not (PROMETHEUS_AVAILABLE and os.environ.get('PROMETHEUS_MULTIPROC_DIR')):
+        yield dict(os.environ)
+        return
+    with _slots_lock:
+        slot = _free_slots.pop() if _free_slots else next(_slot_counter)
+    try:
+        yield {**os.environ, METRICS_SLOT_ENV: f'{os.getpid()}-subprocess{slot}'}
+    finally:
+        with _slots_lock:
+            _free_slots.append(slot)
+
+
+def mark_process_dead(pid: int) -> None:
+    """Tell the multiprocess collector a worker exited (gunicorn child_exit hook)."""
+    if PROMETHEUS_AVAILABLE and os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Anthropic Rate Governor
+=======================
+Keeps our own Anthropic traffic under the org's requests-per-minute and input
+tokens-per-minute limits, so a burst waits a little on our side instead of
+failing with upstream 429s.
+
+Each limit is a token bucket that refills continuously at limit/60 per second
+and holds up to GOVERNOR_BURST_SECONDS worth of budget. Buckets live in one
+SQLite file (GOVERNOR_DB_PATH) shared by every gunicorn worker, tool subprocess
+and pool worker on the host. Before each Messages API call the governor
+estimates its input tokens from the request body and reserves one request plus
+that many tokens in a single transaction. If a bucket is short, the caller
+sleeps until its reservation is due. Reservations queue in order, so a burst is
+spread out rather than retried.
+
+A call whose reservation would be due more than GOVERNOR_MAX_WAIT_SECONDS away
+is not sent. It fails locally with a 429 rate_limit_error, which the SDK does
+not retry. If Anthropic answers 429 anyway (another service sharing the key,
+for example), its Retry-After pauses every caller on the host.
+
+With a request deadline bound (deadline.py), a call never waits past it: if
+its reservation would be due after the deadline, nothing is reserved and the
+transport raises DeadlineExceeded, which llm_calls.py passes to the tool so it
+can return a partial result.
+
+Requests carrying the X-Rate-Governor-No-Wait header (llm_calls.py sets it
+on hedge requests) are only sent if budget is available right now.
+
+GovernorTransport wraps the Anthropic clients in shared_clients.py, so every
+tool is covered without changes. The governor is off unless ANTHROPIC_RPM_LIMIT
+or ANTHROPIC_ITPM_LIMIT is set.
+"""
+
+import os
+import json
+import math
+import time
+import asyncio
+import logging
+import sqlite3
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+import httpx
+
+import deadline
+import metrics
+import request_log
+from sqlite_store import connect, init_db
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+ANTHROPIC_RPM_LIMIT = float(os.getenv('ANTHROPIC_RPM_LIMIT', '0'))
+ANTHROPIC_ITPM_LIMIT = float(os.getenv('ANTHROPIC_ITPM_LIMIT', '0'))
+GOVERNOR_BURST_SECONDS = float(os.getenv('GOVERNOR_BURST_SECONDS', '10'))
+GOVERNOR_MAX_WAIT_SECONDS = float(os.getenv('GOVERNOR_MAX_WAIT_SECONDS', '60'))
+GOVERNOR_DB_PATH = os.getenv('GOVERNOR_DB_PATH', os.path.join(SCRIPT_DIR, 'governor.db'))
+
+# Rough English-text ratio; the real count comes back in usage after the call
+CHARS_PER_TOKEN = 4
+
+# Per-message framing the API adds on top of the text
+MESSAGE_OVERHEAD_TOKENS = 4
+
+LIMITED_PATH = '/v1/messages'
+
+# Request header (stripped before sending) for calls that must not wait for budget
+NO_WAIT_HEADER = 'X-Rate-Governor-No-Wait'
+
+
+def enabled() -> bool:
+    return ANTHROPIC_RPM_LIMIT > 0 or ANTHROPIC_ITPM_LIMIT > 0
+
+
+def estimate_input_tokens(body: Dict[str, Any]) -> int:
+    """Estimate a Messages API request's input tokens from its system prompt, messages and tools."""
+    def text_of(content: Any) -> str:
+        if isinstance(content, str):
+            return content
+        if isinstance(content, list):
+            return ''.join(text_of(block.get('text', block.get('content', '')))
+                           if isinstance(block, dict) else str(block) for block in content)
+        return ''
+
+    chars = len(text_of(body.get('system', '')))
+    messages = body.get('messages', [])
+    chars += sum(len(text_of(message.get('content', ''))) for message in messages)
+    if body.get('tools'):
+        chars += len(json.dumps(body['tools']))
+    return math.ceil(chars / CHARS_PER_TOKEN) + MESSAGE_OVERHEAD_TOKENS * (len(messages) + 1)
+
+
+# ============================================================================
+# SHARED TOKEN BUCKETS
+# ============================================================================
+
+class TokenBucketGovernor:
+    """Per-minute budgets as token buckets in a local SQLite database (see sqlite_store.py)."""
+
+    def __init__(self, per_minute: Dict[str, float], path: str = GOVERNOR_DB_PATH,
+                 burst_seconds: float = GOVERNOR_BURST_SECONDS, max_wait: float = GOVERNOR_MAX_WAIT_SECONDS):
+        self.rates = {name: limit / 60 for name, limit in per_minute.items() if limit > 0}
+        self.capacity = {name: rate * burst_seconds for name, rate in self.rates.items()}
+        self.path = path
+        self.max_wait = max_wait
+
+        init_db(self.path, """
+            CREATE TABLE IF NOT EXISTS governor_buckets (
+                name TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+        """)
+        with connect(self.path) as conn:
+            for name, capacity in self.capacity.items():
+                conn.execute('INSERT OR IGNORE INTO governor_buckets (name, tokens, updated_at) VALUES (?, ?, ?)',
+                             (name, capacity, time.time()))
+
+    def reserve(self, costs: Dict[str, float], max_wait: Optional[float] = None) -> Tuple[Optional[float], Optional[str]]:
+        """
+        Take costs out of the buckets, going into debt if they are short.
+
+        Returns:
+            (seconds_to_wait, limiting_bucket). seconds_to_wait is None when the
+            wait would exceed max_wait (default: the governor's), in which case
+            nothing was reserved.
+        """
+        max_wait = self.max_wait if max_wait is None else max_wait
+        now = time.time()
+        with connect(self.path) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                rows = dict((name, (tokens, updated_at)) for name, tokens, updated_at in
+                            conn.execute('SELECT name, tokens, updated_at FROM governor_buckets'))
+                wait, limited_by, balances = 0.0, None, {}
+                for name, cost in costs.items():
+                    if name not in self.rates:
+                        continue
+                    rate, capacity = self.rates[name], self.capacity[name]
+                    tokens, updated_at = rows.get(name, (capacity, now))
+                    tokens = min(capacity, tokens + max(0.0, now - updated_at) * rate)
+                    # A single call bigger than the burst still has to go through eventually
+                    balance = tokens - min(cost, capacity)
+                    if balance < 0 and -balance / rate > wait:
+                        wait, limited_by = -balance / rate, name
+                    balances[name] = balance
+
+                if wait > max_wait:
+                    conn.execute('ROLLBACK')
+                    return None, limited_by
+                for name, balance in balances.items():
+                    conn.execute('INSERT OR REPLACE INTO governor_buckets (name, tokens, updated_at) VALUES (?, ?, ?)',
+                                 (name, balance, now))
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        return wait, limited_by
+
+    def pause(self, seconds: float) -> None:
+        """Push the request bucket into debt so every caller waits out an upstream Retry-After."""
+        if 'requests' not in self.rates:
+            return
+        rate, now = self.rates['requests'], time.time()
+        with connect(self.path) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT tokens, updated_at FROM governor_buckets WHERE name = ?', ('requests',)).fetchone()
+            tokens = min(self.capacity['requests'], row[0] + max(0.0, now - row[1]) * rate) if row else 0.0
+            conn.execute('INSERT OR REPLACE INTO governor_buckets (name, tokens, updated_at) VALUES (?, ?, ?)',
+                         ('requests', min(tokens, -seconds * rate), now))
+            conn.execute('COMMIT')
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with connect(self.path) as conn:
+            rows = conn.execute('SELECT name, tokens, updated_at FROM governor_buckets').fetchall()
+        return {
+            name: {
+                'per_minute': round(self.rates[name] * 60),
+                'available': round(min(self.capacity[name], tokens + (now - updated_at) * self.rates[name]), 1)
+            }
+            for name, tokens, updated_at in rows if name in self.rates
+        }
+
+
+_governor: Optional[TokenBucketGovernor] = None
+_governor_pid: Optional[int] = None
+_governor_lock = threading.Lock()
+
+
+def get_governor() -> TokenBucketGovernor:
+    """This process's handle on the shared buckets."""
+    global _governor, _governor_pid
+    with _governor_lock:
+        if _governor_pid != os.getpid():
+            _governor = TokenBucketGovernor({'requests': ANTHROPIC_RPM_LIMIT, 'input_tokens': ANTHROPIC_ITPM_LIMIT})
+            _governor_pid = os.getpid()
+        return _governor
+
+
+def stats() -> Optional[Dict[str, Any]]:
+    """Bucket limits and available budget for /health, or None when the governor is off."""
+    if not enabled():
+        return None
+    try:
+        return get_governor().stats()
+    except sqlite3.Error as e:
+        return {'error': str(e)}
+
+
+def log_error(action: str, error: Exception) -> None:
+    request_log.log_event('rate_governor_error', logging.WARNING, action=action, error=str(error),
+                          note='sending ungoverned')
+
+
+# ============================================================================
+# HTTPX TRANSPORTS
+# ============================================================================
+
+def _costs(request: httpx.Request, body: bytes) -> Optional[Dict[str, float]]:
+    """Budget a request needs, or None for requests that are not metered."""
+    if request.method != 'POST' or not request.url.path.endswith(LIMITED_PATH):
+        return None
+    try:
+        tokens = estimate_input_tokens(json.loads(body))
+    except ValueError:
+        tokens = 0
+    return {'requests': 1, 'input_tokens': tokens}
+
+
+def _reserve(costs: Dict[str, float], max_wait: Optional[float]) -> Tuple[Optional[float], Optional[str]]:
+    try:
+        return get_governor().reserve(costs, max_wait)
+    except sqlite3.Error as e:
+        log_error('reserve', e)
+        return 0.0, None
+
+
+def _reserve_by_deadline(costs: Dict[str, float], max_wait: Optional[float]) -> Tuple[Optional[float], Optional[str]]:
+    """
+    _reserve() with max_wait cut to the time left before the request deadline.
+
+    Raises:
+        DeadlineExceeded: If the budget wouldn't be due until after the deadline
+    """
+    left = deadline.remaining()
+    if left is None or left >= (GOVERNOR_MAX_WAIT_SECONDS if max_wait is None else max_wait):
+        return _reserve(costs, max_wait)
+    wait, limited_by = _reserve(costs, max(0.0, left))
+    if wait is None:
+        metrics.record_governor_rejection(limited_by or 'unknown')
+        request_log.log_event('rate_governor_rejected', logging.WARNING, limited_by=limited_by,
+                              max_wait_s=round(max(0.0, left), 3), reason='deadline')
+        raise deadline.DeadlineExceeded(f'Rate governor: {limited_by} budget is not due before the request deadline')
+    return wait, limited_by
+
+
+def _max_wait(request: httpx.Request) -> Optional[float]:
+    """0 for requests marked no-wait (the header is removed), else None for the default."""
+    if NO_WAIT_HEADER not in request.headers:
+        return None
+    del request.headers[NO_WAIT_HEADER]
+    return 0.0
+
+
+def _over_budget(limited_by: Optional[str], max_wait: Optional[float]) -> httpx.Response:
+    """Local 429 for a call that would wait past its limit (not retried by the SDK)."""
+    metrics.record_governor_rejection(limited_by or 'unknown')
+    max_wait = GOVERNOR_MAX_WAIT_SECONDS if max_wait is None else max_wait
+    request_log.log_event('rate_governor_rejected', logging.WARNING, limited_by=limited_by, max_wait_s=max_wait)
+    return httpx.Response(429, headers={'x-should-retry': 'false', 'content-type': 'application/json'}, json={
+        'type': 'error',
+        'error': {
+            'type': 'rate_limit_error',
+            'message': f'Local rate governor: {limited_by} budget would need more than '
+                       f'{max_wait:g}s of waiting'
+        }
+    })
+
+
+def _observe_upstream(response: httpx.Response) -> None:
+    if response.status_code != 429:
+        return
+    try:
+        retry_after = float(response.headers.get('retry-after', '0'))
+    except ValueError:
+        retry_after = 0.0
+    if retry_after > 0:
+        try:
+            get_governor().pause(retry_after)
+        except sqlite3.Error as e:
+            log_error('pause', e)
+
+
+class GovernorTransport(httpx.BaseTransport):
+    """Sync transport wrapper that waits for rate budget before each Messages API call."""
+
+    def __init__(self, transport: httpx.BaseTransport):
+        self.transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        max_wait = _max_wait(request)
+        costs = _costs(request, request.read())
+        if costs is not None:
+            wait, limited_by = _reserve_by_deadline(costs, max_wait)
+            if wait is None:
+                return _over_budget(limited_by, max_wait)
+            if wait > 0:
+                request_log.log_event('rate_governor_wait', limited_by=limited_by, wait_ms=metrics.to_ms(wait))
+                time.sleep(wait)
+            metrics.observe_governor_wait(wait, limited_by or 'none')
+
+        response = self.transport.handle_request(request)
+        _observe_upstream(response)
+        return response
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class AsyncGovernorTransport(httpx.AsyncBaseTransport):
+    """Async counterpart of GovernorTransport."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        max_wait = _max_wait(request)
+        costs = _costs(request, await request.aread())
+        if costs is not None:
+            wait, limited_by = await asyncio.to_thread(_reserve_by_deadline, costs, max_wait)
+            if wait is None:
+                return _over_budget(limited_by, max_wait)
+            if wait > 0:
+                request_log.log_event('rate_governor_wait', limited_by=limited_by, wait_ms=metrics.to_ms(wait))
+                await asyncio.sleep(wait)
+            metrics.observe_governor_wait(wait, limited_by or 'none')
+
+        response = await self.transport.handle_async_request(request)
+        if response.status_code == 429:
+            await asyncio.to_thread(_observe_upstream, response)
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+def wrap(transport: httpx.BaseTransport) -> httpx.BaseTransport:
+    """transport wrapped in a GovernorTransport when a limit is configured."""
+    return GovernorTransport(transport) if enabled() else transport
+
+
+def wrap_async(transport: httpx.AsyncBaseTransport) -> httpx.AsyncBaseTransport:
+    return AsyncGovernorTransport(transport) if enabled() else transport
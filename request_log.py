@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Structured Request Logging
+==========================
+JSON log lines for the API servers, written off the request path.
+
+Each line is one JSON object:
+
+    {"ts": "2026-01-01T12:00:00.000000Z", "level": "info", "event": "tool_call",
+     "request_id": "3f9c...", "tool": "chatbot", "status": 200, "duration_ms": 812.4}
+
+log_event() only puts the record on an in-memory queue; a QueueListener
+thread serializes it and writes it to stderr, so a slow disk or log pipe no
+longer stalls requests. If the queue is full, records are dropped rather than
+blocking.
+
+Request payloads and tool stderr (which for /chat include the whole
+conversation) are truncated to LOG_PAYLOAD_MAX_CHARS and only logged for a
+LOG_SAMPLE_RATE fraction of requests - and always when the request fails.
+
+Every request gets an id - the caller's X-Request-ID if it sent a usable one -
+that is attached to each line and returned in the X-Request-ID response header.
+"""
+
+import os
+import re
+import sys
+import json
+import uuid
+import queue
+import atexit
+import random
+import logging
+import threading
+from contextvars import ContextVar
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', '0.05'))
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv('LOG_PAYLOAD_MAX_CHARS', '2000'))
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+_VALID_REQUEST_ID = re.compile(r'^[A-Za-z0-9._:-]{1,128}$')
+
+_request_id: ContextVar[Optional[str]] = ContextVar('request_id', default=None)
+_sampled: ContextVar[bool] = ContextVar('log_payload_sampled', default=False)
+
+
+# ============================================================================
+# LOGGER SETUP
+# ============================================================================
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, event, request_id plus the record's fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.utcfromtimestamp(record.created).isoformat() + 'Z',
+            'level': record.levelname.lower(),
+            'event': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', {}))
+        return json.dumps(entry, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops records when the queue is full instead of blocking."""
+
+    dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            NonBlockingQueueHandler.dropped += 1
+
+
+_logger: Optional[logging.Logger] = None
+_listener: Optional[QueueListener] = None
+_owner_pid: Optional[int] = None
+_setup_lock = threading.Lock()
+
+
+def get_logger() -> logging.Logger:
+    """
+    Return this process's request logger, starting its writer thread on first use.
+
+    Rebuilt after a fork: a gunicorn worker does not inherit the master's
+    listener thread.
+    """
+    global _logger, _listener, _owner_pid
+    if _owner_pid == os.getpid():
+        return _logger
+
+    with _setup_lock:
+        if _owner_pid != os.getpid():
+            log_queue = queue.Queue(LOG_QUEUE_SIZE)
+            writer = logging.StreamHandler(sys.stderr)
+            writer.setFormatter(JsonFormatter())
+            _listener = QueueListener(log_queue, writer)
+            _listener.start()
+
+            logger = logging.getLogger('resultant.requests')
+            logger.handlers = [NonBlockingQueueHandler(log_queue)]
+            logger.setLevel(LOG_LEVEL)
+            logger.propagate = False
+
+            _logger = logger
+            _owner_pid = os.getpid()
+    return _logger
+
+
+@atexit.register
+def _flush_on_exit() -> None:
+    """Write out queued lines before the process exits."""
+    if _listener is not None and _owner_pid == os.getpid():
+        _listener.stop()
+
+
+# ============================================================================
+# REQUEST CONTEXT
+# ============================================================================
+
+def begin_request(incoming_id: Optional[str] = None) -> str:
+    """
+    Start logging context for a request: pick its id and decide whether its
+    payloads are sampled.
+
+    Returns:
+        The request id to echo in the X-Request-ID response header
+    """
+    if incoming_id and _VALID_REQUEST_ID.match(incoming_id):
+        request_id = incoming_id
+    else:
+        request_id = uuid.uuid4().hex
+    _request_id.set(request_id)
+    _sampled.set(random.random() < LOG_SAMPLE_RATE)
+    return request_id
+
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+# ============================================================================
+# LOGGING
+# ============================================================================
+
+def log_event(event: str, level: int = logging.INFO, **fields: Any) -> None:
+    """Queue one structured log line tagged with the current request id."""
+    logger = get_logger()
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={'fields': {'request_id': _request_id.get(), **fields}})
+
+
+def truncate(text: str, limit: int = LOG_PAYLOAD_MAX_CHARS) -> str:
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [{len(text) - limit} more chars]"
+
+
+def log_payload(event: str, payload: Any, failed: bool = False, **fields: Any) -> None:
+    """
+    Log a (truncated) request payload or tool output for sampled requests, and
+    for every failed one. Unsampled payloads are never serialized.
+    """
+    if not (failed or _sampled.get()) or payload in (None, ''):
+        return
+    text = payload if isinstance(payload, str) else json.dumps(payload, default=str)
+    log_event(event, logging.ERROR if failed else logging.INFO, payload=truncate(text), **fields)
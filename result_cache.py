@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Persistent Result Cache
+=======================
+Disk-backed key/value cache with LRU and TTL eviction, used to skip repeat
+website fetches and Claude calls for inputs we have already answered.
+
+Each cache is one table in a local SQLite database (CACHE_DB_PATH), so it is
+shared by every gunicorn worker and survives restarts. Values are stored as
+JSON. Entries expire after their TTL, and once a table holds more than
+max_entries the least recently read entries are evicted.
+
+A cache that cannot be read or written is logged and treated as a miss; it
+never fails the request it sits in front of.
+"""
+
+import os
+import json
+import time
+import threading
+from typing import Dict, Any, Optional
+
+from sqlite_store import connect, init_db, evict, degrade
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CACHE_DB_PATH = os.getenv('CACHE_DB_PATH', os.path.join(SCRIPT_DIR, 'cache.db'))
+
+
+def is_truthy(value: Any) -> bool:
+    """Interpret a request flag that may arrive as a bool, number or string (Make.com sends strings)."""
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    return bool(value)
+
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+class ResultCache:
+    """One LRU + TTL cache table in a local SQLite database (see sqlite_store.py)."""
+
+    def __init__(self, name: str, ttl_seconds: float, max_entries: int, path: str = CACHE_DB_PATH):
+        if not name.isidentifier():
+            raise ValueError(f"Invalid cache name: {name}")
+        self.name = name
+        self.table = f'cache_{name}'
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        init_db(self.path, f"""
+            CREATE TABLE IF NOT EXISTS {self.table} (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_accessed REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_{self.table}_last_accessed ON {self.table} (last_accessed);
+        """)
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a live entry and mark it as recently used.
+
+        Returns:
+            {'value': ..., 'created_at': unix_time} or None on a miss
+        """
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        row = None
+        with degrade('cache_error', 'read', cache=self.name):
+            with connect(self.path) as conn:
+                row = conn.execute(
+                    f'SELECT value, created_at FROM {self.table} WHERE key = ? AND expires_at > ?',
+                    (key, now)
+                ).fetchone()
+                if row is not None:
+                    conn.execute(f'UPDATE {self.table} SET last_accessed = ? WHERE key = ?', (now, key))
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if row is None:
+            return None
+        return {'value': json.loads(row['value']), 'created_at': row['created_at']}
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Store a value, then drop expired entries and anything past max_entries."""
+        if not self.enabled:
+            return
+
+        now = time.time()
+        expires_at = now + (self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+        with degrade('cache_error', 'write', cache=self.name):
+            with connect(self.path) as conn:
+                conn.execute(
+                    f'INSERT OR REPLACE INTO {self.table} (key, value, created_at, expires_at, last_accessed) '
+                    f'VALUES (?, ?, ?, ?, ?)',
+                    (key, json.dumps(value, default=str), now, expires_at, now)
+                )
+                evict(conn, self.table, 'key', self.max_entries, now)
+
+    def delete(self, key: str) -> None:
+        """Remove one entry (no-op if it is not cached)."""
+        with degrade('cache_error', 'delete', cache=self.name):
+            with connect(self.path) as conn:
+                conn.execute(f'DELETE FROM {self.table} WHERE key = ?', (key,))
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count (None if the database can't be read) plus this process's hit/miss counters."""
+        entries = None
+        with degrade('cache_error', 'stats', cache=self.name):
+            with connect(self.path) as conn:
+                entries = conn.execute(f'SELECT COUNT(*) FROM {self.table}').fetchone()[0]
+        with self._lock:
+            return {
+                'entries': entries,
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses
+            }
@@ -7,8 +7,22 @@ Production-ready Flask server that exposes Python scripts as REST APIs.
 Endpoints:
     POST /audit      - Run marketing_audit.py
     POST /enrich     - Run lead_enrichment.py
+    POST /enrich/batch - Enrich a list of domains, results streamed as NDJSON
     POST /qualify    - Run mca_qualification.py
+    POST /chat       - Run chatbot.py
+    POST /chat/stream - Chatbot with Server-Sent Events token streaming
+    POST /jobs/<type> - Queue an audit|enrich|qualify job, returns a job id
+    GET  /jobs/<id>  - Job status and result
     GET  /health     - Health check
+    GET  /metrics    - Prometheus metrics (see metrics.py)
+
+Tool endpoints are admission controlled (see admission.py): past their
+concurrency limit and wait queue they answer 429 with a Retry-After header.
+
+Execution modes (EXECUTION_MODE env var):
+    inprocess  - Import the tool modules once per worker and call them directly (default)
+    pool       - Send requests to warm, long-lived tool subprocesses (see worker_pool.py)
+    subprocess - Start a fresh Python interpreter per request (fallback)
 
 Usage:
     python server.py
@@ -20,25 +34,44 @@ Usage:
 import os
 import sys
 import json
+import time
+import logging
+import importlib
+import contextvars
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Tuple, Callable, Optional
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context, g
 from flask_cors import CORS
 
+from worker_pool import ToolWorkerPool
+from job_queue import JobQueue, JobExecutor, JOB_WORKERS
+from shared_clients import connection_stats
+from single_flight import SingleFlight, request_key
+from admission import AdmissionController, parse_limits
+import deadline
+import fast_json
+import http_encoding
+import metrics
+import rate_governor
+import request_log
+
 # ============================================================================
 # FLASK APP CONFIGURATION
 # ============================================================================
 
 app = Flask(__name__)
+app.json = http_encoding.FastJSONProvider(app)
 
 # Enable CORS for Make.com and other external services
 CORS(app, resources={
     r"/*": {
         "origins": "*",
         "methods": ["GET", "POST", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"]
+        "allow_headers": ["Content-Type", "Authorization", request_log.REQUEST_ID_HEADER],
+        "expose_headers": [request_log.REQUEST_ID_HEADER, "Retry-After"]
     }
 })
 
@@ -53,6 +86,124 @@ VENV_PYTHON = os.path.join(SCRIPT_DIR, 'venv', 'bin', 'python3')
 # Use venv python if available, otherwise system python
 PYTHON_CMD = VENV_PYTHON if os.path.exists(VENV_PYTHON) else sys.executable
 
+# How tool scripts are executed: 'inprocess', 'pool' or 'subprocess'
+EXECUTION_MODE = os.getenv('EXECUTION_MODE', 'inprocess').lower()
+
+# Threads available for in-process tool calls (per worker)
+IN_PROCESS_MAX_THREADS = int(os.getenv('IN_PROCESS_MAX_THREADS', '8'))
+
+# Script name -> (module, function) called directly in in-process mode
+TOOL_ENTRY_POINTS = {
+    'marketing_audit.py': ('marketing_audit', 'handle_request'),
+    'lead_enrichment.py': ('lead_enrichment', 'handle_request'),
+    'mca_qualification.py': ('mca_qualification', 'handle_request'),
+    'chatbot.py': ('chatbot', 'chat'),
+}
+
+# Collapse concurrent identical requests to these tools into one execution
+COALESCE_REQUESTS = os.getenv('COALESCE_REQUESTS', 'true').lower() == 'true'
+COALESCED_TOOLS = ('marketing_audit.py', 'lead_enrichment.py', 'mca_qualification.py')
+
+# Admission control: route -> limit class, and each class's concurrency limit
+# and wait queue size per worker (override with ADMISSION_LIMITS / ADMISSION_QUEUE)
+ADMISSION_CONTROL = os.getenv('ADMISSION_CONTROL', 'true').lower() == 'true'
+ADMISSION_ENDPOINTS = {
+    '/audit': 'audit',
+    '/enrich': 'enrich',
+    '/enrich/batch': 'enrich_batch',
+    '/qualify': 'qualify',
+    '/chat': 'chat',
+    '/chat/stream': 'chat',
+}
+ADMISSION_LIMITS = parse_limits(os.getenv('ADMISSION_LIMITS', ''), {
+    'audit': 2, 'enrich': 3, 'enrich_batch': 1, 'qualify': 3, 'chat': 8
+})
+ADMISSION_QUEUE = parse_limits(os.getenv('ADMISSION_QUEUE', ''), {
+    'audit': 2, 'enrich': 3, 'enrich_batch': 0, 'qualify': 3, 'chat': 8
+})
+# Tool requests running at once per worker, and slots only some classes may use
+ADMISSION_CAPACITY = int(os.getenv('ADMISSION_CAPACITY', str(IN_PROCESS_MAX_THREADS)))
+ADMISSION_RESERVED = parse_limits(os.getenv('ADMISSION_RESERVED', ''), {'chat': 3})
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv('ADMISSION_QUEUE_TIMEOUT', '10'))
+
+# Asynchronous job types -> (script, required fields, timeout seconds)
+JOB_TYPES = {
+    'audit': ('marketing_audit.py', ['url', 'industry'], 120),
+    'enrich': ('lead_enrichment.py', ['domain'], 90),
+    'qualify': ('mca_qualification.py', ['company_name', 'annual_revenue', 'credit_score', 'business_age_months'], 60),
+}
+
+
+# ============================================================================
+# IN-PROCESS TOOL LOADING
+# ============================================================================
+
+# Make the tool modules importable regardless of the worker's cwd
+if SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, SCRIPT_DIR)
+
+_tool_handlers: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {}
+_tool_import_errors: Dict[str, str] = {}
+_tool_executor: Optional[ThreadPoolExecutor] = None
+_job_tool_executor: Optional[ThreadPoolExecutor] = None
+
+# Warm subprocess workers, used when EXECUTION_MODE=pool
+tool_pool = ToolWorkerPool(TOOL_ENTRY_POINTS, PYTHON_CMD)
+
+# In-flight identical tool calls (see single_flight.py)
+single_flight = SingleFlight()
+
+# Per-endpoint concurrency limits (see admission.py)
+admission = AdmissionController(ADMISSION_LIMITS, ADMISSION_QUEUE, ADMISSION_CAPACITY,
+                                ADMISSION_RESERVED, ADMISSION_QUEUE_TIMEOUT)
+
+
+def load_tool_handlers() -> None:
+    """
+    Import every tool module once and cache its entry point.
+
+    Called at import time in in-process mode, so each gunicorn worker (or the
+    master, with --preload) pays the anthropic/bs4/lxml import cost exactly once.
+    Tools that fail to import are recorded and served via the subprocess path.
+    """
+    for script_name, (module_name, func_name) in TOOL_ENTRY_POINTS.items():
+        if script_name in _tool_handlers:
+            continue
+        try:
+            module = importlib.import_module(module_name)
+            _tool_handlers[script_name] = getattr(module, func_name)
+        except Exception as e:
+            _tool_import_errors[script_name] = f'{type(e).__name__}: {str(e)}'
+            request_log.log_event('tool_import_failed', logging.WARNING, tool=script_name,
+                                  error=_tool_import_errors[script_name], fallback='subprocess')
+
+
+def get_tool_executor() -> ThreadPoolExecutor:
+    """Return the per-worker thread pool used to enforce in-process timeouts."""
+    global _tool_executor
+    if _tool_executor is None:
+        _tool_executor = ThreadPoolExecutor(
+            max_workers=IN_PROCESS_MAX_THREADS,
+            thread_name_prefix='tool'
+        )
+    return _tool_executor
+
+
+def get_job_tool_executor() -> ThreadPoolExecutor:
+    """
+    Return the thread pool that runs in-process tool calls for queued jobs.
+
+    Jobs skip admission control, so they get their own JOB_WORKERS threads
+    instead of taking tool threads that ADMISSION_CAPACITY counts on.
+    """
+    global _job_tool_executor
+    if _job_tool_executor is None:
+        _job_tool_executor = ThreadPoolExecutor(
+            max_workers=JOB_WORKERS,
+            thread_name_prefix='job-tool'
+        )
+    return _job_tool_executor
+
 
 # ============================================================================
 # HELPER FUNCTIONS
@@ -81,28 +232,30 @@ def run_python_script(script_name: str, input_data: Dict[str, Any], timeout: int
 
     try:
         # Convert input to JSON
-        input_json = json.dumps(input_data)
-
-        # Log request (to stderr for production logging)
-        print(f"[{datetime.utcnow().isoformat()}] Running {script_name}", file=sys.stderr)
-        print(f"[{datetime.utcnow().isoformat()}] Input: {input_json}", file=sys.stderr)
-
-        # Run script with JSON input via stdin
-        process = subprocess.Popen(
-            [PYTHON_CMD, script_path],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            cwd=SCRIPT_DIR,
-            text=True
-        )
-
-        # Send input and get output
-        stdout, stderr = process.communicate(input=input_json, timeout=timeout)
-
-        # Log stderr (script progress messages)
-        if stderr:
-            print(f"[{datetime.utcnow().isoformat()}] Script stderr:\n{stderr}", file=sys.stderr)
+        input_json = fast_json.dumps(input_data)
+
+        # Run script with JSON input via stdin; stdout stays bytes for fast_json.
+        # Its metrics go to a reused slot (see metrics.child_process_env)
+        with metrics.child_process_env() as env:
+            process = subprocess.Popen(
+                [PYTHON_CMD, script_path],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                cwd=SCRIPT_DIR,
+                env=env
+            )
+            try:
+                # Send input and get output
+                stdout, stderr = process.communicate(input=input_json, timeout=timeout)
+            finally:
+                if process.poll() is None:
+                    process.kill()
+                process.wait()
+        stderr = stderr.decode('utf-8', errors='replace')
+
+        # Script progress messages: sampled, and always kept when the script fails
+        request_log.log_payload('tool_stderr', stderr, failed=process.returncode != 0, tool=script_name)
 
         # Check exit code
         if process.returncode != 0:
@@ -115,8 +268,7 @@ def run_python_script(script_name: str, input_data: Dict[str, Any], timeout: int
 
         # Parse JSON output
         try:
-            result = json.loads(stdout)
-            print(f"[{datetime.utcnow().isoformat()}] {script_name} completed successfully", file=sys.stderr)
+            result = fast_json.loads(stdout)
             return result, 200
 
         except json.JSONDecodeError as e:
@@ -124,7 +276,7 @@ def run_python_script(script_name: str, input_data: Dict[str, Any], timeout: int
                 'error': 'Failed to parse script output as JSON',
                 'script': script_name,
                 'parse_error': str(e),
-                'stdout': stdout[:500],  # First 500 chars for debugging
+                'stdout': stdout[:500].decode('utf-8', errors='replace'),  # First 500 bytes for debugging
                 'timestamp': datetime.utcnow().isoformat() + 'Z'
             }, 500
 
@@ -145,6 +297,151 @@ def run_python_script(script_name: str, input_data: Dict[str, Any], timeout: int
         }, 500
 
 
+def run_in_process(script_name: str, input_data: Dict[str, Any], timeout: int = 120,
+                   executor: Optional[ThreadPoolExecutor] = None) -> Tuple[Dict[str, Any], int]:
+    """
+    Call a tool's entry point directly inside this worker.
+
+    Args:
+        script_name: Name of the Python script whose entry point to call
+        input_data: Dictionary passed to the entry point
+        timeout: Maximum execution time in seconds
+        executor: Thread pool to run it on (default: get_tool_executor())
+
+    Returns:
+        Tuple of (response_dict, http_status_code)
+    """
+    handler = _tool_handlers.get(script_name)
+    if handler is None:
+        return run_python_script(script_name, input_data, timeout=timeout)
+
+    # In a copy of this context, so log lines from inside the tool carry the request id
+    future = (executor or get_tool_executor()).submit(contextvars.copy_context().run, handler, dict(input_data))
+
+    try:
+        result = future.result(timeout=timeout)
+        return result, 200
+
+    except FutureTimeoutError:
+        # The thread cannot be killed; it finishes in the background and its
+        # result is discarded.
+        return {
+            'error': f'Script execution timed out after {timeout} seconds',
+            'script': script_name,
+            'timestamp': datetime.utcnow().isoformat() + 'Z'
+        }, 504
+
+    except deadline.DeadlineExceeded as e:
+        return {
+            'error': f'Request deadline exceeded: {str(e)}',
+            'script': script_name,
+            'timestamp': datetime.utcnow().isoformat() + 'Z'
+        }, 504
+
+    except Exception as e:
+        return {
+            'error': f'Script execution failed: {str(e)}',
+            'script': script_name,
+            'error_type': type(e).__name__,
+            'timestamp': datetime.utcnow().isoformat() + 'Z'
+        }, 500
+
+
+def run_tool(script_name: str, input_data: Dict[str, Any], timeout: int = 120,
+             executor: Optional[ThreadPoolExecutor] = None) -> Tuple[Dict[str, Any], int]:
+    """
+    Run a tool, sharing the result of an identical call that is already in flight.
+
+    Returns:
+        Tuple of (response_dict, http_status_code)
+    """
+    if not COALESCE_REQUESTS or script_name not in COALESCED_TOOLS:
+        return dispatch_tool(script_name, input_data, timeout, executor)
+
+    (result, status_code), shared = single_flight.do(
+        script_name,
+        request_key(script_name, input_data),
+        lambda: dispatch_tool(script_name, input_data, timeout, executor)
+    )
+    if shared:
+        request_log.log_event('request_coalesced', tool=script_name)
+    return result, status_code
+
+
+def dispatch_tool(script_name: str, input_data: Dict[str, Any], timeout: int = 120,
+                  executor: Optional[ThreadPoolExecutor] = None) -> Tuple[Dict[str, Any], int]:
+    """
+    Run a tool using the configured EXECUTION_MODE.
+
+    The tool gets a deadline just inside timeout (see deadline.py), so it can
+    size its fetch and Claude call to the time left and return a partial
+    result before the call below gives up on it.
+
+    Returns:
+        Tuple of (response_dict, http_status_code)
+    """
+    started = time.perf_counter()
+    tool_input = deadline.with_deadline(input_data, timeout)
+    if EXECUTION_MODE == 'subprocess':
+        result, status_code = run_python_script(script_name, tool_input, timeout=timeout)
+    elif EXECUTION_MODE == 'pool':
+        result, status_code = tool_pool.run(script_name, tool_input, timeout=timeout)
+    else:
+        result, status_code = run_in_process(script_name, tool_input, timeout=timeout, executor=executor)
+
+    # Time outside the tool: thread/worker wait, or interpreter startup when
+    # the call went through run_python_script()
+    spawned = EXECUTION_MODE == 'subprocess' or (EXECUTION_MODE != 'pool' and script_name not in _tool_handlers)
+    tool = metrics.tool_label(script_name)
+    metrics.add_overhead(tool, 'spawn' if spawned else 'queue', result, time.perf_counter() - started)
+    if status_code == 504:
+        metrics.record_timeout(tool)
+
+    failed = status_code >= 500
+    request_log.log_event(
+        'tool_call', logging.ERROR if failed else logging.INFO,
+        tool=script_name, mode=EXECUTION_MODE, status=status_code,
+        duration_ms=metrics.to_ms(time.perf_counter() - started),
+        **({'error': result.get('error'), 'error_type': result.get('error_type')} if failed else {})
+    )
+    request_log.log_payload('tool_input', input_data, failed=failed, tool=script_name)
+    return result, status_code
+
+
+def run_job(kind: str, payload: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+    """
+    Run a queued /jobs request with the same tool and timeout as its sync endpoint.
+
+    In-process calls go to get_job_tool_executor(), so jobs never take the
+    tool threads that admitted requests are waiting for.
+    """
+    script_name, _, timeout = JOB_TYPES[kind]
+    return run_tool(script_name, payload, timeout=timeout, executor=get_job_tool_executor())
+
+
+_job_executor: Optional[JobExecutor] = None
+
+
+def get_job_executor() -> JobExecutor:
+    """
+    Return this worker's job executor, starting its threads if needed.
+
+    Called from the /jobs routes and gunicorn's post_worker_init hook rather
+    than at import, so importing server (tests, a --preload master) never
+    starts claiming jobs.
+    """
+    global _job_executor
+    if _job_executor is None:
+        _job_executor = JobExecutor(JobQueue(), run_job)
+    _job_executor.ensure_started()
+    return _job_executor
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Encode one Server-Sent Events frame."""
+    return f"event: {event}\ndata: {fast_json.dumps(data).decode('utf-8')}\n\n"
+
+
 def validate_json_request() -> Tuple[Dict[str, Any], int, bool]:
     """
     Validate that request has valid JSON body.
@@ -174,6 +471,111 @@ def validate_json_request() -> Tuple[Dict[str, Any], int, bool]:
         }, 400, False
 
 
+# ============================================================================
+# REQUEST LOGGING, METRICS & ADMISSION CONTROL
+# ============================================================================
+
+@app.before_request
+def start_request():
+    g.request_started = time.perf_counter()
+    g.request_cpu_started = time.thread_time()
+    g.request_id = request_log.begin_request(request.headers.get(request_log.REQUEST_ID_HEADER))
+
+
+@app.before_request
+def admit_request():
+    """
+    Hold a tool request until its endpoint has a free slot, or reject it with
+    429 and Retry-After if its wait queue is full or it waited too long.
+    """
+    if not ADMISSION_CONTROL or request.method != 'POST' or request.url_rule is None:
+        return None
+    endpoint = ADMISSION_ENDPOINTS.get(request.url_rule.rule)
+    if endpoint is None:
+        return None
+
+    ticket = admission.acquire(endpoint)
+    metrics.observe_admission(endpoint, ticket.waited, ticket.reason)
+    if ticket.admitted:
+        g.admission_ticket = ticket
+        return None
+
+    request_log.log_event('request_rejected', logging.WARNING, endpoint=endpoint, reason=ticket.reason,
+                          retry_after=ticket.retry_after, waited_ms=metrics.to_ms(ticket.waited))
+    response = jsonify({
+        'error': f'Server busy: too many {request.path} requests in progress, retry later',
+        'reason': ticket.reason,
+        'retry_after': ticket.retry_after,
+        'timestamp': datetime.utcnow().isoformat() + 'Z'
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(ticket.retry_after)
+    return response
+
+
+@app.after_request
+def hold_admission_for_stream(response):
+    """Streamed responses keep their slot until the last chunk is sent, not just until the view returns."""
+    if response.is_streamed:
+        ticket = g.pop('admission_ticket', None)
+        if ticket is not None:
+            response.call_on_close(lambda: admission.release(ticket))
+    return response
+
+
+@app.teardown_request
+def release_admission(error=None):
+    """Free the request's slot once it is finished."""
+    ticket = g.pop('admission_ticket', None)
+    if ticket is not None:
+        admission.release(ticket)
+
+
+@app.after_request
+def finish_request(response):
+    """
+    Count and log every request by route and echo its request id.
+    Streaming responses are timed to their headers.
+    """
+    started = g.get('request_started')
+    if started is not None:
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        duration = time.perf_counter() - started
+        metrics.observe_request(endpoint, request.method, response.status_code, duration)
+        # CPU of this request's thread: routing, (de)serialization and compression,
+        # not the tool itself when it runs on another thread or process
+        request_log.log_event('request', method=request.method, path=request.path,
+                              status=response.status_code, duration_ms=metrics.to_ms(duration),
+                              cpu_ms=metrics.to_ms(time.thread_time() - g.request_cpu_started))
+    if g.get('request_id'):
+        response.headers[request_log.REQUEST_ID_HEADER] = g.request_id
+    return response
+
+
+@app.after_request
+def compress_response(response):
+    """gzip/brotli-compress finished JSON and text responses (see http_encoding.py)."""
+    if response.is_streamed or response.direct_passthrough or 'Content-Encoding' in response.headers:
+        return response
+    if http_encoding.is_compressible(response.mimetype):
+        response.vary.add('Accept-Encoding')
+    encoded = http_encoding.compressed_body(
+        response.get_data(), request.headers.get('Accept-Encoding'), response.mimetype
+    )
+    if encoded is not None:
+        body, encoding = encoded
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus scrape endpoint, aggregated across gunicorn workers."""
+    body, content_type = metrics.render_latest()
+    return Response(body, content_type=content_type)
+
+
 # ============================================================================
 # API ENDPOINTS
 # ============================================================================
@@ -186,6 +588,14 @@ def health_check():
         'service': 'resultant-ai-api',
         'timestamp': datetime.utcnow().isoformat() + 'Z',
         'python_version': sys.version,
+        'execution_mode': EXECUTION_MODE,
+        'in_process_tools': sorted(_tool_handlers.keys()),
+        'idle_pool_workers': tool_pool.stats() if EXECUTION_MODE == 'pool' else {},
+        # In-process calls only; pool and subprocess tools keep their own counters
+        'anthropic_connections': connection_stats(),
+        'single_flight': single_flight.stats(),
+        'admission': admission.stats() if ADMISSION_CONTROL else None,
+        'rate_governor': rate_governor.stats(),
         'scripts_available': {
             'marketing_audit': os.path.exists(os.path.join(SCRIPT_DIR, 'marketing_audit.py')),
             'lead_enrichment': os.path.exists(os.path.join(SCRIPT_DIR, 'lead_enrichment.py')),
@@ -203,7 +613,8 @@ def audit():
     Expected JSON:
     {
         "url": "https://example.com",
-        "industry": "SaaS"
+        "industry": "SaaS",
+        "force_refresh": true (optional, skip the page and audit caches)
     }
     """
     # Validate request
@@ -220,7 +631,7 @@ def audit():
         }), 400
 
     # Run script
-    result, status_code = run_python_script('marketing_audit.py', data)
+    result, status_code = run_tool('marketing_audit.py', data)
     return jsonify(result), status_code
 
 
@@ -232,7 +643,8 @@ def enrich():
     Expected JSON:
     {
         "domain": "stripe.com",
-        "company": "Stripe" (optional)
+        "company": "Stripe" (optional),
+        "force_refresh": true (optional, skip the enrichment cache)
     }
     """
     # Validate request
@@ -249,10 +661,58 @@ def enrich():
         }), 400
 
     # Run script
-    result, status_code = run_python_script('lead_enrichment.py', data, timeout=90)
+    result, status_code = run_tool('lead_enrichment.py', data, timeout=90)
     return jsonify(result), status_code
 
 
+@app.route('/enrich/batch', methods=['POST'])
+def enrich_batch():
+    """
+    Enrich and score a list of domains, streaming results as NDJSON.
+
+    Expected JSON:
+    {
+        "domains": ["stripe.com", {"domain": "example.com", "company": "Example"}],
+        "fetch_concurrency": 10 (optional, capped at ENRICH_BATCH_FETCH_CONCURRENCY),
+        "llm_concurrency": 4 (optional, capped at ENRICH_BATCH_LLM_CONCURRENCY),
+        "force_refresh": false (optional)
+    }
+
+    Responds with application/x-ndjson: one {"type": "result", ...} line per
+    domain in completion order (errors included, with "status": "error"), then
+    one {"type": "summary", ...} line. Batches always run in-process.
+    """
+    data, status, is_valid = validate_json_request()
+    if not is_valid:
+        return jsonify(data), status
+
+    lead_enrichment = importlib.import_module('lead_enrichment')
+    try:
+        options = lead_enrichment.parse_batch_request(data)
+    except ValueError as e:
+        return jsonify({
+            'error': str(e),
+            'timestamp': datetime.utcnow().isoformat() + 'Z'
+        }), 400
+
+    request_log.log_event('enrich_batch_started', domains=len(options['items']),
+                          fetch_concurrency=options['fetch_concurrency'],
+                          llm_concurrency=options['llm_concurrency'])
+
+    def generate():
+        for line in lead_enrichment.enrich_batch(**options):
+            if line['type'] == 'summary':
+                request_log.log_event('enrich_batch_finished', succeeded=line['succeeded'],
+                                      failed=line['failed'], elapsed_seconds=line['elapsed_seconds'])
+            yield fast_json.dumps(line, default=str) + b'\n'
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={'X-Accel-Buffering': 'no'}
+    )
+
+
 @app.route('/qualify', methods=['POST'])
 def qualify():
     """
@@ -288,7 +748,7 @@ def qualify():
         }), 400
 
     # Run script
-    result, status_code = run_python_script('mca_qualification.py', data, timeout=60)
+    result, status_code = run_tool('mca_qualification.py', data, timeout=60)
     return jsonify(result), status_code
 
 
@@ -300,6 +760,7 @@ def chat():
     Expected JSON:
     {
         "message": "user's message",
+        "session_id": "from the previous reply (omit to start a conversation)",
         "conversation_history": [
             {"role": "user", "content": "previous message"},
             {"role": "assistant", "content": "previous response"}
@@ -326,10 +787,117 @@ def chat():
         }), 400
 
     # Run chatbot script with longer timeout for AI responses
-    result, status_code = run_python_script('chatbot.py', data, timeout=90)
+    result, status_code = run_tool('chatbot.py', data, timeout=90)
     return jsonify(result), status_code
 
 
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """
+    Streaming website chatbot endpoint (Server-Sent Events).
+
+    Takes the same JSON body as /chat. Responds with text/event-stream:
+        event: delta  data: {"text": "..."}                 (repeated)
+        event: done   data: {"session_id": ..., "detected_industry": ..., "should_offer_booking": ..., "booking_url": ...}
+        event: error  data: {"error": "..."}                (instead of done)
+
+    Streaming always runs in-process, whatever EXECUTION_MODE is set to.
+    Time to first token is logged for every request.
+    """
+    # Validate request
+    data, status, is_valid = validate_json_request()
+    if not is_valid:
+        return jsonify(data), status
+
+    # Validate required fields
+    if 'message' not in data:
+        return jsonify({
+            'error': 'Missing required field: message',
+            'received_fields': list(data.keys()),
+            'timestamp': datetime.utcnow().isoformat() + 'Z'
+        }), 400
+
+    chatbot = importlib.import_module('chatbot')
+    started = time.perf_counter()
+
+    def generate():
+        ttft_ms = None
+        for event in chatbot.chat_stream(data):
+            if event['event'] == 'delta' and ttft_ms is None:
+                ttft_ms = metrics.to_ms(time.perf_counter() - started)
+            yield format_sse(event['event'], event['data'])
+
+        request_log.log_event('chat_stream_completed', ttft_ms=ttft_ms,
+                              duration_ms=metrics.to_ms(time.perf_counter() - started))
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # disable proxy buffering so deltas flush immediately
+        }
+    )
+
+
+@app.route('/jobs/<job_type>', methods=['POST'])
+def create_job(job_type: str):
+    """
+    Queue a long-running audit, enrich or qualify request.
+
+    Takes the same JSON body as the matching synchronous endpoint and returns
+    202 with a job id right away. Poll GET /jobs/<job_id> for the result.
+    """
+    if job_type not in JOB_TYPES:
+        return jsonify({
+            'error': f'Unknown job type: {job_type}',
+            'job_types': sorted(JOB_TYPES.keys()),
+            'timestamp': datetime.utcnow().isoformat() + 'Z'
+        }), 404
+
+    # Validate request
+    data, status, is_valid = validate_json_request()
+    if not is_valid:
+        return jsonify(data), status
+
+    # Validate required fields
+    _, required, _ = JOB_TYPES[job_type]
+    missing = [field for field in required if field not in data]
+
+    if missing:
+        return jsonify({
+            'error': f'Missing required fields: {", ".join(missing)}',
+            'required_fields': required,
+            'received_fields': list(data.keys()),
+            'timestamp': datetime.utcnow().isoformat() + 'Z'
+        }), 400
+
+    executor = get_job_executor()
+    job_id = executor.queue.enqueue(job_type, data)
+    executor.notify()
+
+    return jsonify({
+        'job_id': job_id,
+        'type': job_type,
+        'status': 'queued',
+        'status_url': f'/jobs/{job_id}',
+        'timestamp': datetime.utcnow().isoformat() + 'Z'
+    }), 202
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id: str):
+    """Return a queued job's status, plus its result once finished."""
+    job = get_job_executor().queue.get(job_id)
+    if job is None:
+        return jsonify({
+            'error': f'Job not found: {job_id}',
+            'timestamp': datetime.utcnow().isoformat() + 'Z'
+        }), 404
+
+    return jsonify(job), 200
+
+
 @app.route('/', methods=['GET'])
 def index():
     """API documentation endpoint."""
@@ -338,10 +906,15 @@ def index():
         'version': '1.0.0',
         'endpoints': {
             'GET /health': 'Health check',
-            'POST /audit': 'Run marketing audit (requires: url, industry)',
-            'POST /enrich': 'Enrich company data (requires: domain)',
+            'GET /metrics': 'Prometheus metrics',
+            'POST /audit': 'Run marketing audit (requires: url, industry; optional: force_refresh)',
+            'POST /enrich': 'Enrich company data (requires: domain; optional: company, force_refresh)',
+            'POST /enrich/batch': 'Enrich a list of domains, streamed as NDJSON (requires: domains)',
             'POST /qualify': 'Qualify MCA application (requires: company_name, annual_revenue, credit_score, business_age_months)',
-            'POST /chat': 'Website chatbot (requires: message)'
+            'POST /chat': 'Website chatbot (requires: message)',
+            'POST /chat/stream': 'Website chatbot with SSE token streaming (requires: message)',
+            'POST /jobs/<type>': 'Queue an audit, enrich or qualify job (same body as the sync endpoint)',
+            'GET /jobs/<id>': 'Job status and result'
         },
         'documentation': {
             'audit': {
@@ -410,7 +983,8 @@ def not_found(error):
         'path': request.path,
         'method': request.method,
         'timestamp': datetime.utcnow().isoformat() + 'Z',
-        'available_endpoints': ['GET /', 'GET /health', 'POST /audit', 'POST /enrich', 'POST /qualify', 'POST /chat']
+        'available_endpoints': ['GET /', 'GET /health', 'GET /metrics', 'POST /audit', 'POST /enrich', 'POST /enrich/batch', 'POST /qualify', 'POST /chat',
+                                'POST /chat/stream', 'POST /jobs/<type>', 'GET /jobs/<id>']
     }), 404
 
 
@@ -435,20 +1009,33 @@ def internal_error(error):
     }), 500
 
 
+# Import tools once per worker when running in-process, or start the warm
+# worker pool at boot when running in pool mode
+if EXECUTION_MODE == 'pool':
+    tool_pool.start()
+elif EXECUTION_MODE != 'subprocess':
+    load_tool_handlers()
+
+
 # ============================================================================
 # MAIN
 # ============================================================================
 
 if __name__ == '__main__':
     print(f"Starting Resultant AI API Server on port {PORT}...", file=sys.stderr)
+    print(f"Execution mode: {EXECUTION_MODE}", file=sys.stderr)
     print(f"Using Python: {PYTHON_CMD}", file=sys.stderr)
     print(f"Script directory: {SCRIPT_DIR}", file=sys.stderr)
     print(f"\nAvailable endpoints:", file=sys.stderr)
     print(f"  GET  http://localhost:{PORT}/health", file=sys.stderr)
+    print(f"  GET  http://localhost:{PORT}/metrics", file=sys.stderr)
     print(f"  POST http://localhost:{PORT}/audit", file=sys.stderr)
     print(f"  POST http://localhost:{PORT}/enrich", file=sys.stderr)
     print(f"  POST http://localhost:{PORT}/qualify", file=sys.stderr)
     print(f"  POST http://localhost:{PORT}/chat", file=sys.stderr)
+    print(f"  POST http://localhost:{PORT}/chat/stream", file=sys.stderr)
+    print(f"  POST http://localhost:{PORT}/jobs/<audit|enrich|qualify>", file=sys.stderr)
+    print(f"  GET  http://localhost:{PORT}/jobs/<job_id>", file=sys.stderr)
     print(f"\nPress Ctrl+C to stop\n", file=sys.stderr)
 
     app.run(
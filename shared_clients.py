@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Shared Clients
+==============
+Process-wide clients reused by every tool call instead of being rebuilt per
+request, so connections (and their TLS sessions) stay warm.
+
+get_anthropic_client() is the one place the tools and MarylandBillTracker get
+a sync Anthropic client from. It is built once per process and API key on a
+pooled, keep-alive httpx transport. Connections are not shared across a fork,
+so a client created before gunicorn forks is rebuilt in each worker.
+
+Async clients are bound to the event loop they were created on, so they are
+cached per loop. Under an ASGI server that means one of each per worker.
+
+Every Anthropic request is counted as either a new connection (TCP connect,
+plus a TLS handshake for https) or a reused keep-alive connection;
+connection_stats() returns the counters for /health.
+
+All of these clients, and http_get() for sync website fetches, go through the
+record/replay layer in cassette.py when CASSETTE_MODE is set. Anthropic calls
+also wait for rate budget in rate_governor.py when a limit is configured.
+"""
+
+import os
+import asyncio
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+import anthropic
+import httpx
+import requests
+
+import cassette
+import rate_governor
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+ANTHROPIC_MAX_CONNECTIONS = int(os.getenv('ANTHROPIC_MAX_CONNECTIONS', '100'))
+ANTHROPIC_MAX_KEEPALIVE = int(os.getenv('ANTHROPIC_MAX_KEEPALIVE', '20'))
+ANTHROPIC_KEEPALIVE_EXPIRY = float(os.getenv('ANTHROPIC_KEEPALIVE_EXPIRY', '120'))
+ASYNC_HTTP_MAX_CONNECTIONS = int(os.getenv('ASYNC_HTTP_MAX_CONNECTIONS', '200'))
+
+_async_clients: Dict[str, Tuple[Optional[asyncio.AbstractEventLoop], Any]] = {}
+
+_sync_clients: Dict[Optional[str], anthropic.Anthropic] = {}
+_sync_clients_pid: Optional[int] = None
+_sync_lock = threading.Lock()
+
+
+# ============================================================================
+# CONNECTION REUSE COUNTERS
+# ============================================================================
+
+class ConnectionStats:
+    """Thread-safe counters for one pool of connections."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+        self.reused_connections = 0
+        self.tls_handshakes = 0
+
+    def record(self, connected: bool, tls: bool) -> None:
+        with self._lock:
+            self.requests += 1
+            if connected:
+                self.new_connections += 1
+            else:
+                self.reused_connections += 1
+            if tls:
+                self.tls_handshakes += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'new_connections': self.new_connections,
+                'reused_connections': self.reused_connections,
+                'tls_handshakes': self.tls_handshakes,
+                'reuse_ratio': round(self.reused_connections / self.requests, 3) if self.requests else None
+            }
+
+
+_stats: Dict[str, ConnectionStats] = {
+    'anthropic': ConnectionStats(),
+    'anthropic_async': ConnectionStats(),
+}
+
+
+def connection_stats() -> Dict[str, Dict[str, Any]]:
+    """Connection reuse counters for this process, keyed by pool."""
+    return {name: stats.snapshot() for name, stats in _stats.items()}
+
+
+class _ConnectionEvents:
+    """
+    httpcore trace hook for one request.
+
+    httpcore only emits connect_tcp / start_tls events when it opens a new
+    connection, so a request without them went out on a pooled one.
+    """
+
+    def __init__(self, previous=None):
+        self.previous = previous
+        self.connected = False
+        self.tls = False
+
+    def observe(self, event_name: str) -> None:
+        if event_name.startswith('connection.connect_tcp.started'):
+            self.connected = True
+        elif event_name.startswith('connection.start_tls.started'):
+            self.tls = True
+
+
+class CountingTransport(httpx.BaseTransport):
+    """Sync transport wrapper that records new vs reused connections."""
+
+    def __init__(self, transport: httpx.BaseTransport, stats: ConnectionStats):
+        self.transport = transport
+        self.stats = stats
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        events = _ConnectionEvents(request.extensions.get('trace'))
+
+        def trace(event_name, info):
+            events.observe(event_name)
+            if events.previous is not None:
+                events.previous(event_name, info)
+
+        request.extensions['trace'] = trace
+        try:
+            return self.transport.handle_request(request)
+        finally:
+            self.stats.record(events.connected, events.tls)
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class AsyncCountingTransport(httpx.AsyncBaseTransport):
+    """Async counterpart of CountingTransport (httpcore awaits the trace hook)."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, stats: ConnectionStats):
+        self.transport = transport
+        self.stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        events = _ConnectionEvents(request.extensions.get('trace'))
+
+        async def trace(event_name, info):
+            events.observe(event_name)
+            if events.previous is not None:
+                await events.previous(event_name, info)
+
+        request.extensions['trace'] = trace
+        try:
+            return await self.transport.handle_async_request(request)
+        finally:
+            self.stats.record(events.connected, events.tls)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+def anthropic_pool_limits(max_connections: int = ANTHROPIC_MAX_CONNECTIONS) -> httpx.Limits:
+    """Connection pool limits for Anthropic API clients."""
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=min(ANTHROPIC_MAX_KEEPALIVE, max_connections),
+        keepalive_expiry=ANTHROPIC_KEEPALIVE_EXPIRY
+    )
+
+
+# ============================================================================
+# SYNC CLIENTS
+# ============================================================================
+
+def get_anthropic_client(api_key: Optional[str] = None) -> anthropic.Anthropic:
+    """
+    Shared Anthropic client for this process.
+
+    Args:
+        api_key: API key to use (defaults to ANTHROPIC_API_KEY). One client is
+                 kept per key, so callers with their own key still share a pool.
+    """
+    global _sync_clients_pid
+
+    if api_key is None:
+        api_key = os.getenv('ANTHROPIC_API_KEY')
+
+    with _sync_lock:
+        if _sync_clients_pid != os.getpid():
+            # Forked child: the parent's sockets are not ours to reuse
+            _sync_clients.clear()
+            _sync_clients_pid = os.getpid()
+
+        client = _sync_clients.get(api_key)
+        if client is None:
+            transport = cassette.wrap(rate_governor.wrap(CountingTransport(
+                httpx.HTTPTransport(limits=anthropic_pool_limits()),
+                _stats['anthropic']
+            )))
+            client = anthropic.Anthropic(
+                api_key=api_key,
+                http_client=anthropic.DefaultHttpxClient(transport=transport)
+            )
+            _sync_clients[api_key] = client
+        return client
+
+
+# ============================================================================
+# ASYNC CLIENTS
+# ============================================================================
+
+def _cached_for_loop(name: str, factory):
+    """Return the client cached under name for the running loop, creating it if needed."""
+    loop = asyncio.get_running_loop()
+    cached = _async_clients.get(name)
+    if cached is None or cached[0] is not loop:
+        cached = (loop, factory())
+        _async_clients[name] = cached
+    return cached[1]
+
+
+def get_async_anthropic_client() -> anthropic.AsyncAnthropic:
+    """Shared AsyncAnthropic client for the running event loop."""
+    def build():
+        transport = cassette.wrap_async(rate_governor.wrap_async(AsyncCountingTransport(
+            # One event loop can have far more calls in flight than a thread pool
+            httpx.AsyncHTTPTransport(limits=anthropic_pool_limits(
+                max(ANTHROPIC_MAX_CONNECTIONS, ASYNC_HTTP_MAX_CONNECTIONS)
+            )),
+            _stats['anthropic_async']
+        )))
+        return anthropic.AsyncAnthropic(
+            api_key=os.getenv('ANTHROPIC_API_KEY'),
+            http_client=anthropic.DefaultAsyncHttpxClient(transport=transport)
+        )
+
+    return _cached_for_loop('anthropic', build)
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Shared httpx.AsyncClient for fetching customer websites."""
+    return _cached_for_loop(
+        'http',
+        lambda: httpx.AsyncClient(
+            follow_redirects=True,
+            transport=cassette.wrap_async(httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(
+                    max_connections=ASYNC_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=ASYNC_HTTP_MAX_CONNECTIONS // 4
+                )
+            ))
+        )
+    )
+
+
+# ============================================================================
+# SYNC WEBSITE FETCHES
+# ============================================================================
+
+def http_get(url: str, **kwargs) -> requests.Response:
+    """requests.get() for customer website fetches, recorded or replayed when CASSETTE_MODE is set."""
+    if not cassette.enabled():
+        return requests.get(url, **kwargs)
+    with requests.Session() as session:
+        adapter = cassette.CassetteAdapter()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session.get(url, **kwargs)
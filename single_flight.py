@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Single-Flight Request Coalescing
+================================
+Collapses concurrent identical tool calls into one execution.
+
+When a Make.com scenario fans out or retries, the same /enrich or /audit
+payload can arrive several times within seconds. The first request runs the
+tool; requests with the same key that arrive while it is still running wait
+for it and receive the same result instead of starting their own scrape and
+Claude call. Nothing is cached once the call finishes, so a later identical
+request runs again (result_cache.py covers that case).
+
+Coalescing is per server process: with gunicorn -w 4, at most four identical
+calls can be in flight at once instead of one per request.
+"""
+
+import json
+import asyncio
+import hashlib
+import threading
+from typing import Dict, Any, Callable, Awaitable, Tuple, TypeVar
+
+T = TypeVar('T')
+
+
+def request_key(name: str, payload: Dict[str, Any]) -> str:
+    """Canonical key for a call: same name and same JSON payload (key order ignored)."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return f"{name}:{hashlib.sha256(canonical.encode('utf-8')).hexdigest()}"
+
+
+class _Counters:
+    """Per-name counters shared by the sync and async implementations."""
+
+    def __init__(self):
+        self.executions: Dict[str, int] = {}
+        self.coalesced: Dict[str, int] = {}
+
+    def count(self, name: str, leader: bool) -> None:
+        counter = self.executions if leader else self.coalesced
+        counter[name] = counter.get(name, 0) + 1
+
+    def snapshot(self, in_flight: int) -> Dict[str, Any]:
+        names = sorted(set(self.executions) | set(self.coalesced))
+        return {
+            'in_flight': in_flight,
+            'upstream_calls_saved': sum(self.coalesced.values()),
+            'by_tool': {
+                name: {
+                    'executions': self.executions.get(name, 0),
+                    'coalesced': self.coalesced.get(name, 0)
+                }
+                for name in names
+            }
+        }
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Thread-based single-flight group (server.py)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._counters = _Counters()
+
+    def do(self, name: str, key: str, fn: Callable[[], T]) -> Tuple[T, bool]:
+        """
+        Run fn() unless an identical call is already in flight.
+
+        Returns:
+            Tuple of (result, shared) where shared is True if this caller
+            received another caller's result. Exceptions are shared the same way.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            self._counters.count(name, leader)
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return self._counters.snapshot(len(self._calls))
+
+
+class AsyncSingleFlight:
+    """asyncio single-flight group (asgi_server.py); one per event loop."""
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+        self._counters = _Counters()
+
+    async def do(self, name: str, key: str, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """
+        Await fn() unless an identical call is already in flight (see SingleFlight.do).
+
+        The call runs as its own task and every caller awaits it through
+        asyncio.shield(), so a disconnecting client (the first one included)
+        never cancels the result the others are waiting for.
+        """
+        task = self._calls.get(key)
+        self._counters.count(name, task is None)
+
+        if task is not None:
+            return await asyncio.shield(task), True
+
+        task = asyncio.ensure_future(fn())
+        self._calls[key] = task
+        task.add_done_callback(lambda finished: self._forget(key, finished))
+        return await asyncio.shield(task), False
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return self._counters.snapshot(len(self._calls))
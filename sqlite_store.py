@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+SQLite Store Helpers
+====================
+Connection handling shared by everything that keeps state in a local SQLite
+file: the result cache, chat sessions, the job queue, the rate governor and
+the HTTP cassette.
+
+Each store opens one short-lived autocommit connection per call, so any
+gunicorn worker, thread or tool subprocess can use it without sharing a
+connection. Databases run in WAL mode, so readers never wait on the writer.
+
+TTL + LRU tables (result_cache, chat_sessions) also share their eviction and
+error handling: evict() drops expired rows and the least recently read ones
+past a table's limit, and degrade() logs a database error and lets the
+caller carry on as if nothing was stored.
+
+Usage:
+    init_db(path, SCHEMA)
+    with connect(path) as conn:
+        row = conn.execute('SELECT ...').fetchone()
+
+    row = None
+    with degrade('cache_error', 'read', cache='audit'):
+        with connect(path) as conn:
+            row = conn.execute('SELECT ...').fetchone()
+"""
+
+import logging
+import sqlite3
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+import request_log
+
+
+@contextmanager
+def connect(path: str) -> Iterator[sqlite3.Connection]:
+    """An autocommit connection with dict-style rows, closed on exit."""
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def init_db(path: str, schema: str) -> None:
+    """Switch the database to WAL mode and create its tables if they are missing."""
+    with connect(path) as conn:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.executescript(schema)
+
+
+def evict(conn: sqlite3.Connection, table: str, key_column: str, max_rows: int, now: float) -> None:
+    """Delete expired rows, then all but the max_rows most recently read (needs expires_at and last_accessed)."""
+    conn.execute(f'DELETE FROM {table} WHERE expires_at <= ?', (now,))
+    conn.execute(
+        f'DELETE FROM {table} WHERE {key_column} IN ('
+        f'SELECT {key_column} FROM {table} ORDER BY last_accessed DESC LIMIT -1 OFFSET ?)',
+        (max_rows,)
+    )
+
+
+@contextmanager
+def degrade(event: str, action: str, **fields: Any) -> Iterator[None]:
+    """Log a database error in the block as `event` instead of raising it."""
+    try:
+        yield
+    except sqlite3.Error as e:
+        request_log.log_event(event, logging.WARNING, action=action, error=str(e), **fields)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Tests for admission control
+===========================
+Usage:
+    python -m pytest test_admission.py
+"""
+
+import threading
+
+from admission import AdmissionController, parse_limits
+import server
+
+
+def test_parse_limits_overrides_defaults():
+    assert parse_limits('audit=1, chat=12', {'audit': 2, 'enrich': 3}) == {'audit': 1, 'enrich': 3, 'chat': 12}
+
+
+def test_queue_overflow_rejected_and_reserved_slots_kept_for_chat():
+    control = AdmissionController({'audit': 4, 'chat': 4}, {'audit': 1, 'chat': 1},
+                                  capacity=4, reserved={'chat': 2}, queue_timeout=0.05)
+    audits = [control.acquire('audit') for _ in range(2)]
+    assert all(ticket.admitted for ticket in audits)
+
+    # Shared slots used up: the next audit waits out its queue, the one after is rejected outright
+    assert control.acquire('audit').reason == 'queue_timeout'
+    waiter = threading.Thread(target=control.acquire, args=('audit',))
+    waiter.start()
+    while control.stats()['by_endpoint']['audit']['queued'] == 0:
+        pass
+    rejected = control.acquire('audit')
+    waiter.join()
+    assert rejected.reason == 'queue_full' and rejected.retry_after >= 1
+
+    # Chat still gets the reserved capacity
+    chats = [control.acquire('chat') for _ in range(2)]
+    assert all(ticket.admitted for ticket in chats)
+
+    for ticket in audits + chats:
+        control.release(ticket)
+    assert control.stats()['running'] == 0
+
+
+def test_server_rejects_with_429_and_retry_after(monkeypatch):
+    monkeypatch.setattr(server, 'admission', AdmissionController({'qualify': 0}, {'qualify': 0}, capacity=1))
+    response = server.app.test_client().post('/qualify', json={'company_name': 'Acme'})
+
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    assert response.get_json()['reason'] == 'queue_full'
+
+
+def test_jobs_run_on_their_own_threads(monkeypatch):
+    monkeypatch.setattr(server, 'EXECUTION_MODE', 'inprocess')
+    monkeypatch.setitem(server._tool_handlers, 'mca_qualification.py', lambda data: {'thread': threading.current_thread().name})
+
+    result, status = server.run_job('qualify', {'company_name': 'Acme'})
+    assert status == 200 and result['thread'].startswith('job-tool')
+    assert server.run_in_process('mca_qualification.py', {}, timeout=5)[0]['thread'].startswith('tool')
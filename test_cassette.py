@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Tests for record/replay cassettes
+=================================
+Usage:
+    python -m pytest test_cassette.py
+"""
+
+import httpx
+import requests
+
+import cassette
+
+
+def test_recorded_call_replays_offline_in_sync_async_and_requests(tmp_path, monkeypatch):
+    monkeypatch.setattr(cassette, '_store', cassette.CassetteStore(str(tmp_path / 'cassettes.db')))
+    monkeypatch.setattr(cassette, 'CASSETTE_LATENCY_SCALE', 0)
+    calls = []
+
+    def upstream(request):
+        calls.append(request)
+        return httpx.Response(200, json={'n': len(calls)})
+
+    recorder = httpx.Client(transport=cassette.CassetteTransport(httpx.MockTransport(upstream), mode='record'))
+    # Same body, different key order and API key: one request, recorded twice
+    recorder.post('https://api.example.com/v1/messages', json={'a': 1, 'b': 2}, headers={'x-api-key': 'one'})
+    recorder.post('https://api.example.com/v1/messages', content=b'{"b": 2, "a": 1}', headers={'x-api-key': 'two'})
+    assert cassette.get_store().stats()['requests'] == 1
+
+    def offline(request):
+        raise AssertionError('replay must not touch the network')
+
+    replayer = httpx.Client(transport=cassette.CassetteTransport(httpx.MockTransport(offline), mode='replay'))
+    replies = [replayer.post('https://api.example.com/v1/messages', json={'b': 2, 'a': 1}).json() for _ in range(3)]
+    assert replies == [{'n': 1}, {'n': 2}, {'n': 1}]
+    assert replayer.post('https://api.example.com/v1/other', json={}).status_code == 404
+
+    with requests.Session() as session:
+        session.mount('https://', cassette.CassetteAdapter(mode='replay'))
+        assert session.post('https://api.example.com/v1/messages', json={'a': 1, 'b': 2}).json() == {'n': 2}
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests for request deadline propagation
+======================================
+Usage:
+    python -m pytest test_deadline.py
+"""
+
+import json
+import time
+
+import anthropic
+import httpx
+import pytest
+
+import chat_sessions
+import chatbot
+import deadline
+
+
+def test_stages_are_sized_to_the_time_left():
+    @deadline.from_input
+    def handler(params):
+        return params, deadline.remaining()
+
+    params, left = handler({'url': 'x', '_deadline': time.time() + 10})
+    assert params == {'url': 'x'} and left == pytest.approx(10, abs=0.5)
+    assert handler({'url': 'x'}) == ({'url': 'x'}, None)
+
+    with deadline.bound(time.time() + 10):
+        assert deadline.stage_timeout(30, reserve=4) == pytest.approx(6, abs=0.5)
+        assert deadline.output_tokens(4096) == pytest.approx(8 * deadline.DEADLINE_OUTPUT_TOKENS_PER_SECOND, abs=50)
+    with deadline.bound(time.time() + 2):
+        with pytest.raises(deadline.DeadlineExceeded):
+            deadline.output_tokens(4096)
+    assert deadline.output_tokens(4096) == 4096
+
+
+def test_chat_cut_short_by_deadline_returns_partial_reply(monkeypatch):
+    sent = []
+
+    def handler(request):
+        sent.append(json.loads(request.content))
+        return httpx.Response(200, json={
+            'id': 'msg_test', 'type': 'message', 'role': 'assistant', 'model': 'test',
+            'content': [{'type': 'text', 'text': 'Our propane system replaces paper'}],
+            'stop_reason': 'max_tokens', 'stop_sequence': None,
+            'usage': {'input_tokens': 1, 'output_tokens': 1}
+        })
+
+    client = anthropic.Anthropic(api_key='test', http_client=httpx.Client(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(chatbot, 'ANTHROPIC_API_KEY', 'test')
+    monkeypatch.setattr(chatbot, 'get_anthropic_client', lambda api_key=None: client)
+    monkeypatch.setattr(chat_sessions, '_store', chat_sessions.ChatSessionStore(path=None))
+
+    result = chatbot.chat({'message': 'Tell me about propane', '_deadline': time.time() + 12})
+
+    assert sent[0]['max_tokens'] < chatbot.MAX_TOKENS
+    assert result['partial'] is True
+    assert result['response'] == 'Our propane system replaces paper'
+    stored = chat_sessions.get_store().get(result['session_id'])['messages']
+    assert stored[-2:] == [{'role': 'user', 'content': 'Tell me about propane'},
+                           {'role': 'assistant', 'content': 'Our propane system replaces paper'}]
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Tests for batch enrichment
+==========================
+Usage:
+    python -m pytest test_enrich_batch.py
+"""
+
+import time
+
+import pytest
+
+import lead_enrichment
+
+
+def fake_handle_request(params, fetch_slots=None, llm_slots=None):
+    if params['domain'] == 'broken.com':
+        raise ValueError('fetch failed')
+    if params['domain'] == 'slow.com':
+        time.sleep(0.2)
+    return {'enrichment_metadata': {'domain': params['domain'], 'cache': 'miss'}}
+
+
+def test_results_stream_in_completion_order_with_item_errors(monkeypatch):
+    monkeypatch.setattr(lead_enrichment, 'handle_request', fake_handle_request)
+
+    lines = list(lead_enrichment.enrich_batch(
+        ['slow.com', 'fast.com', 'broken.com', {'company': 'no domain'}],
+        fetch_concurrency=4, llm_concurrency=4
+    ))
+    results, summary = lines[:-1], lines[-1]
+
+    assert [line['index'] for line in results][-1] == 0  # slow.com finishes last
+    assert {line['index']: line['status'] for line in results} == {0: 'ok', 1: 'ok', 2: 'error', 3: 'error'}
+    assert summary['type'] == 'summary'
+    assert (summary['total'], summary['succeeded'], summary['failed']) == (4, 2, 2)
+
+
+def test_duplicate_rows_enriched_once(monkeypatch):
+    calls = []
+    monkeypatch.setattr(lead_enrichment, 'handle_request',
+                        lambda params, *slots: calls.append(params['domain']) or fake_handle_request(params))
+
+    lines = list(lead_enrichment.enrich_batch(['stripe.com', 'https://www.stripe.com/', 'fast.com']))
+
+    assert len(lines) == 4
+    assert sorted(calls) == ['fast.com', 'stripe.com']
+
+
+def test_parse_batch_request_caps_concurrency():
+    options = lead_enrichment.parse_batch_request({'domains': ['a.com'], 'llm_concurrency': 1000})
+    assert options['llm_concurrency'] == lead_enrichment.BATCH_LLM_CONCURRENCY
+
+    with pytest.raises(ValueError):
+        lead_enrichment.parse_batch_request({'domains': []})
+    with pytest.raises(ValueError):
+        lead_enrichment.parse_batch_request({'domains': ['a.com'], 'fetch_concurrency': 0})
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Tests for fast JSON and response compression
+============================================
+Usage:
+    python -m pytest test_http_encoding.py
+"""
+
+import gzip
+import json
+import math
+
+import fast_json
+import http_encoding
+import server
+
+
+def test_fast_json_round_trips_what_orjson_cannot_encode():
+    value = {'big': 2 ** 70, 'text': 'café', 1: [1.5, None]}
+    assert fast_json.loads(fast_json.dumps(value)) == {'big': 2 ** 70, 'text': 'café', '1': [1.5, None]}
+    assert math.isnan(fast_json.loads('{"ratio": NaN}')['ratio'])
+    assert http_encoding.choose_encoding('gzip;q=1.0, br;q=0') == 'gzip'
+    assert http_encoding.choose_encoding('identity') is None
+
+
+def test_large_responses_compressed_only_when_accepted(monkeypatch):
+    report = {'findings': [f'Finding number {i}' for i in range(200)]}
+    monkeypatch.setattr(server, 'run_tool', lambda *args, **kwargs: (report, 200))
+    client = server.app.test_client()
+    body = {'company_name': 'Acme', 'annual_revenue': 1, 'credit_score': 700, 'business_age_months': 12}
+
+    compressed = client.post('/qualify', json=body, headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+    assert json.loads(gzip.decompress(compressed.get_data())) == report
+
+    plain = client.post('/qualify', json=body)
+    assert 'Content-Encoding' not in plain.headers and plain.get_json() == report
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Tests for chatbot industry detection
+====================================
+Usage:
+    python -m pytest test_industry_detection.py
+"""
+
+import chat_sessions
+import chatbot
+from test_prompt_cache import mock_claude
+
+
+def test_keywords_are_weighted_and_matched_on_word_boundaries():
+    classifier = chatbot.IndustryClassifier({
+        'industries': {'trucking': {'bol': 2, 'freight': 3}, 'field-services': {'plumb*': 3, 'dispatch*': 1}},
+        'page_types': {'logistics': 'trucking'}
+    })
+
+    assert classifier.scores('A symbol, not a BOL') == {'trucking': 2.0}
+    assert classifier.scores('Plumbers dispatching freight') == {'field-services': 4.0, 'trucking': 3.0}
+    assert classifier.best({'trucking': 3.0, 'field-services': 3.0}) == 'trucking'
+    assert chatbot.detect_industry('How much is it?', [], 'agencies') == 'agency'
+    assert chatbot.detect_industry('How much is it?', [{'role': 'user', 'content': 'We haul freight'}],
+                                   'homepage') == 'trucking'
+    assert chatbot.detect_industry('What does ResultantAI do?', [], 'homepage') == 'general'
+
+
+def test_session_tally_replaces_rescanning_history(monkeypatch):
+    mock_claude(monkeypatch, [], {'input_tokens': 40, 'output_tokens': 12})
+    first = chatbot.chat({'message': 'We deliver propane and heating oil', 'page_context': {'page_type': 'homepage'}})
+    session_id = first['session_id']
+    assert chat_sessions.get_store().get(session_id)['industry_tally'] == {'propane': 6.0}
+
+    def rescan(messages):
+        raise AssertionError('history rescanned')
+
+    monkeypatch.setattr(chatbot, 'history_tally', rescan)
+    second = chatbot.chat({'message': 'How much does it cost?', 'session_id': session_id,
+                           'page_context': {'page_type': 'homepage'}})
+
+    assert second['detected_industry'] == 'propane'
+    assert chat_sessions.get_store().get(session_id)['industry_tally'] == {'propane': 6.0}
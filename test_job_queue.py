@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite job queue
+==============================
+Usage:
+    python -m pytest test_job_queue.py
+"""
+
+import sqlite3
+import time
+
+import job_queue
+from job_queue import JobQueue, JobExecutor
+import server
+
+
+def test_enqueue_claim_complete(tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs.db'))
+    job_id = queue.enqueue('enrich', {'domain': 'stripe.com'})
+
+    assert queue.get(job_id)['status'] == 'queued'
+
+    job = queue.claim_next()
+    assert job == {'id': job_id, 'kind': 'enrich', 'payload': {'domain': 'stripe.com'}}
+    assert queue.get(job_id)['status'] == 'running'
+    assert queue.claim_next() is None
+
+    queue.complete(job_id, {'lead_score': 72}, 200)
+    finished = queue.get(job_id)
+    assert finished['status'] == 'succeeded'
+    assert finished['result'] == {'lead_score': 72}
+    assert finished['attempts'] == 1
+
+
+def test_failed_status_and_unknown_job(tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs.db'))
+    job_id = queue.enqueue('audit', {'url': 'https://example.com', 'industry': 'SaaS'})
+    queue.claim_next()
+    queue.complete(job_id, {'error': 'timed out'}, 504)
+
+    assert queue.get(job_id)['status'] == 'failed'
+    assert queue.get(job_id)['http_status'] == 504
+    assert queue.get('missing') is None
+
+
+def test_stale_running_job_is_requeued(tmp_path, monkeypatch):
+    queue = JobQueue(str(tmp_path / 'jobs.db'))
+    job_id = queue.enqueue('qualify', {'company_name': 'Acme'})
+    queue.claim_next()
+
+    monkeypatch.setattr(job_queue, 'JOB_STALE_SECONDS', -1)
+    reclaimed = queue.claim_next()
+    assert reclaimed['id'] == job_id
+    assert queue.get(job_id)['attempts'] == 2
+
+
+def test_stale_job_fails_after_max_attempts(tmp_path, monkeypatch):
+    queue = JobQueue(str(tmp_path / 'jobs.db'))
+    job_id = queue.enqueue('audit', {'url': 'https://example.com', 'industry': 'SaaS'})
+    monkeypatch.setattr(job_queue, 'JOB_MAX_ATTEMPTS', 2)
+    monkeypatch.setattr(job_queue, 'JOB_STALE_SECONDS', -1)
+
+    assert queue.claim_next()['id'] == job_id
+    assert queue.claim_next()['id'] == job_id
+    assert queue.claim_next() is None
+
+    failed = queue.get(job_id)
+    assert failed['status'] == 'failed' and failed['attempts'] == 2
+    assert failed['http_status'] == 500
+    assert 'abandoned after 2 attempts' in failed['result']['error']
+
+
+def test_executor_runs_jobs(tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs.db'))
+    executor = JobExecutor(queue, lambda kind, payload: ({'kind': kind, **payload}, 200), workers=1)
+    executor.ensure_started()
+
+    job_id = queue.enqueue('enrich', {'domain': 'stripe.com'})
+    executor.notify()
+
+    for _ in range(50):
+        if queue.get(job_id)['status'] == 'succeeded':
+            break
+        time.sleep(0.05)
+
+    assert queue.get(job_id)['result'] == {'kind': 'enrich', 'domain': 'stripe.com'}
+
+
+def test_executor_survives_a_failed_complete(tmp_path, monkeypatch):
+    queue = JobQueue(str(tmp_path / 'jobs.db'))
+    complete, failures = queue.complete, []
+
+    def flaky_complete(job_id, result, http_status):
+        if not failures:
+            failures.append(job_id)
+            raise sqlite3.OperationalError('database is locked')
+        complete(job_id, result, http_status)
+
+    monkeypatch.setattr(queue, 'complete', flaky_complete)
+    executor = JobExecutor(queue, lambda kind, payload: (payload, 200), workers=1)
+    executor.ensure_started()
+
+    first = queue.enqueue('enrich', {'domain': 'stripe.com'})
+    second = queue.enqueue('enrich', {'domain': 'acme.com'})
+    executor.notify()
+
+    for _ in range(50):
+        if queue.get(second)['status'] == 'succeeded':
+            break
+        time.sleep(0.05)
+
+    assert failures == [first] and queue.get(first)['status'] == 'running'
+    assert queue.get(second)['result'] == {'domain': 'acme.com'}
+
+
+def test_server_starts_job_executor_on_first_job_request(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, '_job_executor', None)
+    monkeypatch.setattr(server, 'JobQueue', lambda: JobQueue(str(tmp_path / 'jobs.db')))
+    monkeypatch.setattr(server, 'run_job', lambda kind, payload: ({'kind': kind}, 200))
+    client = server.app.test_client()
+
+    response = client.post('/jobs/enrich', json={'domain': 'stripe.com'})
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+
+    for _ in range(50):
+        job = client.get(f'/jobs/{job_id}').get_json()
+        if job['status'] == 'succeeded':
+            break
+        time.sleep(0.05)
+
+    assert job['result'] == {'kind': 'enrich'}
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Tests for retried and hedged LLM calls
+======================================
+Usage:
+    python -m pytest test_llm_calls.py
+"""
+
+import time
+import itertools
+import threading
+
+import anthropic
+import httpx
+import pytest
+
+import deadline
+import llm_calls
+
+MESSAGE = {
+    'id': 'msg_test', 'type': 'message', 'role': 'assistant', 'model': 'test',
+    'content': [{'type': 'text', 'text': 'ok'}], 'stop_reason': 'end_turn', 'stop_sequence': None,
+    'usage': {'input_tokens': 1, 'output_tokens': 1}
+}
+REQUEST = {'model': 'test', 'max_tokens': 10, 'messages': [{'role': 'user', 'content': 'hi'}]}
+
+
+def client_for(handler):
+    return anthropic.Anthropic(api_key='test', http_client=httpx.Client(transport=httpx.MockTransport(handler)))
+
+
+def test_overloaded_responses_are_retried_then_fatal_errors_raised(monkeypatch):
+    monkeypatch.setattr(llm_calls, 'backoff_seconds', lambda attempt, error=None: 0)
+    statuses = iter([529, 529, 200])
+    calls = []
+
+    def handler(request):
+        status = next(statuses)
+        calls.append(status)
+        if status != 200:
+            return httpx.Response(status, json={'type': 'error', 'error': {'type': 'overloaded_error', 'message': 'x'}})
+        return httpx.Response(200, json=MESSAGE)
+
+    assert llm_calls.create_message('test_tool', client_for(handler), **REQUEST).content[0].text == 'ok'
+    assert calls == [529, 529, 200]
+
+    bad_request = client_for(lambda request: httpx.Response(
+        400, json={'type': 'error', 'error': {'type': 'invalid_request_error', 'message': 'bad'}}))
+    with pytest.raises(anthropic.BadRequestError):
+        llm_calls.create_message('test_tool', bad_request, **REQUEST)
+
+    # Out of retries near the deadline: the API error, not a deadline partial
+    monkeypatch.setattr(llm_calls, 'LLM_MAX_RETRIES', 0)
+    monkeypatch.setattr(llm_calls, 'backoff_seconds', lambda attempt, error=None: 60)
+    overloaded = client_for(lambda request: httpx.Response(
+        529, json={'type': 'error', 'error': {'type': 'overloaded_error', 'message': 'x'}}))
+    with deadline.bound(time.time() + 10), pytest.raises(anthropic.APIStatusError):
+        llm_calls.create_message('test_tool', overloaded, **REQUEST)
+
+
+def test_slow_call_is_hedged_and_first_response_wins(monkeypatch):
+    monkeypatch.setattr(llm_calls, 'LLM_HEDGE_TOOLS', {'hedged_tool'})
+    monkeypatch.setattr(llm_calls, 'LLM_HEDGE_MIN_DELAY_SECONDS', 0.05)
+    for _ in range(llm_calls.LLM_HEDGE_MIN_SAMPLES):
+        llm_calls.observe_latency('hedged_tool', 0.01)
+
+    counter = itertools.count()
+    released = threading.Event()
+
+    def handler(request):
+        if next(counter) == 0:
+            released.wait(2)  # the original request stalls
+        return httpx.Response(200, json=MESSAGE)
+
+    started = time.perf_counter()
+    message = llm_calls.create_message('hedged_tool', client_for(handler), **REQUEST)
+    released.set()
+
+    assert message.content[0].text == 'ok'
+    assert time.perf_counter() - started < 1
+    assert llm_calls.hedge_delay('unhedged_tool') is None
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for Prometheus metrics
+============================
+Usage:
+    python -m pytest test_metrics.py
+"""
+
+import os
+import sys
+import asyncio
+import subprocess
+
+import pytest
+from prometheus_client import REGISTRY, CollectorRegistry, multiprocess
+
+import metrics
+import server
+
+
+def stage_count(tool, stage):
+    return REGISTRY.get_sample_value('tool_stage_duration_seconds_count', {'tool': tool, 'stage': stage}) or 0
+
+
+def test_timed_records_sync_and_async_stages():
+    @metrics.timed('test_tool', 'fetch')
+    def fetch():
+        return 'page'
+
+    @metrics.timed('test_tool', 'fetch')
+    async def fetch_async():
+        raise ValueError('unreachable')
+
+    before = stage_count('test_tool', 'fetch')
+    assert fetch() == 'page'
+    with pytest.raises(ValueError):
+        asyncio.run(fetch_async())
+    assert stage_count('test_tool', 'fetch') == before + 2
+
+
+def test_with_timings_reports_stages_and_total():
+    @metrics.with_timings
+    def tool(params):
+        with metrics.stage_timer('test_tool', 'llm'):
+            pass
+        with metrics.stage_timer('test_tool', 'llm'):
+            pass
+        return {'ok': True}
+
+    result = tool({})
+    assert set(result['timings']) == {'llm_ms', 'total_ms'}
+    assert result['timings']['total_ms'] >= result['timings']['llm_ms']
+
+
+def test_metrics_endpoint_counts_requests_and_timeouts(monkeypatch):
+    monkeypatch.setattr(server, 'run_in_process', lambda script_name, data, timeout, executor=None: ({'error': 'timed out'}, 504))
+    client = server.app.test_client()
+
+    client.post('/qualify', json={'company_name': 'Acme', 'annual_revenue': 500000,
+                                  'credit_score': 650, 'business_age_months': 24})
+    body = client.get('/metrics').get_data(as_text=True)
+
+    assert 'http_requests_total{endpoint="/qualify",method="POST",status="504"}' in body
+    assert REGISTRY.get_sample_value('tool_timeouts_total', {'tool': 'mca_qualification'}) >= 1
+
+
+def test_tool_subprocesses_reuse_metrics_files(tmp_path, monkeypatch):
+    monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(tmp_path))
+    for _ in range(3):
+        with metrics.child_process_env() as env:
+            subprocess.run([sys.executable, '-c', "import metrics; metrics.record_timeout('lead_enrichment')"],
+                           env=env, cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+
+    assert len(list(tmp_path.iterdir())) == 1
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=str(tmp_path))
+    assert registry.get_sample_value('tool_timeouts_total', {'tool': 'lead_enrichment'}) == 3
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests for chatbot system prompt slicing and caching
+===================================================
+Usage:
+    python -m pytest test_prompt_cache.py
+"""
+
+import json
+
+import anthropic
+import httpx
+from prometheus_client import REGISTRY
+
+import chat_sessions
+import chatbot
+
+
+def prompt_blocks(messages):
+    """Messages as the API sees them: string content is one text block; breakpoints dropped."""
+    return [{**message, 'content': [{key: value for key, value in block.items() if key != 'cache_control'}
+                                     for block in message['content']]}
+            if isinstance(message['content'], list)
+            else {**message, 'content': [{'type': 'text', 'text': message['content']}]}
+            for message in messages]
+
+
+def mock_claude(monkeypatch, sent, usage):
+    def handler(request):
+        sent.append(json.loads(request.content))
+        return httpx.Response(200, json={
+            'id': 'msg_test', 'type': 'message', 'role': 'assistant', 'model': 'test',
+            'content': [{'type': 'text', 'text': 'We digitize propane delivery tickets.'}],
+            'stop_reason': 'end_turn', 'stop_sequence': None, 'usage': usage
+        })
+
+    client = anthropic.Anthropic(api_key='test', http_client=httpx.Client(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(chatbot, 'ANTHROPIC_API_KEY', 'test')
+    monkeypatch.setattr(chatbot, 'get_anthropic_client', lambda api_key=None: client)
+    monkeypatch.setattr(chat_sessions, '_store', chat_sessions.ChatSessionStore(path=None))
+
+
+def test_system_prompt_and_last_message_are_cache_breakpoints(monkeypatch):
+    sent = []
+    mock_claude(monkeypatch, sent, {'input_tokens': 40, 'output_tokens': 12,
+                                    'cache_read_input_tokens': 2200, 'cache_creation_input_tokens': 90})
+    before = REGISTRY.get_sample_value('anthropic_tokens_total', {'tool': 'chatbot', 'type': 'cache_read'}) or 0
+
+    result = chatbot.chat({'message': 'Tell me about propane', 'page_context': {'page_type': 'propane'}})
+
+    assert sent[0]['system'] == [{'type': 'text', 'text': chatbot.SYSTEM_PROMPT_VARIANTS['propane'],
+                                  'cache_control': {'type': 'ephemeral'}}]
+    assert sent[0]['messages'][-1]['content'][-1]['cache_control'] == {'type': 'ephemeral'}
+    assert all('cache_control' not in json.dumps(message) for message in sent[0]['messages'][:-1])
+    assert result['usage'] == {'input_tokens': 40, 'output_tokens': 12,
+                               'cache_read_input_tokens': 2200, 'cache_creation_input_tokens': 90}
+    assert REGISTRY.get_sample_value('anthropic_tokens_total', {'tool': 'chatbot', 'type': 'cache_read'}) == before + 2200
+
+
+def test_system_prompt_sliced_to_detected_industry():
+    propane = chatbot.system_prompt_for('propane')
+    assert 'PROPANE COMPETITORS' in propane and 'Core ($20K)' in propane
+    assert 'CONCRETE COMPETITORS' not in propane and 'Wayne Conn' not in propane
+    assert len(propane) < len(chatbot.SYSTEM_PROMPT)
+    assert chatbot.system_prompt_for('agencies') == chatbot.SYSTEM_PROMPT_VARIANTS['agency']
+    assert chatbot.system_prompt_for('general') == chatbot.SYSTEM_PROMPT
+    assert all(chatbot.INDUSTRY_CONTEXT[industry] in chatbot.SYSTEM_PROMPT for industry in chatbot.INDUSTRY_CONTEXT)
+
+
+def test_next_turn_starts_with_the_cached_prefix(monkeypatch):
+    sent = []
+    mock_claude(monkeypatch, sent, {'input_tokens': 40, 'output_tokens': 12})
+    page_context = {'page_type': 'propane'}
+    # js/chatbot.js records its welcome message, so history is never empty
+    history = [{'role': 'assistant', 'content': chatbot.get_welcome_message('propane')}]
+
+    first = chatbot.chat({'message': 'Tell me about propane', 'conversation_history': history,
+                          'page_context': page_context})
+    history += [{'role': 'user', 'content': 'Tell me about propane'},
+                {'role': 'assistant', 'content': first['response']}]
+    chatbot.chat({'message': 'How much does it cost?', 'conversation_history': history,
+                  'page_context': page_context})
+
+    first_turn, second_turn = (prompt_blocks(body['messages']) for body in sent)
+    assert second_turn[:len(first_turn)] == first_turn
+    assert first['usage']['cache_read_input_tokens'] == 0
+
+
+def test_passing_keyword_keeps_the_cached_prefix(monkeypatch):
+    sent = []
+    mock_claude(monkeypatch, sent, {'input_tokens': 40, 'output_tokens': 12})
+    first = chatbot.chat({'message': 'We deliver propane and heating oil', 'page_context': {'page_type': 'homepage'}})
+    second = chatbot.chat({'message': 'Could it also help our HVAC techs?', 'session_id': first['session_id'],
+                           'page_context': {'page_type': 'homepage'}})
+
+    assert second['detected_industry'] == 'field-services'
+    first_turn, second_turn = ({**body, 'messages': prompt_blocks(body['messages'])} for body in sent)
+    assert second_turn['system'] == first_turn['system']
+    assert second_turn['messages'][:len(first_turn['messages'])] == first_turn['messages']
+
+    # A clear lead switches the variant; two close industries get the full prompt
+    assert chatbot.prompt_industry('propane', 'field-services', {'propane': 6, 'field-services': 12}) == 'field-services'
+    assert chatbot.prompt_industry('propane', 'field-services', {'propane': 6, 'field-services': 9}) == 'general'
+    assert chatbot.prompt_industry('general', 'trucking', {'trucking': 3}) == 'trucking'
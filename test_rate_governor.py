@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests for the Anthropic rate governor
+=====================================
+Usage:
+    python -m pytest test_rate_governor.py
+"""
+
+import time
+
+import anthropic
+import httpx
+import pytest
+
+import deadline
+import llm_calls
+import rate_governor
+from rate_governor import TokenBucketGovernor, GovernorTransport, estimate_input_tokens
+
+MESSAGE = {'id': 'msg_test', 'type': 'message', 'role': 'assistant', 'model': 'test',
+           'content': [{'type': 'text', 'text': 'ok'}], 'stop_reason': 'end_turn', 'stop_sequence': None,
+           'usage': {'input_tokens': 1, 'output_tokens': 1}}
+
+
+def test_estimate_counts_system_messages_and_blocks():
+    body = {
+        'system': [{'type': 'text', 'text': 'x' * 400}],
+        'messages': [{'role': 'user', 'content': 'y' * 400},
+                     {'role': 'assistant', 'content': [{'type': 'text', 'text': 'z' * 400}]}]
+    }
+    assert estimate_input_tokens(body) == 300 + 4 * 3
+
+
+def test_reservations_queue_across_workers_and_cap_the_wait(tmp_path):
+    path = str(tmp_path / 'governor.db')
+    # 60 RPM = one per second, with two seconds of burst
+    worker_a = TokenBucketGovernor({'requests': 60, 'input_tokens': 0}, path, burst_seconds=2, max_wait=3)
+    worker_b = TokenBucketGovernor({'requests': 60}, path, burst_seconds=2, max_wait=3)
+
+    assert worker_a.reserve({'requests': 1, 'input_tokens': 10**6})[0] == 0
+    assert worker_b.reserve({'requests': 1})[0] == 0
+    wait_a, limited_by = worker_a.reserve({'requests': 1})
+    wait_b, _ = worker_b.reserve({'requests': 1})
+    assert limited_by == 'requests'
+    assert wait_a == pytest.approx(1, abs=0.1) and wait_b == pytest.approx(2, abs=0.1)
+
+    # Past max_wait nothing is reserved, so the next caller's wait doesn't grow
+    assert worker_a.reserve({'requests': 2}) == (None, 'requests')
+    assert worker_b.reserve({'requests': 1})[0] == pytest.approx(3, abs=0.1)
+
+
+def test_transport_fails_locally_instead_of_waiting_too_long(tmp_path, monkeypatch):
+    governor = TokenBucketGovernor({'requests': 60}, str(tmp_path / 'governor.db'), burst_seconds=1, max_wait=0)
+    monkeypatch.setattr(rate_governor, 'get_governor', lambda: governor)
+    sent = []
+    client = httpx.Client(transport=GovernorTransport(httpx.MockTransport(
+        lambda request: sent.append(request) or httpx.Response(200, json={})
+    )))
+
+    assert client.post('https://api.anthropic.com/v1/messages', json={'messages': []}).status_code == 200
+    rejected = client.post('https://api.anthropic.com/v1/messages', json={'messages': []})
+    assert rejected.status_code == 429 and rejected.headers['x-should-retry'] == 'false'
+    assert len(sent) == 1
+
+
+def test_wait_for_budget_is_cut_to_the_request_deadline(tmp_path, monkeypatch):
+    governor = TokenBucketGovernor({'requests': 60}, str(tmp_path / 'governor.db'), burst_seconds=1, max_wait=60)
+    monkeypatch.setattr(rate_governor, 'get_governor', lambda: governor)
+    sent = []
+    client = anthropic.Anthropic(api_key='test', http_client=httpx.Client(transport=GovernorTransport(
+        httpx.MockTransport(lambda request: sent.append(request) or httpx.Response(200, json=MESSAGE))
+    )))
+
+    with deadline.bound(time.time() + 10):
+        llm_calls.create_message('test', client, model='test', max_tokens=10, messages=[])
+        governor.pause(30)
+        started = time.monotonic()
+        with pytest.raises(deadline.DeadlineExceeded):
+            llm_calls.create_message('test', client, model='test', max_tokens=10, messages=[])
+    assert time.monotonic() - started < 1 and len(sent) == 1
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Tests for structured request logging
+====================================
+Usage:
+    python -m pytest test_request_log.py
+"""
+
+import request_log
+import server
+
+
+def test_payloads_sampled_truncated_and_always_logged_on_failure(monkeypatch):
+    lines = []
+    monkeypatch.setattr(request_log, 'log_event', lambda event, level=None, **fields: lines.append((event, fields)))
+    monkeypatch.setattr(request_log, 'LOG_SAMPLE_RATE', 0.0)
+    request_log.begin_request()
+
+    request_log.log_payload('tool_input', {'message': 'hi'})
+    assert lines == []
+
+    request_log.log_payload('tool_input', {'message': 'x' * 5000}, failed=True)
+    assert len(lines) == 1
+    assert len(lines[0][1]['payload']) < 2100
+    assert lines[0][1]['payload'].endswith('more chars]')
+
+
+def test_request_id_echoed_or_generated():
+    client = server.app.test_client()
+
+    assert client.get('/health', headers={'X-Request-ID': 'make-run-42'}).headers['X-Request-ID'] == 'make-run-42'
+
+    generated = client.get('/health', headers={'X-Request-ID': 'bad id; drop'}).headers['X-Request-ID']
+    assert generated != 'bad id; drop' and len(generated) == 32
+
+
+def test_in_process_tools_log_with_the_request_id(monkeypatch):
+    seen = []
+    monkeypatch.setitem(server._tool_handlers, 'fake_tool.py',
+                        lambda params: seen.append(request_log.current_request_id()) or {'ok': True})
+    request_log.begin_request('make-run-43')
+
+    assert server.run_in_process('fake_tool.py', {}, timeout=5) == ({'ok': True}, 200)
+    assert seen == ['make-run-43']
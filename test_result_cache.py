@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tests for the persistent result cache
+=====================================
+Usage:
+    python -m pytest test_result_cache.py
+"""
+
+import time
+
+import lead_enrichment
+import marketing_audit
+from result_cache import ResultCache
+
+
+def test_get_set_and_ttl(tmp_path):
+    cache = ResultCache('test', ttl_seconds=60, max_entries=10, path=str(tmp_path / 'cache.db'))
+    assert cache.get('a') is None
+
+    cache.set('a', {'score': 72})
+    assert cache.get('a')['value'] == {'score': 72}
+
+    cache.set('b', {'score': 10}, ttl_seconds=-1)
+    assert cache.get('b') is None
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 2
+
+
+def test_lru_eviction(tmp_path):
+    cache = ResultCache('test', ttl_seconds=60, max_entries=2, path=str(tmp_path / 'cache.db'))
+    cache.set('a', 1)
+    time.sleep(0.01)
+    cache.set('b', 2)
+    time.sleep(0.01)
+    cache.get('a')  # 'b' is now least recently used
+    time.sleep(0.01)
+    cache.set('c', 3)
+
+    assert cache.get('a')['value'] == 1
+    assert cache.get('b') is None
+    assert cache.get('c')['value'] == 3
+    assert cache.stats()['entries'] == 2
+
+
+def test_normalize_domain():
+    assert lead_enrichment.normalize_domain('https://www.Stripe.com/pricing?x=1') == 'stripe.com'
+    assert lead_enrichment.normalize_domain('stripe.com/') == 'stripe.com'
+    assert lead_enrichment.normalize_domain('http://app.stripe.com') == 'app.stripe.com'
+
+
+def test_enrichment_served_from_cache(tmp_path, monkeypatch):
+    cache = ResultCache('enrichment', ttl_seconds=60, max_entries=10, path=str(tmp_path / 'cache.db'))
+    monkeypatch.setattr(lead_enrichment, '_enrichment_cache', cache)
+
+    calls = []
+
+    def fake_fetch(domain, company_name=None):
+        calls.append(domain)
+        return {'domain': domain, 'company_name': 'Stripe'}
+
+    monkeypatch.setattr(lead_enrichment, 'fetch_company_data', fake_fetch)
+    monkeypatch.setattr(lead_enrichment, 'enrich_company_data',
+                        lambda company_data, icp_config: {'company_profile': {'name': 'Stripe'}})
+
+    first = lead_enrichment.handle_request({'domain': 'stripe.com'})
+    second = lead_enrichment.handle_request({'domain': 'https://www.stripe.com/'})
+    refreshed = lead_enrichment.handle_request({'domain': 'stripe.com', 'force_refresh': 'true'})
+
+    assert first['enrichment_metadata']['cache'] == 'miss'
+    assert second['enrichment_metadata']['cache'] == 'hit'
+    assert second['lead_score'] == first['lead_score']
+    assert refreshed['enrichment_metadata']['cache'] == 'refresh'
+    assert len(calls) == 2
+
+
+def test_audit_reused_when_content_unchanged(tmp_path, monkeypatch):
+    db = str(tmp_path / 'cache.db')
+    monkeypatch.setattr(marketing_audit, '_page_cache', ResultCache('audit_pages', 60, 10, path=db))
+    monkeypatch.setattr(marketing_audit, '_audit_cache', ResultCache('audit_results', 60, 10, path=db))
+
+    pages = iter([
+        b'<html><title>Acme</title><h1>Hello</h1></html>',
+        b'<html><head><title>Acme</title><script>x=1</script></head><h1>Hello</h1></html>',
+        b'<html><title>Acme</title><h1>New pricing</h1></html>',
+    ])
+
+    def fake_fetch(url, cached_page=None):
+        website_data = marketing_audit.parse_website_content(next(pages), url, 200, 0.1)
+        return marketing_audit.add_page_validators(website_data, {})
+
+    calls = []
+    monkeypatch.setattr(marketing_audit, 'fetch_website_content', fake_fetch)
+    monkeypatch.setattr(marketing_audit, 'generate_marketing_audit',
+                        lambda website_data, industry: calls.append(industry) or {'overall_assessment': {}})
+
+    params = {'url': 'https://acme.test', 'industry': 'SaaS'}
+    assert marketing_audit.handle_request(params)['audit_metadata']['cache'] == 'miss'
+    assert marketing_audit.handle_request(params)['audit_metadata']['cache'] == 'hit'
+    assert marketing_audit.handle_request(params)['audit_metadata']['cache'] == 'miss'
+    assert len(calls) == 2
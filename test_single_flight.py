@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests for single-flight request coalescing
+==========================================
+Usage:
+    python -m pytest test_single_flight.py
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from single_flight import SingleFlight, AsyncSingleFlight, request_key
+
+
+def test_request_key_ignores_key_order():
+    assert request_key('enrich', {'a': 1, 'b': 2}) == request_key('enrich', {'b': 2, 'a': 1})
+    assert request_key('enrich', {'a': 1}) != request_key('audit', {'a': 1})
+
+
+def test_concurrent_identical_calls_run_once():
+    group = SingleFlight()
+    started = threading.Event()
+    calls = []
+
+    def slow_call():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return {'lead_score': 72}
+
+    def caller(_):
+        return group.do('enrich', 'same', slow_call)
+
+    with ThreadPoolExecutor(5) as pool:
+        leader = pool.submit(caller, 0)
+        started.wait()
+        followers = list(pool.map(caller, range(4)))
+
+    assert leader.result() == ({'lead_score': 72}, False)
+    assert followers == [({'lead_score': 72}, True)] * 4
+    assert len(calls) == 1
+    assert group.stats()['upstream_calls_saved'] == 4
+    assert group.stats()['in_flight'] == 0
+
+
+def test_errors_are_shared_and_not_remembered():
+    group = SingleFlight()
+
+    def failing():
+        raise ValueError('boom')
+
+    with pytest.raises(ValueError):
+        group.do('audit', 'k', failing)
+    assert group.do('audit', 'k', lambda: 'ok') == ('ok', False)
+
+
+def test_async_calls_coalesce():
+    group = AsyncSingleFlight()
+    calls = []
+
+    async def slow_call():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 'result'
+
+    async def main():
+        return await asyncio.gather(*(group.do('qualify', 'same', slow_call) for _ in range(3)))
+
+    results = asyncio.run(main())
+    assert [result for result, _ in results] == ['result'] * 3
+    assert sorted(shared for _, shared in results) == [False, True, True]
+    assert len(calls) == 1
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared SQLite store helpers
+=========================================
+Usage:
+    python -m pytest test_sqlite_store.py
+"""
+
+from chat_sessions import ChatSessionStore
+from result_cache import ResultCache
+from sqlite_store import connect, init_db, evict
+
+
+def test_evict_drops_expired_then_least_recently_read(tmp_path):
+    path = str(tmp_path / 'store.db')
+    init_db(path, 'CREATE TABLE items (key TEXT PRIMARY KEY, expires_at REAL, last_accessed REAL);')
+    with connect(path) as conn:
+        conn.executemany('INSERT INTO items VALUES (?, ?, ?)',
+                         [('expired', 5, 4), ('old', 50, 1), ('recent', 50, 3), ('newest', 50, 4)])
+        evict(conn, 'items', 'key', 2, now=10)
+        assert [row['key'] for row in conn.execute('SELECT key FROM items ORDER BY key')] == ['newest', 'recent']
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+
+def test_unreadable_database_degrades_to_a_miss(tmp_path):
+    cache = ResultCache('test', ttl_seconds=60, max_entries=10, path=str(tmp_path / 'cache.db'))
+    sessions = ChatSessionStore(path=str(tmp_path / 'sessions.db'))
+    cache.path = sessions.path = str(tmp_path)  # a directory: every connect fails
+
+    cache.set('a', 1)
+    cache.delete('a')
+    assert cache.get('a') is None
+    assert cache.stats()['entries'] is None
+
+    sessions.save('session-aaaaaaaaaaaa', {'messages': []})
+    sessions.delete('session-aaaaaaaaaaaa')
+    assert sessions.get('session-aaaaaaaaaaaa') is None
+    assert sessions.stats()['stored'] is None
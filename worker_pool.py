@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Warm Tool Worker Pool
+=====================
+Keeps long-lived tool subprocesses alive between requests so server.py can keep
+the process isolation of run_python_script() without paying for a new
+interpreter and cold imports on every call.
+
+Each worker imports one tool module at startup and then speaks line-delimited
+JSON over stdin/stdout:
+
+    request  (one line): {"input": {...}}
+    response (one line): {"ok": true, "result": {...}, "rss_bytes": 123}
+                         {"ok": false, "error": "...", "error_type": "ValueError", "rss_bytes": 123}
+
+Workers are recycled after WORKER_MAX_REQUESTS jobs or once their RSS passes
+WORKER_MAX_RSS_MB. A job that exceeds its timeout gets its worker killed, just
+like the per-request subprocess path, and a fresh worker takes its place.
+
+Usage (worker side, started by the pool):
+    python worker_pool.py <module> <function>
+"""
+
+import os
+import sys
+import json
+import queue
+import time
+import select
+import resource
+import logging
+import importlib
+import threading
+import subprocess
+from datetime import datetime
+from typing import Dict, Any, Tuple, List, Optional
+
+import fast_json
+import metrics
+import request_log
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+WORKER_POOL_SIZE = int(os.getenv('WORKER_POOL_SIZE', '1'))
+WORKER_MAX_REQUESTS = int(os.getenv('WORKER_MAX_REQUESTS', '500'))
+WORKER_MAX_RSS_MB = int(os.getenv('WORKER_MAX_RSS_MB', '512'))
+WORKER_BOOT_TIMEOUT = int(os.getenv('WORKER_BOOT_TIMEOUT', '60'))
+# A worker that fails to boot is retried after this delay, doubling up to the max
+WORKER_RESPAWN_BACKOFF_SECONDS = float(os.getenv('WORKER_RESPAWN_BACKOFF_SECONDS', '1'))
+WORKER_RESPAWN_BACKOFF_MAX_SECONDS = float(os.getenv('WORKER_RESPAWN_BACKOFF_MAX_SECONDS', '60'))
+
+
+def current_rss_bytes() -> int:
+    """Return this process's resident set size in bytes."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # Peak RSS: kilobytes on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+# ============================================================================
+# WORKER SIDE
+# ============================================================================
+
+def serve(module_name: str, func_name: str) -> None:
+    """
+    Import one tool entry point and answer line-delimited JSON jobs forever.
+
+    stdout is reserved for the protocol; anything the tool prints to stdout is
+    redirected to stderr so it cannot corrupt a response line.
+    """
+    protocol_out = sys.stdout
+    sys.stdout = sys.stderr
+
+    handler = getattr(importlib.import_module(module_name), func_name)
+
+    protocol_out.write(json.dumps({'ready': True, 'pid': os.getpid()}) + '\n')
+    protocol_out.flush()
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            job = fast_json.loads(line)
+            response = {'ok': True, 'result': handler(job['input'])}
+        except Exception as e:
+            response = {'ok': False, 'error': str(e), 'error_type': type(e).__name__}
+
+        response['rss_bytes'] = current_rss_bytes()
+        protocol_out.write(fast_json.dumps(response, default=str).decode('utf-8') + '\n')
+        protocol_out.flush()
+
+
+# ============================================================================
+# POOL SIDE
+# ============================================================================
+
+class WorkerTimeout(Exception):
+    """Raised when a worker does not answer within the job's timeout."""
+
+
+class WorkerDied(Exception):
+    """Raised when a worker closes its stdout (crashed or was killed)."""
+
+
+class ToolWorker:
+    """One long-lived tool subprocess."""
+
+    def __init__(self, script_name: str, module_name: str, func_name: str, python_cmd: str):
+        self.script_name = script_name
+        self.requests_served = 0
+        self.rss_bytes = 0
+        self.process = subprocess.Popen(
+            [python_cmd, os.path.join(SCRIPT_DIR, 'worker_pool.py'), module_name, func_name],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=None,  # inherit: tool progress goes straight to the server log
+            cwd=SCRIPT_DIR,
+            text=True,
+            bufsize=1
+        )
+
+    def wait_ready(self, timeout: float) -> None:
+        """Block until the worker has imported its tool and announced itself."""
+        self._read_line(timeout)
+
+    def call(self, input_data: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """Send one job and return the worker's decoded response line."""
+        self.process.stdin.write(fast_json.dumps({'input': input_data}).decode('utf-8') + '\n')
+        self.process.stdin.flush()
+        response = self._read_line(timeout)
+        self.requests_served += 1
+        self.rss_bytes = response.get('rss_bytes', 0)
+        return response
+
+    def _read_line(self, timeout: float) -> Dict[str, Any]:
+        # The worker writes exactly one flushed line per job, so once the fd is
+        # readable readline() returns without blocking on a partial line.
+        readable, _, _ = select.select([self.process.stdout], [], [], timeout)
+        if not readable:
+            raise WorkerTimeout()
+        line = self.process.stdout.readline()
+        if not line:
+            raise WorkerDied(f'exit code {self.process.poll()}')
+        return fast_json.loads(line)
+
+    def should_recycle(self) -> bool:
+        """True once the worker has served its quota or grown past the RSS limit."""
+        return (self.requests_served >= WORKER_MAX_REQUESTS or
+                self.rss_bytes > WORKER_MAX_RSS_MB * 1024 * 1024)
+
+    def is_alive(self) -> bool:
+        return self.process.poll() is None
+
+    def kill(self) -> None:
+        """Kill the worker immediately (timeout semantics of run_python_script)."""
+        if self.is_alive():
+            self.process.kill()
+        self.process.wait()
+
+    def stop(self) -> None:
+        """Ask the worker to exit by closing stdin, killing it if it lingers."""
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.kill()
+
+
+class ToolWorkerPool:
+    """
+    Pool of warm ToolWorkers, WORKER_POOL_SIZE per tool script.
+
+    Pipes belong to the process that created them, so a pool started before a
+    fork (e.g. gunicorn --preload) is rebuilt lazily in each worker process.
+    """
+
+    def __init__(self, entry_points: Dict[str, Tuple[str, str]], python_cmd: str, size: int = WORKER_POOL_SIZE):
+        self.entry_points = entry_points
+        self.python_cmd = python_cmd
+        self.size = size
+        self._idle: Dict[str, queue.Queue] = {}
+        self._owner_pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Spawn every worker in parallel and wait for them to finish importing."""
+        with self._lock:
+            if self._owner_pid == os.getpid():
+                return
+            self._owner_pid = os.getpid()
+            self._idle = {script_name: queue.Queue() for script_name in self.entry_points}
+
+        threads: List[threading.Thread] = []
+        for script_name in self.entry_points:
+            for _ in range(self.size):
+                thread = threading.Thread(target=self._spawn, args=(script_name,), daemon=True)
+                thread.start()
+                threads.append(thread)
+        for thread in threads:
+            thread.join()
+
+    def _spawn(self, script_name: str, backoff: float = 0.0) -> None:
+        """
+        Start one worker and put it in the idle queue once it is ready. A worker
+        that fails to boot is retried in the background with exponential
+        backoff, so its slot in the pool is never lost.
+        """
+        if self._owner_pid != os.getpid():
+            return
+        module_name, func_name = self.entry_points[script_name]
+        started = time.perf_counter()
+        try:
+            worker = ToolWorker(script_name, module_name, func_name, self.python_cmd)
+        except OSError as e:
+            self._retry_spawn(script_name, backoff, e)
+            return
+        try:
+            worker.wait_ready(WORKER_BOOT_TIMEOUT)
+        except (WorkerTimeout, WorkerDied, ValueError) as e:
+            worker.kill()
+            self._retry_spawn(script_name, backoff, e)
+            return
+        metrics.observe_stage(metrics.tool_label(script_name), 'worker_boot', time.perf_counter() - started)
+        request_log.log_event('worker_ready', tool=script_name, pid=worker.process.pid)
+        self._idle[script_name].put(worker)
+
+    def _retry_spawn(self, script_name: str, backoff: float, error: Exception) -> None:
+        backoff = min(max(backoff * 2, WORKER_RESPAWN_BACKOFF_SECONDS), WORKER_RESPAWN_BACKOFF_MAX_SECONDS)
+        request_log.log_event('worker_boot_failed', logging.ERROR, tool=script_name, error_type=type(error).__name__,
+                              error=str(error), retry_in_s=backoff)
+        timer = threading.Timer(backoff, self._spawn, args=(script_name, backoff))
+        timer.daemon = True
+        timer.start()
+
+    def _replace(self, worker: ToolWorker, kill: bool = False) -> None:
+        """Retire a worker and start its replacement, off the request path."""
+        if kill:
+            worker.kill()
+
+        def retire_and_respawn():
+            if not kill:
+                worker.stop()
+            self._spawn(worker.script_name)
+
+        threading.Thread(target=retire_and_respawn, daemon=True).start()
+
+    def run(self, script_name: str, input_data: Dict[str, Any], timeout: int = 120) -> Tuple[Dict[str, Any], int]:
+        """
+        Run one job on an idle warm worker. timeout covers both waiting for
+        the worker and the job itself.
+
+        Returns:
+            Tuple of (response_dict, http_status_code), same shape as run_python_script()
+        """
+        if self._owner_pid != os.getpid():
+            self.start()
+
+        if script_name not in self._idle:
+            return {
+                'error': f'No warm workers configured for {script_name}',
+                'timestamp': datetime.utcnow().isoformat() + 'Z'
+            }, 500
+
+        # One budget for waiting on a worker and running the job, like run_python_script()
+        end = time.monotonic() + timeout
+        while True:
+            try:
+                worker = self._idle[script_name].get(timeout=max(0.0, end - time.monotonic()))
+            except queue.Empty:
+                return {
+                    'error': f'No idle worker became available within {timeout} seconds',
+                    'script': script_name,
+                    'timestamp': datetime.utcnow().isoformat() + 'Z'
+                }, 504
+            if worker.is_alive():
+                break
+            self._replace(worker, kill=True)
+
+        request_log.log_event('worker_job_started', tool=script_name, pid=worker.process.pid)
+
+        try:
+            response = worker.call(input_data, max(0.0, end - time.monotonic()))
+
+        except WorkerTimeout:
+            self._replace(worker, kill=True)
+            return {
+                'error': f'Script execution timed out after {timeout} seconds',
+                'script': script_name,
+                'timestamp': datetime.utcnow().isoformat() + 'Z'
+            }, 504
+
+        except (WorkerDied, OSError, ValueError) as e:
+            self._replace(worker, kill=True)
+            return {
+                'error': f'Worker exited unexpectedly: {str(e)}',
+                'script': script_name,
+                'error_type': type(e).__name__,
+                'timestamp': datetime.utcnow().isoformat() + 'Z'
+            }, 500
+
+        if worker.should_recycle():
+            request_log.log_event('worker_recycled', tool=script_name, pid=worker.process.pid,
+                                  requests=worker.requests_served, rss_mb=worker.rss_bytes // (1024 * 1024))
+            self._replace(worker)
+        else:
+            self._idle[script_name].put(worker)
+
+        if not response.get('ok'):
+            return {
+                'error': f"Script execution failed: {response.get('error')}",
+                'script': script_name,
+                'error_type': response.get('error_type'),
+                'timestamp': datetime.utcnow().isoformat() + 'Z'
+            }, 500
+
+        request_log.log_event('worker_job_completed', tool=script_name)
+        return response['result'], 200
+
+    def stats(self) -> Dict[str, int]:
+        """Number of idle workers per script, for /health."""
+        return {script_name: idle.qsize() for script_name, idle in self._idle.items()}
+
+
+# ============================================================================
+# MAIN (worker process)
+# ============================================================================
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print("Usage: python worker_pool.py <module> <function>", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        serve(sys.argv[1], sys.argv[2])
+    except KeyboardInterrupt:
+        sys.exit(130)